@@ -0,0 +1,289 @@
+"""
+Measure how fast the site renders its pages, and how fast versions import.
+
+Each page is requested through the test client, with the page cache cleared so
+that it is rendered every time. It is measured "cold", with no snapshots built
+yet, as it would be for the first request to a worker, and "warm", as it would
+be for every request after that. Memory is measured in a separate request,
+because tracing allocations slows everything else down.
+
+Results are plain dicts, so they can be stored as JSON and compared between
+commits with `compare_results`.
+"""
+
+import datetime
+import io
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager, redirect_stdout
+from typing import Any
+
+import attrs
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cbv import models
+from cbv.importer.importers import InspectCodeImporter, PreloadedCodeImporter
+from cbv.importer.storages import DBStorage
+from cbv.snapshots import clear_snapshots, get_version_index
+
+
+# The class page to measure, when the version has it.
+DEFAULT_KLASS = ("django.views.generic.edit", "FormView")
+# Imports are measured with this version number, and then rolled back.
+IMPORT_VERSION = "0.0.benchmark"
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@attrs.frozen
+class Measurement:
+    seconds: float
+    queries: int
+    query_seconds: float
+    render_seconds: float
+    # In bytes.
+    peak_memory: int
+
+
+@attrs.define
+class RenderTimer:
+    seconds: float = 0.0
+    # How many templates are being rendered, so that templates included by
+    # others aren't counted twice.
+    depth: int = 0
+
+
+@contextmanager
+def time_rendering() -> Iterator[RenderTimer]:
+    """Time how long is spent rendering templates."""
+    timer = RenderTimer()
+    render = Template.render
+
+    def timed_render(template: Template, context: Any) -> Any:
+        timer.depth += 1
+        start = time.perf_counter()
+        try:
+            return render(template, context)
+        finally:
+            timer.depth -= 1
+            if not timer.depth:
+                timer.seconds += time.perf_counter() - start
+
+    Template.render = timed_render
+    try:
+        yield timer
+    finally:
+        Template.render = render
+
+
+def get_page_paths(version_number: str) -> dict[str, str]:
+    """Get the path of each kind of page to measure, for a version."""
+    version_index = get_version_index()
+    klass_urls = {
+        klass: urls[version_number]
+        for klass, urls in version_index.klass_urls.items()
+        if version_number in urls
+    }
+    if not klass_urls:
+        raise BenchmarkError(f"There are no classes in version {version_number}")
+    module_name, klass_name = (
+        DEFAULT_KLASS if DEFAULT_KLASS in klass_urls else min(klass_urls)
+    )
+    return {
+        "home": reverse("home"),
+        "version": reverse("version-detail", kwargs={"version": version_number}),
+        "module": version_index.module_urls[module_name][version_number],
+        "klass": klass_urls[(module_name, klass_name)],
+        "sitemap": reverse("sitemap"),
+        "version_sitemap": reverse(
+            "version-sitemap", kwargs={"version": version_number}
+        ),
+    }
+
+
+def measure_page(client: Client, path: str, *, cold: bool) -> Measurement:
+    def request() -> None:
+        response = client.get(path)
+        if response.status_code != 200:
+            raise BenchmarkError(f"{path} returned {response.status_code}")
+        # Sitemaps are streamed, so are only built as they are read.
+        response.getvalue()
+
+    def prepare() -> None:
+        cache.clear()
+        if cold:
+            clear_snapshots()
+
+    prepare()
+    with CaptureQueriesContext(connection) as queries, time_rendering() as timer:
+        start = time.perf_counter()
+        request()
+        seconds = time.perf_counter() - start
+    # The queries are read from the connection's log, which the next request
+    # clears.
+    query_count = len(queries)
+    query_seconds = sum(float(query["time"]) for query in queries)
+
+    prepare()
+    tracemalloc.start()
+    try:
+        request()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        seconds=seconds,
+        queries=query_count,
+        query_seconds=query_seconds,
+        render_seconds=timer.seconds,
+        peak_memory=peak_memory,
+    )
+
+
+def measure_pages(version_number: str, *, repeat: int) -> dict[str, dict[str, Any]]:
+    """
+    Measure each kind of page of a version.
+
+    The warm measurement is the run with the median time of `repeat` runs.
+    """
+    client = Client()
+    results = {}
+    for name, path in get_page_paths(version_number).items():
+        cold = measure_page(client, path, cold=True)
+        warm_runs = [measure_page(client, path, cold=False) for _ in range(repeat)]
+        warm = sorted(warm_runs, key=lambda run: run.seconds)[len(warm_runs) // 2]
+        results[name] = {
+            "path": path,
+            "cold": attrs.asdict(cold),
+            "warm": attrs.asdict(warm),
+        }
+    return results
+
+
+def measure_imports() -> dict[str, dict[str, Any]]:
+    """
+    Measure inspecting the installed Django, and storing what was found.
+
+    The stored version is rolled back afterwards, so nothing is left behind.
+    """
+    importer = InspectCodeImporter(module_paths=list(settings.CBV_SOURCES))
+    start = time.perf_counter()
+    elements = list(importer.generate_code_data())
+    inspect_seconds = time.perf_counter() - start
+
+    with (
+        transaction.atomic(),
+        CaptureQueriesContext(connection) as queries,
+        # Don't mix the storage's summary in with the results.
+        redirect_stdout(io.StringIO()),
+    ):
+        start = time.perf_counter()
+        DBStorage().import_project_version(
+            importer=PreloadedCodeImporter(elements=elements),
+            project_version=IMPORT_VERSION,
+        )
+        store_seconds = time.perf_counter() - start
+        transaction.set_rollback(True)
+
+    return {
+        "inspect": {
+            "seconds": inspect_seconds,
+            "elements": len(elements),
+            "elements_per_second": len(elements) / inspect_seconds,
+            "files_read": importer.stats.files_read,
+        },
+        "store": {
+            "seconds": store_seconds,
+            "elements": len(elements),
+            "elements_per_second": len(elements) / store_seconds,
+            "queries": len(queries),
+            "query_seconds": sum(float(query["time"]) for query in queries),
+        },
+    }
+
+
+def run_benchmarks(
+    version_number: str | None, *, repeat: int, imports: bool
+) -> dict[str, Any]:
+    """Measure the pages of a version, the latest by default, and the imports."""
+    if version_number is None:
+        version_number = models.ProjectVersion.objects.get_latest().version_number
+    results: dict[str, Any] = {
+        "environment": get_environment(),
+        "version": version_number,
+        "repeat": repeat,
+        "pages": measure_pages(version_number, repeat=repeat),
+    }
+    if imports:
+        results["imports"] = measure_imports()
+    return results
+
+
+def get_environment() -> dict[str, Any]:
+    """Describe what was measured, so that results can be told apart."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "versions": models.ProjectVersion.objects.count(),
+        "klasses": models.Klass.objects.count(),
+    }
+
+
+def compare_results(old: Mapping[str, Any], new: Mapping[str, Any]) -> list[str]:
+    """Describe how each measurement has changed, one line per measurement."""
+    lines = []
+    for name, measurements in new["pages"].items():
+        for kind in ("cold", "warm"):
+            for metric, value in measurements.get(kind, {}).items():
+                try:
+                    old_value = old["pages"][name][kind][metric]
+                except KeyError:
+                    continue
+                lines.append(
+                    f"{name} {kind} {metric}: {format_change(old_value, value)}"
+                )
+    for name, measurements in new.get("imports", {}).items():
+        for metric, value in measurements.items():
+            try:
+                old_value = old["imports"][name][metric]
+            except KeyError:
+                continue
+            lines.append(f"{name} {metric}: {format_change(old_value, value)}")
+    return lines
+
+
+def format_change(old: float, new: float) -> str:
+    if old:
+        change = f"{(new - old) / old:+.1%}"
+    else:
+        change = "n/a" if new else "+0.0%"
+    return f"{format_value(old)} -> {format_value(new)} ({change})"
+
+
+def format_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else f"{value:.4f}"
@@ -0,0 +1,120 @@
+"""
+Caching for the pages built from the stored versions.
+
+A page only changes when a version is imported or loaded, so a rendered
+response stays good for as long as the versions do. Rather than invalidating
+anything when that happens, the cache key includes the token of the
+cross-version index, which changes whenever any version's fingerprint does.
+Pages show links to other versions, so it isn't enough to key on just the
+fingerprint of the version being shown.
+
+The same token gives each page its ETag, so that clients and CDNs can
+revalidate pages without them being rendered again.
+
+The cache used is Django's default cache, which is configured by CACHE_URL.
+"""
+
+import hashlib
+from typing import Any
+
+from django.core.cache import cache
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBase
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.generic import View
+
+from cbv.metrics import count_page_cache
+from cbv.snapshots import VersionIndex, get_version_index
+from cbv.timing import timed
+
+
+# Pages of a particular version only change when a new version is added to the
+# version switcher.
+PINNED_MAX_AGE = 60 * 60 * 24
+# Pages and redirects for the latest version change as soon as a new one is added.
+LATEST_MAX_AGE = 60 * 5
+
+
+class VersionPageCacheMixin(View):
+    """
+    Cache successful GET and HEAD responses from a view, and answer conditional
+    requests for them.
+
+    The cross-version index is looked up before the view runs, and kept on
+    `self.version_index` so that the view can use it without looking it up again.
+
+    The ETag is the same for every page, whether it exists or not, so before a
+    conditional request is answered `check_exists` is called to make sure that
+    there is a page. Views of anything within a version should extend it.
+    """
+
+    version_index: VersionIndex
+    # Whether the page is for a particular version, rather than the latest.
+    is_pinned = True
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+        self.version_index = get_version_index()
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        digest = hashlib.sha256(repr(self.version_index.token).encode()).hexdigest()
+        last_modified = self.version_index.last_modified
+        validators = {"ETag": quote_etag(digest)}
+        if last_modified:
+            validators["Last-Modified"] = http_date(last_modified.timestamp())
+
+        conditional_response = get_conditional_response(
+            request,
+            etag=validators["ETag"],
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if conditional_response is not None:
+            # A page which doesn't exist mustn't be "not modified". Pages which
+            # are in the cache were found, so needn't be checked.
+            self.check_exists()
+            count_page_cache("not_modified")
+            self.patch_response(conditional_response, validators)
+            return conditional_response
+
+        key = get_page_cache_key(request, digest)
+        response: HttpResponse | None = cache.get(key)
+        count_page_cache("miss" if response is None else "hit")
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                if isinstance(response, SimpleTemplateResponse):
+                    with timed("render"):
+                        response.render()
+                self.patch_response(response, validators)
+                # The key changes when the page does, so it never goes stale.
+                cache.set(key, response, timeout=None)
+        return response
+
+    def check_exists(self) -> None:
+        """Raise Http404 if the version in the URL, if there is one, doesn't exist."""
+        version_number = self.kwargs.get("version")
+        if version_number is not None and version_number not in {
+            version.version_number for version in self.version_index.versions
+        }:
+            raise Http404
+
+    def patch_response(
+        self, response: HttpResponseBase, validators: dict[str, str]
+    ) -> None:
+        for header, value in validators.items():
+            response.headers[header] = value
+        if self.is_pinned:
+            patch_cache_control(
+                response, public=True, max_age=PINNED_MAX_AGE, immutable=True
+            )
+        else:
+            patch_cache_control(response, public=True, max_age=LATEST_MAX_AGE)
+
+
+def get_page_cache_key(request: HttpRequest, version_digest: str) -> str:
+    # The query string is left out, as none of the pages use it. The host is
+    # kept, because pages include absolute URLs.
+    url = request.build_absolute_uri(request.path)
+    digest = hashlib.sha256(f"{url}\n{version_digest}".encode()).hexdigest()
+    return f"cbv_page:{digest}"
@@ -0,0 +1,49 @@
+"""
+Syntax highlighting for the source code of methods.
+
+Highlighting is slow compared to everything else involved in rendering a page,
+so it is done when a version is stored rather than on each request. The stored
+HTML depends only on the code, so it can be shared between every copy of a
+method, in any version, and the line numbers are added when it is displayed.
+"""
+
+import hashlib
+
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import SafeString, mark_safe
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import PythonLexer
+
+
+def hash_code(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+def highlight_code(code: str) -> str:
+    """Highlight some Python code as HTML, without any line numbers or wrapper."""
+    return highlight(code, PythonLexer(stripall=True), HtmlFormatter(nowrap=True))
+
+
+def with_line_numbers(highlighted: str, line_number: int) -> SafeString:
+    """
+    Lay out code from `highlight_code` in a table alongside its line numbers.
+
+    This matches the output of Pygments' HtmlFormatter with `linenos=True`.
+    """
+    line_count = highlighted.count("\n")
+    # Pygments pads the numbers to the width of the last one.
+    width = len(str(line_number + line_count - 1))
+    line_numbers = format_html_join(
+        "\n",
+        '<span class="normal">{}</span>',
+        ((str(n).rjust(width),) for n in range(line_number, line_number + line_count)),
+    )
+    return format_html(
+        '<div class="highlight"><table class="highlighttable"><tr>'
+        '<td class="linenos"><div class="linenodiv"><pre>{}</pre></div></td>'
+        '<td class="code"><div><pre><span></span>{}</pre></div></td>'
+        "</tr></table></div>\n",
+        line_numbers,
+        mark_safe(highlighted),
+    )
@@ -33,7 +33,7 @@ class Method(CodeElement):
     name: str
     code: str
     docstring: str
-    kwargs: list[str]
+    kwargs: str
     line_number: int
     klass_path: str
 
@@ -1,9 +1,15 @@
+import ast
+import builtins
 import importlib
 import inspect
+import linecache
+import re
 import sys
 import textwrap
-from collections.abc import Iterator
-from typing import Protocol
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import Any, Protocol
 
 import attr
 from django.core.exceptions import ImproperlyConfigured
@@ -34,11 +40,177 @@ class CodeImporter(Protocol):  # nocoverage: protocol
     def generate_code_data(self) -> Iterator[CodeElement]: ...
 
 
+@attr.frozen
+class PreloadedCodeImporter:
+    """Generates code structure classes that have already been gathered."""
+
+    elements: Sequence[CodeElement]
+
+    def generate_code_data(self) -> Iterator[CodeElement]:
+        yield from self.elements
+
+
+@attr.define
+class ImportStats:
+    """How much work an import took."""
+
+    files_read: int = 0
+    cache_hits: int = 0
+    # The time spent on each of the module paths, in seconds.
+    module_times: dict[str, float] = attr.Factory(dict)
+
+
+@attr.frozen
+class SourceFile:
+    """The lines of a source file, and where each class and function is in it."""
+
+    lines: list[str]
+    # The (first, last) line of each class, by qualified name.
+    class_spans: dict[str, tuple[int, int]]
+    # The last line of each function, by its first line.
+    function_ends: dict[int, int]
+
+
+@attr.frozen
+class SourceCache:
+    """
+    Looks up the source of classes and functions, reading each file only once.
+
+    inspect.getsourcelines reads through the whole file to find a class, and
+    tokenizes a function's file from its first line to find its end, on every
+    call. This parses each file once instead, and records where every class and
+    function is.
+    """
+
+    stats: ImportStats = attr.field(factory=ImportStats)
+    _source_files: dict[str, str | None] = attr.field(init=False, factory=dict)
+    _files: dict[str, SourceFile] = attr.field(init=False, factory=dict)
+
+    def get_source_file(self, member: Any) -> str | None:
+        """Get the file a member was defined in, as inspect.getsourcefile does."""
+        filename = inspect.getfile(member)
+        try:
+            source_file = self._source_files[filename]
+        except KeyError:
+            source_file = self._source_files[filename] = inspect.getsourcefile(member)
+        else:
+            self.stats.cache_hits += 1
+        return source_file
+
+    def get_source_lines(self, member: Any) -> tuple[list[str], int]:
+        """Get the source of a member, as inspect.getsourcelines does."""
+        member = inspect.unwrap(member)
+        if inspect.ismethod(member):
+            member = member.__func__
+
+        span = None
+        if inspect.isclass(member) or inspect.isfunction(member):
+            filename = self.get_source_file(member)
+            if filename is not None:
+                source_file = self._get_file(filename)
+                if inspect.isclass(member):
+                    span = source_file.class_spans.get(member.__qualname__)
+                else:
+                    start = member.__code__.co_firstlineno
+                    end = source_file.function_ends.get(start)
+                    span = None if end is None else (start, end)
+        # Anything else, such as a lambda, is rare enough to leave to inspect.
+        if span is None:
+            return inspect.getsourcelines(member)
+
+        start, end = span
+        return source_file.lines[start - 1 : end], start
+
+    def _get_file(self, filename: str) -> SourceFile:
+        try:
+            source_file = self._files[filename]
+        except KeyError:
+            pass
+        else:
+            self.stats.cache_hits += 1
+            return source_file
+
+        lines = linecache.getlines(filename)
+        class_spans: dict[str, tuple[int, int]] = {}
+        function_ends: dict[int, int] = {}
+        _find_definitions(
+            ast.parse("".join(lines)), lines, [], class_spans, function_ends
+        )
+        self.stats.files_read += 1
+        source_file = self._files[filename] = SourceFile(
+            lines=lines, class_spans=class_spans, function_ends=function_ends
+        )
+        return source_file
+
+
+def _find_definitions(
+    node: ast.AST,
+    lines: Sequence[str],
+    qualname: list[str],
+    class_spans: dict[str, tuple[int, int]],
+    function_ends: dict[int, int],
+) -> None:
+    for child in ast.iter_child_nodes(node):
+        if not isinstance(child, ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef):
+            _find_definitions(child, lines, qualname, class_spans, function_ends)
+            continue
+
+        # Like inspect, count decorators as part of what they decorate.
+        start = min([child.lineno, *(d.lineno for d in child.decorator_list)])
+        end = _get_block_end(child, lines)
+        if isinstance(child, ast.ClassDef):
+            # inspect finds the first class with a name, if there are several.
+            class_spans.setdefault(".".join([*qualname, child.name]), (start, end))
+            inner_qualname = [*qualname, child.name]
+        else:
+            function_ends[start] = end
+            inner_qualname = [*qualname, child.name, "<locals>"]
+        _find_definitions(child, lines, inner_qualname, class_spans, function_ends)
+
+
+def _get_block_end(
+    node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef,
+    lines: Sequence[str],
+) -> int:
+    """
+    Get the last line of a class or function, as inspect.getblock would.
+
+    That includes any comments after the body which are indented as far as it.
+    """
+    end = node.end_lineno
+    assert end is not None
+    body = node.body[0]
+    if lines[body.lineno - 1][: body.col_offset].strip():
+        # The body is on the same line as the definition.
+        return end
+
+    for line_number in range(end + 1, len(lines) + 1):
+        line = lines[line_number - 1]
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        if not stripped.startswith("#") or len(line) - len(stripped) < body.col_offset:
+            break
+        end = line_number
+    return end
+
+
 @attr.frozen
 class InspectCodeImporter:
-    """Generates code structure classes by using the inspect module."""
+    """
+    Generates code structure classes by using the inspect module.
+
+    The source of each file is only read once per importer. `stats` records how
+    many files were read, and how long each module took.
+    """
 
     module_paths: list[str]
+    stats: ImportStats = attr.field(init=False, factory=ImportStats)
+    _source: SourceCache = attr.field(init=False)
+
+    @_source.default
+    def _make_source(self) -> SourceCache:
+        return SourceCache(stats=self.stats)
 
     def generate_code_data(self) -> Iterator[CodeElement]:
         modules = []
@@ -51,13 +223,30 @@ class InspectCodeImporter:
         for module in modules:
             module_name = module.__name__
 
-            yield from self._process_member(
-                member=module,
-                member_name=module_name,
-                root_module_name=module_name,
-                parent=None,
+            yield from self._timed(
+                module_name,
+                self._process_member(
+                    member=module,
+                    member_name=module_name,
+                    root_module_name=module_name,
+                    parent=None,
+                ),
             )
 
+    def _timed(
+        self, module_name: str, elements: Iterable[CodeElement]
+    ) -> Iterator[CodeElement]:
+        """Time generating elements, leaving out the time spent using them."""
+        self.stats.module_times.setdefault(module_name, 0.0)
+        iterator = iter(elements)
+        while True:
+            start = time.perf_counter()
+            element = next(iterator, None)
+            self.stats.module_times[module_name] += time.perf_counter() - start
+            if element is None:
+                return
+            yield element
+
     def _process_member(
         self, *, member, member_name, root_module_name, parent
     ) -> Iterator[CodeElement]:
@@ -111,7 +300,7 @@ class InspectCodeImporter:
     def _handle_class_on_module(
         self, member, parent, root_module_name
     ) -> Iterator[CodeElement]:
-        if inspect.getsourcefile(member) != inspect.getsourcefile(parent):
+        if self._source.get_source_file(member) != self._source.get_source_file(parent):
             return None
 
         if issubclass(member, Exception | Warning):
@@ -121,7 +310,7 @@ class InspectCodeImporter:
             name=member.__name__,
             module=member.__module__,
             docstring=get_docstring(member),
-            line_number=get_line_number(member),
+            line_number=get_line_number(member, self._source),
             path=_full_path(member),
             bases=[_full_path(k) for k in member.__bases__],
             best_import_path=_get_best_import_path_for_class(member),
@@ -139,10 +328,10 @@ class InspectCodeImporter:
             member = member.__wrapped__
 
         # Checks
-        if not ok_to_add_method(member, parent):
+        if not ok_to_add_method(member, parent, self._source):
             return
 
-        code, arguments, start_line = get_code(member)
+        code, arguments, start_line = get_code(member, self._source)
 
         yield Method(
             name=member_name,
@@ -166,7 +355,7 @@ class InspectCodeImporter:
         yield KlassAttribute(
             name=member_name,
             value=get_value(member),
-            line_number=get_line_number(member),
+            line_number=get_line_number(member, self._source),
             klass_path=_full_path(parent),
         )
 
@@ -185,9 +374,9 @@ def _full_path(klass: type) -> str:
     return f"{klass.__module__}.{klass.__name__}"
 
 
-def get_code(member):
+def get_code(member: Any, source: SourceCache) -> tuple[str, str, int]:
     # Strip unneeded whitespace from beginning of code lines
-    lines, start_line = inspect.getsourcelines(member)
+    lines, start_line = source.get_source_lines(member)
 
     # Join code lines into one string
     code = "".join(lines)
@@ -219,28 +408,34 @@ def get_filename(member) -> str:
     return filename
 
 
-def get_line_number(member) -> int:
+def get_line_number(member: Any, source: SourceCache) -> int:
     try:
-        return inspect.getsourcelines(member)[1]
+        return source.get_source_lines(member)[1]
     except TypeError:
         return -1
 
 
+# The address in the default repr of an object, such as "<View object at 0x...>".
+MEMORY_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
 def get_value(member) -> str:
-    return f"'{member}'" if isinstance(member, str) else str(member)
+    if isinstance(member, str):
+        return f"'{member}'"
+    # Addresses differ each time Django is inspected, so would make every import
+    # look changed, and they mean nothing to a reader anyway.
+    return MEMORY_ADDRESS.sub("", str(member))
 
 
 def ok_to_add_attribute(member, member_name, parent) -> bool:
     if inspect.isclass(parent) and member in object.__dict__.values():
         return False
 
-    if member_name in BANNED_ATTR_NAMES:
-        return False
-    return True
+    return member_name not in BANNED_ATTR_NAMES
 
 
-def ok_to_add_method(member, parent) -> bool:
-    if inspect.getsourcefile(member) != inspect.getsourcefile(parent):
+def ok_to_add_method(member: Any, parent: Any, source: SourceCache) -> bool:
+    if source.get_source_file(member) != source.get_source_file(parent):
         return False
 
     if not inspect.isclass(parent):
@@ -248,13 +443,9 @@ def ok_to_add_method(member, parent) -> bool:
 
     # Use line inspection to work out whether the method is defined on this
     # klass. Possibly not the best way, but I can't think of another atm.
-    lines, start_line = inspect.getsourcelines(member)
-    parent_lines, parent_start_line = inspect.getsourcelines(parent)
-    if start_line < parent_start_line or start_line > parent_start_line + len(
-        parent_lines
-    ):
-        return False
-    return True
+    _lines, start_line = source.get_source_lines(member)
+    parent_lines, parent_start_line = source.get_source_lines(parent)
+    return parent_start_line <= start_line <= parent_start_line + len(parent_lines)
 
 
 class LazyAttribute:
@@ -288,3 +479,569 @@ class LazyAttribute:
         func = self.lazy_func
         argument_string = ", ".join(arguments)
         return f"{func}({argument_string})"
+
+
+@attr.frozen
+class ASTCodeImporter:
+    """
+    Generates code structure classes by parsing source code with the ast module.
+
+    Nothing is imported, so this works on any source tree, such as an unpacked
+    release of Django, without needing it, its dependencies, or any settings.
+    `source_root` is the directory containing the top-level packages.
+
+    The results match those of InspectCodeImporter as far as they can be worked
+    out from the source. Attribute values which would need the code to be run
+    are given as they are written, and objects are given without their address.
+    """
+
+    source_root: Path
+    module_paths: list[str]
+
+    def generate_code_data(self) -> Iterator[CodeElement]:
+        tree = SourceTree(self.source_root)
+        seen: set[str] = set()
+        for module_path in self.module_paths:
+            module = tree.get_module(module_path)
+            if module is None:
+                continue
+            yield from self._handle_module(
+                tree, module, root_module_name=module_path, seen=seen
+            )
+
+    def _handle_module(
+        self,
+        tree: "SourceTree",
+        module: "SourceModule",
+        *,
+        root_module_name: str,
+        seen: set[str],
+    ) -> Iterator[CodeElement]:
+        if module.name in seen:
+            return
+        seen.add(module.name)
+
+        yield Module(
+            name=module.name,
+            docstring=ast.get_docstring(module.node) or "",
+            filename="/" + module.path.relative_to(self.source_root).as_posix(),
+        )
+
+        # Go through members, in name order as inspect.getmembers() would.
+        members: dict[str, SourceModule | SourceClass] = {}
+        for name in module.namespace:
+            ref = tree.resolve(module.name, name)
+            if isinstance(ref, SourceModule):
+                if ref.name.startswith(root_module_name):
+                    members[name] = ref
+            elif isinstance(ref, SourceClass) and ref.module is module:
+                members[name] = ref
+        members.update(tree.get_imported_submodules(module, root_module_name))
+        for _, member in sorted(members.items()):
+            if isinstance(member, SourceModule):
+                yield from self._handle_module(
+                    tree, member, root_module_name=root_module_name, seen=seen
+                )
+            elif not tree.is_exception(member):
+                yield from self._handle_class(tree, member)
+
+    def _handle_class(
+        self, tree: "SourceTree", klass: "SourceClass"
+    ) -> Iterator[CodeElement]:
+        yield Klass(
+            name=klass.node.name,
+            module=klass.module.name,
+            docstring=tree.get_docstring(klass),
+            line_number=_first_line(klass.node),
+            path=klass.path,
+            bases=[
+                base.path if isinstance(base, SourceClass) else base
+                for base in tree.get_bases(klass)
+            ],
+            best_import_path=tree.get_best_import_path(klass),
+        )
+
+        # Attributes are inherited, as they would be found on the class, but only
+        # methods defined on the class itself are included.
+        members: dict[str, CodeElement] = {}
+        for ancestor in reversed(tree.get_mro(klass)):
+            for name, node in ancestor.body.items():
+                members.pop(name, None)
+                if name in BANNED_ATTR_NAMES:
+                    continue
+                if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+                    property_path = _get_property_path(tree, ancestor, node)
+                    if property_path == "django.utils.functional.classproperty":
+                        # inspect finds the value the getter returns for the
+                        # class, which can't be worked out without running it.
+                        continue
+                    if property_path is not None:
+                        members[name] = KlassAttribute(
+                            name=name,
+                            value=f"<{property_path} object>",
+                            line_number=-1,
+                            klass_path=klass.path,
+                        )
+                    elif ancestor is klass:
+                        members[name] = self._make_method(tree, klass, name, node)
+                elif isinstance(node, ast.ClassDef):
+                    members[name] = KlassAttribute(
+                        name=name,
+                        value=f"<class '{ancestor.path}.{node.name}'>",
+                        line_number=_first_line(node),
+                        klass_path=klass.path,
+                    )
+                elif not tree.is_function(ancestor.module.name, node):
+                    value, line_number = tree.render_value(ancestor.module.name, node)
+                    members[name] = KlassAttribute(
+                        name=name,
+                        value=value,
+                        line_number=line_number,
+                        klass_path=klass.path,
+                    )
+        for _, member in sorted(members.items()):
+            yield member
+
+    def _make_method(
+        self,
+        tree: "SourceTree",
+        klass: "SourceClass",
+        name: str,
+        node: ast.FunctionDef | ast.AsyncFunctionDef,
+    ) -> Method:
+        start_line = _first_line(node)
+        end_line = _get_block_end(node, klass.module.lines)
+        lines = klass.module.lines[start_line - 1 : end_line]
+        return Method(
+            name=name,
+            docstring=tree.get_method_docstring(klass, name),
+            code=textwrap.dedent("".join(lines)),
+            kwargs=_format_arguments(node.args),
+            line_number=start_line,
+            klass_path=klass.path,
+        )
+
+
+@attr.frozen(eq=False)
+class SourceModule:
+    name: str
+    path: Path
+    is_package: bool
+    node: ast.Module
+    lines: list[str]
+    # What each name at the top level is bound to, from the last statement which
+    # binds it. Imported names are given as the (module, name) they come from,
+    # or as the module name itself for `import ...`.
+    namespace: dict[str, ast.AST | tuple[str, str | None]]
+    # The modules that everything is imported from with `from ... import *`.
+    star_imports: list[str]
+    # Everything named in import statements which might be a module.
+    imports: list[str]
+
+
+@attr.frozen(eq=False)
+class SourceClass:
+    module: SourceModule
+    node: ast.ClassDef
+    # The class attributes and methods, from the last statement to bind each.
+    body: dict[str, ast.AST]
+
+    @property
+    def path(self) -> str:
+        return f"{self.module.name}.{self.node.name}"
+
+
+class SourceTree:
+    """Lazily parsed modules in a source tree, and lookups across them."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._modules: dict[str, SourceModule | None] = {}
+        self._classes: dict[ast.ClassDef, SourceClass] = {}
+
+    def get_module(self, name: str) -> SourceModule | None:
+        if name not in self._modules:
+            self._modules[name] = self._parse_module(name)
+        return self._modules[name]
+
+    def _parse_module(self, name: str) -> SourceModule | None:
+        base = self.root.joinpath(*name.split("."))
+        for path, is_package in (
+            (base / "__init__.py", True),
+            (base.with_suffix(".py"), False),
+        ):
+            if path.is_file():
+                break
+        else:
+            return None
+
+        source = path.read_text(encoding="utf-8")
+        node = ast.parse(source, filename=str(path))
+        package = name if is_package else name.rpartition(".")[0]
+        namespace: dict[str, ast.AST | tuple[str, str | None]] = {}
+        star_imports = []
+        imports = []
+        for statement in _flatten(node.body):
+            if isinstance(statement, ast.ImportFrom):
+                from_module = _absolute_module(package, statement)
+                imports.append(from_module)
+                for alias in statement.names:
+                    if alias.name == "*":
+                        star_imports.append(from_module)
+                    else:
+                        namespace[alias.asname or alias.name] = (
+                            from_module,
+                            alias.name,
+                        )
+                        imports.append(f"{from_module}.{alias.name}")
+            elif isinstance(statement, ast.Import):
+                for alias in statement.names:
+                    imports.append(alias.name)
+                    if alias.asname:
+                        namespace[alias.asname] = (alias.name, None)
+                    else:
+                        top_level = alias.name.partition(".")[0]
+                        namespace[top_level] = (top_level, None)
+            else:
+                for bound_name, bound_node in _bindings(statement):
+                    namespace[bound_name] = bound_node
+        return SourceModule(
+            name=name,
+            path=path,
+            is_package=is_package,
+            node=node,
+            lines=source.splitlines(keepends=True),
+            namespace=namespace,
+            star_imports=star_imports,
+            imports=imports,
+        )
+
+    def _get_class(self, module: SourceModule, node: ast.ClassDef) -> SourceClass:
+        if node not in self._classes:
+            body = {}
+            for statement in _flatten(node.body):
+                for bound_name, bound_node in _bindings(statement):
+                    body[bound_name] = bound_node
+            self._classes[node] = SourceClass(module=module, node=node, body=body)
+        return self._classes[node]
+
+    def resolve(
+        self,
+        module_name: str,
+        name: str,
+        _seen: frozenset[tuple[str, str]] = frozenset(),
+    ) -> "SourceModule | SourceClass | tuple[SourceModule, str, ast.AST] | str":
+        """
+        Find what a name at the top level of a module refers to.
+
+        This is a module or class from the tree, a (module, name, node) for
+        anything else defined in the tree, or else the dotted path of something
+        from outside it.
+        """
+        module = self.get_module(module_name)
+        if module is None or (module_name, name) in _seen:
+            return f"{module_name}.{name}"
+        _seen = _seen | {(module_name, name)}
+
+        bound = module.namespace.get(name)
+        if bound is None:
+            for star_module_name in reversed(module.star_imports):
+                star_module = self.get_module(star_module_name)
+                if star_module is not None and name in self._get_public_names(
+                    star_module
+                ):
+                    return self.resolve(star_module_name, name, _seen)
+            submodule = self.get_module(f"{module_name}.{name}")
+            if submodule is not None:
+                return submodule
+            if hasattr(builtins, name):
+                return f"builtins.{name}"
+            return f"{module_name}.{name}"
+        if isinstance(bound, tuple):
+            from_module_name, imported_name = bound
+            if imported_name is None:
+                return self.get_module(from_module_name) or from_module_name
+            submodule = self.get_module(f"{from_module_name}.{imported_name}")
+            if submodule is not None:
+                return submodule
+            return self.resolve(from_module_name, imported_name, _seen)
+        if isinstance(bound, ast.ClassDef):
+            return self._get_class(module, bound)
+        return (module, name, bound)
+
+    def _get_public_names(self, module: SourceModule) -> set[str]:
+        names = module.namespace.get("__all__")
+        if names is not None and not isinstance(names, tuple):
+            try:
+                return set(ast.literal_eval(names))
+            except ValueError:
+                pass
+        return {name for name in module.namespace if not name.startswith("_")}
+
+    def resolve_expression(
+        self, module_name: str, node: ast.AST
+    ) -> "SourceModule | SourceClass | tuple[SourceModule, str, ast.AST] | str | None":
+        """Find what a name, or attribute of a name, refers to."""
+        if isinstance(node, ast.Name):
+            return self.resolve(module_name, node.id)
+        if isinstance(node, ast.Attribute):
+            parent = self.resolve_expression(module_name, node.value)
+            if isinstance(parent, SourceModule):
+                return self.resolve(parent.name, node.attr)
+            if isinstance(parent, SourceClass):
+                for ancestor in self.get_mro(parent):
+                    if node.attr in ancestor.body:
+                        member = ancestor.body[node.attr]
+                        if isinstance(member, ast.ClassDef):
+                            return self._get_class(ancestor.module, member)
+                        return (ancestor.module, node.attr, member)
+                return None
+            if isinstance(parent, str):
+                return f"{parent}.{node.attr}"
+        return None
+
+    def get_bases(self, klass: SourceClass) -> list["SourceClass | str"]:
+        bases: list[SourceClass | str] = []
+        for base_node in klass.node.bases:
+            if isinstance(base_node, ast.Subscript):
+                base_node = base_node.value
+            base = self.resolve_expression(klass.module.name, base_node)
+            if isinstance(base, SourceClass | str):
+                bases.append(base)
+            else:
+                bases.append(ast.unparse(base_node))
+        return bases or ["builtins.object"]
+
+    def get_mro(self, klass: SourceClass) -> list[SourceClass]:
+        """Get the classes from the tree in the MRO of a class, starting with it."""
+        # This is the same approach used for the Ancestry table.
+        tree = []
+        for base in self.get_bases(klass):
+            if isinstance(base, SourceClass):
+                tree += self.get_mro(base)
+        seen = set()
+        mro = []
+        for ancestor in reversed(tree):
+            if ancestor not in seen:
+                seen.add(ancestor)
+                mro.append(ancestor)
+        mro.reverse()
+        return [klass, *mro]
+
+    def is_exception(self, klass: SourceClass) -> bool:
+        for ancestor in self.get_mro(klass):
+            for base in self.get_bases(ancestor):
+                if isinstance(base, str) and base.startswith("builtins."):
+                    builtin = getattr(builtins, base.removeprefix("builtins."), None)
+                    if isinstance(builtin, type) and issubclass(
+                        builtin, Exception | Warning
+                    ):
+                        return True
+        return False
+
+    def is_function(self, module_name: str, node: ast.AST) -> bool:
+        """Whether an assigned value is a function, such as `get = View.get`."""
+        ref = self.resolve_expression(module_name, node)
+        return isinstance(ref, tuple) and isinstance(
+            ref[2], ast.FunctionDef | ast.AsyncFunctionDef
+        )
+
+    def get_best_import_path(self, klass: SourceClass) -> str:
+        best_path = module_path = klass.module.name
+        while module_path := module_path.rpartition(".")[0]:
+            if self.resolve(module_path, klass.node.name) is klass:
+                best_path = module_path
+        return best_path
+
+    def get_docstring(self, klass: SourceClass) -> str:
+        # Like inspect.getdoc(), use the docstring of an ancestor if there isn't one.
+        for ancestor in self.get_mro(klass):
+            docstring = ast.get_docstring(ancestor.node)
+            if docstring is not None:
+                return docstring
+        return ""
+
+    def get_method_docstring(self, klass: SourceClass, name: str) -> str:
+        # Like inspect.getdoc(), use the docstring of the method an undecorated
+        # one overrides if there isn't one.
+        for ancestor in self.get_mro(klass):
+            node = ancestor.body.get(name)
+            if not isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+                continue
+            docstring = ast.get_docstring(node)
+            if docstring is not None:
+                return docstring
+            if node.decorator_list:
+                break
+        return ""
+
+    def get_imported_submodules(
+        self, module: SourceModule, root_module_name: str
+    ) -> dict[str, SourceModule]:
+        """
+        Get the submodules of a package which are imported, by name.
+
+        Importing a submodule anywhere sets it as an attribute of its package, so
+        this follows imports, from the root module down.
+        """
+        if not module.is_package:
+            return {}
+        submodules = {}
+        for imported in self._get_imported_modules(root_module_name):
+            parent, _, name = imported.name.rpartition(".")
+            if parent == module.name:
+                submodules[name] = imported
+        return submodules
+
+    def _get_imported_modules(self, root_module_name: str) -> list[SourceModule]:
+        found: dict[str, SourceModule] = {}
+        to_visit = [root_module_name]
+        while to_visit:
+            module = self.get_module(to_visit.pop())
+            if module is None or module.name in found:
+                continue
+            found[module.name] = module
+            for candidate in module.imports:
+                # Importing a.b.c also imports a.b.
+                while candidate.startswith(root_module_name):
+                    to_visit.append(candidate)
+                    candidate = candidate.rpartition(".")[0]
+        return list(found.values())
+
+    def render_value(
+        self, module_name: str, node: ast.AST, _depth: int = 0
+    ) -> tuple[str, int]:
+        """Get the value of an attribute, as get_value(), and its line number."""
+        try:
+            value = ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            pass
+        else:
+            return get_value(value), -1
+
+        if isinstance(node, ast.Name | ast.Attribute) and _depth < 10:
+            ref = self.resolve_expression(module_name, node)
+            if isinstance(ref, SourceClass):
+                return f"<class '{ref.path}'>", _first_line(ref.node)
+            if isinstance(ref, tuple) and not isinstance(ref[2], ast.FunctionDef):
+                return self.render_value(ref[0].name, ref[2], _depth + 1)
+            if isinstance(ref, str) and ref.startswith("builtins."):
+                builtin = getattr(builtins, ref.removeprefix("builtins."))
+                return get_value(builtin), -1
+
+        if isinstance(node, ast.Call):
+            func = self.resolve_expression(module_name, node.func)
+            if isinstance(func, str) and func.startswith("builtins."):
+                builtin = getattr(builtins, func.removeprefix("builtins."))
+                if not node.args and not node.keywords and isinstance(builtin, type):
+                    return get_value(builtin()), -1
+            if isinstance(func, tuple) and func[1] in LazyAttribute.functions.values():
+                arguments = [
+                    self.render_value(module_name, arg, _depth + 1)[0]
+                    for arg in node.args
+                ]
+                return f"{func[1]}({', '.join(arguments)})", -1
+            if isinstance(func, SourceClass):
+                return f"<{func.path} object>", -1
+
+        return ast.unparse(node), -1
+
+
+def _flatten(statements: list[ast.stmt]) -> Iterator[ast.stmt]:
+    """Get statements, including those in conditional blocks, in source order."""
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            yield from _flatten(statement.body)
+            yield from _flatten(statement.orelse)
+        elif isinstance(statement, ast.Try):
+            yield from _flatten(statement.body)
+            for handler in statement.handlers:
+                yield from _flatten(handler.body)
+            yield from _flatten(statement.orelse)
+            yield from _flatten(statement.finalbody)
+        else:
+            yield statement
+
+
+def _bindings(statement: ast.stmt) -> Iterator[tuple[str, ast.AST]]:
+    """Get the names bound by a statement, and what they are bound to."""
+    if isinstance(statement, ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef):
+        yield statement.name, statement
+    elif isinstance(statement, ast.Assign):
+        for target in statement.targets:
+            if isinstance(target, ast.Name):
+                yield target.id, statement.value
+    elif (
+        isinstance(statement, ast.AnnAssign)
+        and statement.value is not None
+        and isinstance(statement.target, ast.Name)
+    ):
+        yield statement.target.id, statement.value
+
+
+def _absolute_module(package: str, statement: ast.ImportFrom) -> str:
+    if not statement.level:
+        return statement.module or ""
+    parts = package.split(".")
+    base = ".".join(parts[: len(parts) - statement.level + 1])
+    return f"{base}.{statement.module}" if statement.module else base
+
+
+def _first_line(node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef) -> int:
+    # inspect counts decorators as the start of a class or function.
+    if node.decorator_list:
+        return node.decorator_list[0].lineno
+    return node.lineno
+
+
+PROPERTY_PATHS = (
+    "django.utils.functional.classproperty",
+    "builtins.property",
+    "functools.cached_property",
+    "django.utils.functional.cached_property",
+)
+
+
+def _get_property_path(
+    tree: SourceTree, klass: SourceClass, node: ast.FunctionDef | ast.AsyncFunctionDef
+) -> str | None:
+    for decorator in node.decorator_list:
+        ref = tree.resolve_expression(klass.module.name, decorator)
+        if isinstance(ref, SourceClass):
+            ref = ref.path
+        if isinstance(ref, str) and ref in PROPERTY_PATHS:
+            return ref.removeprefix("builtins.")
+    return None
+
+
+def _format_arguments(arguments: ast.arguments) -> str:
+    """Format arguments like inspect.Signature, without the parentheses."""
+    parameters = []
+    positional = [*arguments.posonlyargs, *arguments.args]
+    defaults: list[ast.expr | None] = [None] * (
+        len(positional) - len(arguments.defaults)
+    )
+    defaults += arguments.defaults
+    for i, (argument, default) in enumerate(zip(positional, defaults)):
+        parameters.append(_format_parameter(argument, default))
+        if i == len(arguments.posonlyargs) - 1:
+            parameters.append("/")
+    if arguments.vararg:
+        parameters.append("*" + _format_parameter(arguments.vararg, None))
+    elif arguments.kwonlyargs:
+        parameters.append("*")
+    for argument, default in zip(arguments.kwonlyargs, arguments.kw_defaults):
+        parameters.append(_format_parameter(argument, default))
+    if arguments.kwarg:
+        parameters.append("**" + _format_parameter(arguments.kwarg, None))
+    return ", ".join(parameters)
+
+
+def _format_parameter(argument: ast.arg, default: ast.expr | None) -> str:
+    text = argument.arg
+    if argument.annotation:
+        text += f": {ast.unparse(argument.annotation)}"
+    if default is not None:
+        text += " = " if argument.annotation else "="
+        text += ast.unparse(default)
+    return text
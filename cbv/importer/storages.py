@@ -1,74 +1,258 @@
-from collections import defaultdict
-from collections.abc import Mapping, Sequence
+import hashlib
+from collections import Counter, defaultdict
+from collections.abc import Collection, Iterable, Mapping, Sequence
+from operator import attrgetter
+from typing import Any
 
 from attrs import frozen
+from django.db import transaction
+from django.db.models import Model, QuerySet
+from django.utils import timezone
 
 from cbv import models
+from cbv.highlighting import hash_code, highlight_code
 from cbv.importer.dataclasses import Klass, KlassAttribute, Method, Module
 from cbv.importer.importers import CodeImporter
+from cbv.search import get_docstring_words, get_trigrams
 
 
-class DBStorage:
-    def import_project_version(
-        self, *, importer: CodeImporter, project_version: str
-    ) -> None:
-        self._wipe_clashing_data(project_version=project_version)
+# The most rows to write in one query.
+BATCH_SIZE = 1000
 
-        # Setup Project
-        project_version_pk = models.ProjectVersion.objects.create(
-            version_number=project_version,
-        ).pk
 
-        klasses = []
-        attributes: defaultdict[tuple[str, str], list[tuple[str, int]]] = defaultdict(
-            list
-        )
-        klass_models: dict[str, models.Klass] = {}
-        module_models: dict[str, models.Module] = {}
-        method_models: list[models.Method] = []
+@frozen
+class CodeData:
+    """Everything an importer found, gathered up so it can be stored in bulk."""
+
+    modules: list[Module]
+    klasses: list[Klass]
+    methods: list[Method]
+    # The classes each attribute was found on, by (name, value).
+    attributes: dict[tuple[str, str], list[tuple[str, int]]]
 
+    @classmethod
+    def from_importer(cls, importer: CodeImporter) -> "CodeData":
+        data = cls(modules=[], klasses=[], methods=[], attributes=defaultdict(list))
         for member in importer.generate_code_data():
             if isinstance(member, Module):
-                module_model = models.Module.objects.create(
-                    project_version_id=project_version_pk,
-                    name=member.name,
-                    docstring=member.docstring,
-                    filename=member.filename,
-                )
-                module_models[member.name] = module_model
+                data.modules.append(member)
             elif isinstance(member, KlassAttribute):
-                attributes[(member.name, member.value)] += [
+                data.attributes[(member.name, member.value)] += [
                     (member.klass_path, member.line_number)
                 ]
             elif isinstance(member, Method):
-                method = models.Method(
-                    klass=klass_models[member.klass_path],
-                    name=member.name,
-                    docstring=member.docstring,
-                    code=member.code,
-                    kwargs=member.kwargs,
-                    line_number=member.line_number,
-                )
-                method_models.append(method)
+                data.methods.append(member)
             elif isinstance(member, Klass):
-                klass_model = models.Klass.objects.create(
-                    module=module_models[member.module],
-                    name=member.name,
-                    docstring=member.docstring,
-                    line_number=member.line_number,
-                    import_path=member.best_import_path,
+                data.klasses.append(member)
+        return data
+
+
+@frozen
+class Changes:
+    """How many rows of a table an update created, updated and deleted."""
+
+    created: int
+    updated: int
+    deleted: int
+
+    def __str__(self) -> str:
+        return f"{self.created} created, {self.updated} updated, {self.deleted} deleted"
+
+
+class DBStorage:
+    def import_project_version(
+        self, *, importer: CodeImporter, project_version: str
+    ) -> None:
+        # Gather everything before writing, so that each table can be written in
+        # a few queries rather than one per row.
+        data = CodeData.from_importer(importer)
+
+        with transaction.atomic():
+            self._wipe_clashing_data(project_version=project_version)
+
+            # Setup Project
+            project_version_pk = models.ProjectVersion.objects.create(
+                version_number=project_version,
+            ).pk
+
+            # bulk_create sets the primary keys of the rows it creates, so each
+            # table's rows can be referred to by the next.
+            module_models = [
+                build_module(module, project_version_pk) for module in data.modules
+            ]
+            models.Module.objects.bulk_create(module_models, batch_size=BATCH_SIZE)
+            module_lookup = {module.name: module for module in module_models}
+
+            klass_models = [
+                build_klass(klass, module_lookup[klass.module])
+                for klass in data.klasses
+            ]
+            models.Klass.objects.bulk_create(klass_models, batch_size=BATCH_SIZE)
+            klass_lookup = {
+                klass.path: klass_model
+                for klass, klass_model in zip(data.klasses, klass_models, strict=True)
+            }
+
+            method_models = [
+                build_method(method, klass_lookup[method.klass_path])
+                for method in data.methods
+            ]
+            models.Method.objects.bulk_create(method_models, batch_size=BATCH_SIZE)
+
+            create_inheritance(data.klasses, klass_lookup)
+            create_ancestry(
+                models.Klass.objects.filter(
+                    module__project_version_id=project_version_pk
+                )
+            )
+            attribute_count = create_attributes(
+                data.attributes, data.klasses, klass_lookup
+            )
+            create_highlighted_code(
+                models.Method.objects.filter(
+                    klass__module__project_version_id=project_version_pk
                 )
-                klass_models[member.path] = klass_model
-                klasses.append(member)
+            )
+            create_search_index(
+                models.Klass.objects.filter(
+                    module__project_version_id=project_version_pk
+                )
+            )
+            update_fingerprint(project_version_pk)
 
-        models.Method.objects.bulk_create(method_models)
-        create_inheritance(klasses, klass_models)
-        create_attributes(attributes, klass_models)
         print("Stored:")
         print(f" Modules: {len(module_models)}")
-        print(f" Classes: {len(klasses)}")
+        print(f" Classes: {len(klass_models)}")
         print(f" Methods: {len(method_models)}")
-        print(f" Attributes: {models.KlassAttribute.objects.count()}")
+        print(f" Attributes: {attribute_count}")
+
+    def update_project_version(
+        self, *, importer: CodeImporter, project_version: str
+    ) -> dict[str, Changes]:
+        """
+        Store a version, only writing the rows which differ from those stored.
+
+        Rows are matched to those already stored by name, so rows which are
+        unchanged or updated keep their primary keys. Returns the changes made
+        to each table.
+        """
+        data = CodeData.from_importer(importer)
+
+        with transaction.atomic():
+            project_version_pk = models.ProjectVersion.objects.get_or_create(
+                version_number=project_version
+            )[0].pk
+
+            # Rows are created and updated parent table first, so that their
+            # children can refer to them, and deleted child table first.
+            stale_pks = {}
+            changes = {}
+
+            stored_modules = {
+                module.name: module
+                for module in models.Module.objects.filter(
+                    project_version=project_version_pk
+                )
+            }
+            module_lookup = {
+                module.name: build_module(module, project_version_pk)
+                for module in data.modules
+            }
+            changes["Modules"], stale_pks[models.Module] = sync_rows(
+                models.Module, stored_modules, module_lookup, ["docstring", "filename"]
+            )
+
+            stored_klasses = {
+                get_klass_path(klass): klass
+                for klass in models.Klass.objects.filter(
+                    module__project_version=project_version_pk
+                ).select_related("module")
+            }
+            klass_lookup = {
+                klass.path: build_klass(klass, module_lookup[klass.module])
+                for klass in data.klasses
+            }
+            changes["Classes"], stale_pks[models.Klass] = sync_rows(
+                models.Klass,
+                stored_klasses,
+                klass_lookup,
+                ["docstring", "line_number", "import_path"],
+            )
+
+            # A class can have several methods with the same name, so they are
+            # told apart by the order they're in.
+            stored_methods = get_method_keys(
+                models.Method.objects.filter(
+                    klass__module__project_version=project_version_pk
+                )
+                .select_related("klass__module")
+                .order_by("line_number", "pk")
+            )
+            method_lookup = get_method_keys(
+                build_method(method, klass_lookup[method.klass_path])
+                for method in sorted(data.methods, key=attrgetter("line_number"))
+            )
+            changes["Methods"], stale_pks[models.Method] = sync_rows(
+                models.Method,
+                stored_methods,
+                method_lookup,
+                ["docstring", "code", "kwargs", "line_number"],
+            )
+
+            stored_inheritance = {
+                (get_klass_path(inheritance.child), inheritance.order): inheritance
+                for inheritance in models.Inheritance.objects.filter(
+                    child__module__project_version=project_version_pk
+                ).select_related("child__module")
+            }
+            changes["Inheritance"], stale_pks[models.Inheritance] = sync_rows(
+                models.Inheritance,
+                stored_inheritance,
+                build_inheritance(data.klasses, klass_lookup),
+                ["parent"],
+            )
+
+            stored_attributes = {
+                (get_klass_path(attribute.klass), attribute.name): attribute
+                for attribute in models.KlassAttribute.objects.filter(
+                    klass__module__project_version=project_version_pk
+                ).select_related("klass__module")
+            }
+            changes["Attributes"], stale_pks[models.KlassAttribute] = sync_rows(
+                models.KlassAttribute,
+                stored_attributes,
+                build_attributes(data.attributes, data.klasses, klass_lookup),
+                ["value", "line_number"],
+            )
+
+            for model, pks in reversed(stale_pks.items()):
+                model.objects.filter(pk__in=pks).delete()
+
+            # Deleted classes take their ancestry with them, but new classes, or
+            # classes with new bases, need theirs working out.
+            unchanged = Changes(created=0, updated=0, deleted=0)
+            if changes["Classes"].created or changes["Inheritance"] != unchanged:
+                create_ancestry(
+                    models.Klass.objects.filter(
+                        module__project_version_id=project_version_pk
+                    )
+                )
+            create_highlighted_code(
+                models.Method.objects.filter(
+                    klass__module__project_version_id=project_version_pk
+                )
+            )
+            create_search_index(
+                models.Klass.objects.filter(
+                    module__project_version_id=project_version_pk
+                )
+            )
+            update_fingerprint(project_version_pk)
+
+        print("Changed:")
+        for table, table_changes in changes.items():
+            print(f" {table}: {table_changes}")
+        return changes
 
     def _wipe_clashing_data(self, *, project_version: str) -> None:
         """Delete existing data in the DB to make way for this new import."""
@@ -83,76 +267,430 @@ class DBStorage:
         ).delete()
 
 
-@frozen
-class Attribute:
-    klass_pk: int
-    line_number: int
-    name: str
-    value: str
-
-    def to_model(self) -> models.KlassAttribute:
-        return models.KlassAttribute(
-            klass_id=self.klass_pk,
-            line_number=self.line_number,
-            name=self.name,
-            value=self.value,
-        )
+def sync_rows(
+    model: type[Model],
+    stored: Mapping[Any, Model],
+    wanted: Mapping[Any, Model],
+    fields: Sequence[str],
+) -> tuple[Changes, list[int]]:
+    """
+    Create and update rows, so that those stored match those wanted.
+
+    Each wanted row is matched to the stored row with the same key, and takes
+    its primary key. Stored rows which aren't wanted are counted as deleted, but
+    left for the caller to delete, as other rows may still refer to them.
+    Returns the changes, and the primary keys of the rows to delete.
+    """
+    attnames = [model._meta.get_field(field).attname for field in fields]
+    to_create = []
+    to_update = []
+    for key, row in wanted.items():
+        if key not in stored:
+            to_create.append(row)
+            continue
+        stored_row = stored[key]
+        row.pk = stored_row.pk
+        if any(
+            getattr(row, attname) != getattr(stored_row, attname)
+            for attname in attnames
+        ):
+            to_update.append(row)
+    stale_pks = [row.pk for key, row in stored.items() if key not in wanted]
+
+    model._default_manager.bulk_create(to_create, batch_size=BATCH_SIZE)
+    model._default_manager.bulk_update(to_update, fields, batch_size=BATCH_SIZE)
+    changes = Changes(
+        created=len(to_create), updated=len(to_update), deleted=len(stale_pks)
+    )
+    return changes, stale_pks
+
+
+def get_klass_path(klass: models.Klass) -> str:
+    return f"{klass.module.name}.{klass.name}"
+
+
+def get_method_keys(
+    methods: Iterable[models.Method],
+) -> dict[tuple[str, str, int], models.Method]:
+    """Key methods by class path, name, and their position among namesakes."""
+    counts: Counter[tuple[str, str]] = Counter()
+    keyed = {}
+    for method in methods:
+        name = (get_klass_path(method.klass), method.name)
+        keyed[(*name, counts[name])] = method
+        counts[name] += 1
+    return keyed
+
+
+def build_module(module: Module, project_version_pk: int) -> models.Module:
+    return models.Module(
+        project_version_id=project_version_pk,
+        name=module.name,
+        docstring=module.docstring,
+        filename=module.filename,
+    )
+
+
+def build_klass(klass: Klass, module: models.Module) -> models.Klass:
+    return models.Klass(
+        module=module,
+        name=klass.name,
+        docstring=klass.docstring,
+        line_number=klass.line_number,
+        import_path=klass.best_import_path,
+    )
+
+
+def build_method(method: Method, klass: models.Klass) -> models.Method:
+    return models.Method(
+        klass=klass,
+        name=method.name,
+        docstring=method.docstring,
+        code=method.code,
+        kwargs=method.kwargs,
+        line_number=method.line_number,
+    )
 
 
 def create_attributes(
     attributes: Mapping[tuple[str, str], Sequence[tuple[str, int]]],
+    klasses: Sequence[Klass],
     klass_lookup: Mapping[str, models.Klass],
-) -> None:
+) -> int:
+    """Create the attributes of classes, and return how many were created."""
+    attribute_models = build_attributes(attributes, klasses, klass_lookup)
+    models.KlassAttribute.objects.bulk_create(
+        attribute_models.values(), batch_size=BATCH_SIZE
+    )
+    return len(attribute_models)
+
+
+def build_attributes(
+    attributes: Mapping[tuple[str, str], Sequence[tuple[str, int]]],
+    klasses: Sequence[Klass],
+    klass_lookup: Mapping[str, models.Klass],
+) -> dict[tuple[str, str], models.KlassAttribute]:
+    """
+    Build the attributes of the classes they were defined on.
+
+    They are keyed by class path and name.
+    """
+    descendants = get_descendants(klasses)
+
     # Go over each name/value pair to create KlassAttributes
-    collected_attributes = set()
-    for (name, value), klasses in attributes.items():
+    attribute_models = {}
+    for (name, value), klass_lines in attributes.items():
         # Find all the descendants of each Klass.
-        descendants = set()
-        for klass_path, start_line in klasses:
-            klass = klass_lookup[klass_path]
-            for child in klass.get_all_children():
-                descendants.add(child)
+        all_descendants: set[str] = set()
+        for klass_path, _ in klass_lines:
+            all_descendants |= descendants[klass_path]
 
         # By removing descendants from klasses, we leave behind the
         # klass(s) where the value was defined.
-        remaining_klasses = [
-            k_and_l
-            for k_and_l in klasses
-            if klass_lookup[k_and_l[0]] not in descendants
-        ]
-
-        # Now we can create the KlassAttributes
-        for klass_path, line in remaining_klasses:
-            klass = klass_lookup[klass_path]
-
-            collected_attributes.add(
-                Attribute(
-                    klass_pk=klass.pk,
-                    line_number=line,
-                    name=name,
-                    value=value,
-                )
+        for klass_path, line in klass_lines:
+            if klass_path in all_descendants:
+                continue
+
+            attribute_models[(klass_path, name)] = models.KlassAttribute(
+                klass=klass_lookup[klass_path],
+                line_number=line,
+                name=name,
+                value=value,
             )
+    return attribute_models
 
-    models.KlassAttribute.objects.bulk_create(
-        [attribute.to_model() for attribute in collected_attributes]
-    )
+
+def get_descendants(klasses: Sequence[Klass]) -> dict[str, frozenset[str]]:
+    """Find the paths of every descendant of each class, from their bases."""
+    children: defaultdict[str, list[str]] = defaultdict(list)
+    for klass in klasses:
+        for base in klass.bases:
+            children[base].append(klass.path)
+
+    descendants: dict[str, frozenset[str]] = {}
+
+    def get_klass_descendants(klass_path: str) -> frozenset[str]:
+        if klass_path not in descendants:
+            klass_descendants = set(children[klass_path])
+            for child_path in children[klass_path]:
+                klass_descendants |= get_klass_descendants(child_path)
+            descendants[klass_path] = frozenset(klass_descendants)
+        return descendants[klass_path]
+
+    return {klass.path: get_klass_descendants(klass.path) for klass in klasses}
 
 
 def create_inheritance(
     klasses: Sequence[Klass], klass_lookup: Mapping[str, models.Klass]
 ) -> None:
-    inheritance_models = []
+    models.Inheritance.objects.bulk_create(
+        build_inheritance(klasses, klass_lookup).values(), batch_size=BATCH_SIZE
+    )
+
+
+def build_inheritance(
+    klasses: Sequence[Klass], klass_lookup: Mapping[str, models.Klass]
+) -> dict[tuple[str, int], models.Inheritance]:
+    """Build the links to each class's bases, keyed by class path and order."""
+    inheritance_models = {}
     for klass_data in klasses:
         direct_ancestors = klass_data.bases
         for i, ancestor in enumerate(direct_ancestors):
             if ancestor not in klass_lookup:
                 continue
-            inheritance_models.append(
-                models.Inheritance(
-                    parent=klass_lookup[ancestor],
-                    child=klass_lookup[klass_data.path],
-                    order=i,
-                )
+            inheritance_models[(klass_data.path, i)] = models.Inheritance(
+                parent=klass_lookup[ancestor],
+                child=klass_lookup[klass_data.path],
+                order=i,
             )
-    models.Inheritance.objects.bulk_create(inheritance_models)
+    return inheritance_models
+
+
+def create_ancestry(klasses: QuerySet[models.Klass]) -> None:
+    """
+    (Re)build the Ancestry closure table for the given classes.
+
+    Parents are only followed through Inheritance rows whose child is in
+    `klasses`, so this should be given every class in a version at once.
+    """
+    klass_pks = list(klasses.values_list("pk", flat=True))
+    parents: defaultdict[int, list[int]] = defaultdict(list)
+    inheritance = (
+        models.Inheritance.objects.filter(child__in=klass_pks)
+        .order_by("child", "order")
+        .values_list("child_id", "parent_id")
+    )
+    for child_pk, parent_pk in inheritance:
+        parents[child_pk].append(parent_pk)
+
+    mros: dict[int, list[int]] = {}
+
+    def get_mro(klass_pk: int) -> list[int]:
+        if klass_pk in mros:
+            return mros[klass_pk]
+
+        # Flatten ancestors and their forebears into a list.
+        tree = []
+        for parent_pk in parents[klass_pk]:
+            tree.append(parent_pk)
+            tree += get_mro(parent_pk)
+
+        # Remove duplicates, leaving the last occurence in tact.
+        # This is how python's MRO works.
+        seen = set()
+        mro = []
+        for ancestor_pk in reversed(tree):
+            if ancestor_pk not in seen:
+                seen.add(ancestor_pk)
+                mro.append(ancestor_pk)
+        mro.reverse()
+        mros[klass_pk] = mro
+        return mro
+
+    ancestry_models = [
+        models.Ancestry(
+            child_id=klass_pk,
+            ancestor_id=ancestor_pk,
+            mro_position=position,
+            is_direct=ancestor_pk in parents[klass_pk],
+        )
+        for klass_pk in klass_pks
+        for position, ancestor_pk in enumerate(get_mro(klass_pk))
+    ]
+    models.Ancestry.objects.filter(child__in=klass_pks).delete()
+    models.Ancestry.objects.bulk_create(ancestry_models, batch_size=BATCH_SIZE)
+
+
+def create_highlighted_code(methods: QuerySet[models.Method]) -> int:
+    """
+    Highlight the code of the given methods, where it hasn't been already.
+
+    Returns the number of newly highlighted pieces of code.
+    """
+    codes = {
+        hash_code(code): code
+        for code in methods.order_by().values_list("code", flat=True).distinct()
+    }
+    existing = set(
+        models.HighlightedCode.objects.filter(code_hash__in=codes).values_list(
+            "code_hash", flat=True
+        )
+    )
+    highlighted_models = [
+        models.HighlightedCode(code_hash=code_hash, html=highlight_code(code))
+        for code_hash, code in sorted(codes.items())
+        if code_hash not in existing
+    ]
+    # Versions may be stored at the same time, with some of the same code. They
+    # insert it in the same order so that they can't deadlock on each other.
+    models.HighlightedCode.objects.bulk_create(
+        highlighted_models, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    return len(highlighted_models)
+
+
+def create_search_index(klasses: QuerySet[models.Klass]) -> int:
+    """
+    (Re)build the search entries of the given classes, adding any new terms.
+
+    Returns the number of entries created.
+    """
+    Kind = models.SearchEntry.Kind
+    klass_pks = list(klasses.values_list("pk", flat=True))
+    # The (term, class, kind, name) of each entry.
+    entries: set[tuple[str, int, str, str]] = set()
+    for klass_pk, name, docstring in klasses.values_list("pk", "name", "docstring"):
+        entries.add((name.lower(), klass_pk, Kind.CLASS, name))
+        entries.update(
+            (word, klass_pk, Kind.DOCSTRING, "")
+            for word in get_docstring_words(docstring)
+        )
+    methods = models.Method.objects.filter(klass__in=klass_pks).values_list(
+        "klass_id", "name", "docstring"
+    )
+    for klass_pk, name, docstring in methods:
+        entries.add((name.lower(), klass_pk, Kind.METHOD, name))
+        entries.update(
+            (word, klass_pk, Kind.DOCSTRING, name)
+            for word in get_docstring_words(docstring)
+        )
+    attributes = models.KlassAttribute.objects.filter(klass__in=klass_pks).values_list(
+        "klass_id", "name"
+    )
+    for klass_pk, name in attributes:
+        entries.add((name.lower(), klass_pk, Kind.ATTRIBUTE, name))
+
+    term_pks = create_search_terms({term for term, *_ in entries})
+    entry_models = [
+        models.SearchEntry(
+            term_id=term_pks[term], klass_id=klass_pk, kind=kind, name=name
+        )
+        for term, klass_pk, kind, name in sorted(entries)
+    ]
+    models.SearchEntry.objects.filter(klass__in=klass_pks).delete()
+    models.SearchEntry.objects.bulk_create(entry_models, batch_size=BATCH_SIZE)
+    return len(entry_models)
+
+
+def create_search_terms(terms: Collection[str]) -> dict[str, int]:
+    """
+    Add the terms which aren't already in the index, along with their trigrams.
+
+    Returns the primary key of every term.
+    """
+    term_pks = dict(
+        models.SearchTerm.objects.filter(term__in=terms).values_list("term", "pk")
+    )
+    new_terms = sorted(set(terms) - term_pks.keys())
+    trigrams = {term: get_trigrams(term) for term in new_terms}
+    # Versions may be stored at the same time, with some of the same terms. They
+    # insert them in the same order so that they can't deadlock on each other.
+    models.SearchTerm.objects.bulk_create(
+        [
+            models.SearchTerm(term=term, trigram_count=len(trigrams[term]))
+            for term in new_terms
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    new_term_pks = dict(
+        models.SearchTerm.objects.filter(term__in=new_terms).values_list("term", "pk")
+    )
+    models.SearchTrigram.objects.bulk_create(
+        [
+            models.SearchTrigram(trigram=trigram, term_id=term_pk)
+            for term, term_pk in new_term_pks.items()
+            for trigram in sorted(trigrams[term])
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return term_pks | new_term_pks
+
+
+def update_fingerprint(project_version_pk: int) -> None:
+    """
+    Store a hash of everything in a version on its ProjectVersion.
+
+    Rows are identified by name rather than by primary key, so re-importing
+    identical data gives an identical fingerprint, and leaves `last_modified`
+    alone.
+    """
+    querysets = (
+        models.Module.objects.filter(project_version=project_version_pk)
+        .order_by("name")
+        .values_list("name", "docstring", "filename"),
+        models.Klass.objects.filter(module__project_version=project_version_pk)
+        .order_by("module__name", "name")
+        .values_list(
+            "module__name",
+            "name",
+            "docstring",
+            "line_number",
+            "import_path",
+            "docs_url",
+        ),
+        models.Inheritance.objects.filter(
+            child__module__project_version=project_version_pk
+        )
+        .order_by("child__module__name", "child__name", "order")
+        .values_list(
+            "child__module__name",
+            "child__name",
+            "parent__module__name",
+            "parent__name",
+            "order",
+        ),
+        models.KlassAttribute.objects.filter(
+            klass__module__project_version=project_version_pk
+        )
+        .order_by("klass__module__name", "klass__name", "name")
+        .values_list(
+            "klass__module__name", "klass__name", "name", "value", "line_number"
+        ),
+        models.Method.objects.filter(klass__module__project_version=project_version_pk)
+        .order_by("klass__module__name", "klass__name", "name", "line_number")
+        .values_list(
+            "klass__module__name",
+            "klass__name",
+            "name",
+            "docstring",
+            "code",
+            "kwargs",
+            "line_number",
+        ),
+    )
+    fingerprint = hashlib.sha256()
+    for queryset in querysets:
+        for row in queryset:
+            fingerprint.update(repr(row).encode())
+    models.ProjectVersion.objects.filter(pk=project_version_pk).exclude(
+        fingerprint=fingerprint.hexdigest()
+    ).update(
+        fingerprint=fingerprint.hexdigest(),
+        last_modified=timezone.now(),
+        # It no longer matches any fixture it was loaded from.
+        fixture_hash="",
+    )
+
+
+def rebuild_derived_data(project_version_pks: Collection[int]) -> None:
+    """
+    Rebuild everything that is calculated from the stored versions.
+
+    This is needed after loading versions by any means other than DBStorage,
+    such as from a fixture.
+    """
+    create_ancestry(
+        models.Klass.objects.filter(module__project_version__in=project_version_pks)
+    )
+    create_highlighted_code(
+        models.Method.objects.filter(
+            klass__module__project_version__in=project_version_pks
+        )
+    )
+    create_search_index(
+        models.Klass.objects.filter(module__project_version__in=project_version_pks)
+    )
+    for project_version_pk in project_version_pks:
+        update_fingerprint(project_version_pk)
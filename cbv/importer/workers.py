@@ -0,0 +1,88 @@
+"""
+Import versions of Django in other Python environments.
+
+Only one version of Django can be installed in an environment, so to import
+several at once, each is inspected by this module run as a script, under the
+Python of a virtualenv with that version installed:
+
+    /path/to/venv/bin/python -m cbv.importer.workers django.views.generic ...
+
+It must be run from the root of this project, and the virtualenv needs attrs
+as well as Django. It writes the version of Django it found on the first line
+of its output, followed by each element of the code as a line of JSON.
+"""
+
+import json
+import subprocess
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+import attr
+import django
+from django.conf import settings
+
+from cbv.importer.dataclasses import CodeElement, Klass, KlassAttribute, Method, Module
+from cbv.importer.importers import InspectCodeImporter
+
+
+ELEMENT_CLASSES: dict[str, type[CodeElement]] = {
+    cls.__name__: cls for cls in (Klass, KlassAttribute, Method, Module)
+}
+
+
+class WorkerError(Exception):
+    pass
+
+
+def serialize_element(element: CodeElement) -> str:
+    if not isinstance(element, Klass | KlassAttribute | Method | Module):
+        raise TypeError(f"Cannot serialize {element!r}")
+    return json.dumps([type(element).__name__, attr.asdict(element)])
+
+
+def deserialize_element(line: str) -> CodeElement:
+    class_name, fields = json.loads(line)
+    return ELEMENT_CLASSES[class_name](**fields)
+
+
+def import_in_subprocess(
+    python: str, module_paths: Iterable[str]
+) -> tuple[str, list[CodeElement]]:
+    """
+    Inspect the Django installed for the given Python interpreter.
+
+    Returns the version of Django, and everything the inspection found. Other
+    output from the worker, such as warnings, is passed on to stderr.
+    """
+    process = subprocess.Popen(
+        [python, "-m", "cbv.importer.workers", *module_paths],
+        cwd=Path(__file__).resolve().parent.parent.parent,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout is not None
+    with process:
+        version = process.stdout.readline().strip()
+        elements = [deserialize_element(line) for line in process.stdout]
+    if process.returncode or not version:
+        raise WorkerError(f"{python} failed with exit code {process.returncode}")
+    return version, elements
+
+
+def run_worker(module_paths: Sequence[str]) -> Iterator[str]:
+    # Some of the inspected modules import models, so need the apps set up.
+    settings.configure(
+        INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes"]
+    )
+    django.setup()
+
+    yield django.get_version()
+    importer = InspectCodeImporter(module_paths=list(module_paths))
+    for element in importer.generate_code_data():
+        yield serialize_element(element)
+
+
+if __name__ == "__main__":
+    for line in run_worker(sys.argv[1:]):
+        print(line)
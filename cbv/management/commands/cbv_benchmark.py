@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from cbv.benchmarks import BenchmarkError, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Measure the pages of a version, and importing a version, in this database.
+
+    For each page this records the wall time, the number of queries and the
+    time spent in them, the time spent rendering templates, and the peak memory
+    allocated. Results are written as JSON, so that they can be compared with
+    the results of another commit, with `--compare`.
+
+    The static files need to have been collected, as for serving the site.
+    """
+
+    help = "Benchmark page rendering and import throughput."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--project-version",
+            help="The version whose pages are measured. Defaults to the latest.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="How many times to request each page once its snapshot is built.",
+        )
+        parser.add_argument(
+            "--no-imports",
+            action="store_false",
+            dest="imports",
+            help="Don't measure inspecting and storing the installed Django.",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            type=Path,
+            help="Write the results to this file, rather than to stdout.",
+        )
+        parser.add_argument(
+            "--compare",
+            type=Path,
+            help="Compare the results with those in this file.",
+        )
+
+    def handle(
+        self,
+        *,
+        project_version: str | None,
+        repeat: int,
+        imports: bool,
+        output: Path | None,
+        compare: Path | None,
+        **options: Any,
+    ) -> None:
+        if repeat < 1:
+            raise CommandError("--repeat must be at least 1.")
+        try:
+            results = run_benchmarks(project_version, repeat=repeat, imports=imports)
+        except BenchmarkError as e:
+            raise CommandError(str(e)) from e
+
+        data = json.dumps(results, indent=1)
+        if output is None:
+            self.stdout.write(data)
+        else:
+            output.write_text(data + "\n")
+
+        if compare is not None:
+            old_results = json.loads(compare.read_text())
+            for line in compare_results(old_results, results):
+                self.stderr.write(line)
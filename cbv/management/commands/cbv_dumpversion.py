@@ -1,42 +1,61 @@
-from itertools import chain
+from pathlib import Path
+from typing import Any
 
-from django.core import serializers
-from django.core.management.base import LabelCommand
+from django.core.management.base import CommandError, CommandParser, LabelCommand
 
-from cbv import models
+from cbv.importer.fixtures import (
+    FixtureError,
+    dump_json,
+    dump_version,
+    get_version_querysets,
+)
 
 
 class Command(LabelCommand):
-    """Dump the django cbv app data for a specific version."""
-
-    def handle_label(self, label, **options):
-        querysets = (
-            # There will be only one ProjectVersion, so no need for ordering.
-            models.ProjectVersion.objects.filter(version_number=label),
-            models.Module.objects.filter(
-                project_version__version_number=label
-            ).order_by("name"),
-            models.Klass.objects.filter(
-                module__project_version__version_number=label
-            ).order_by("module__name", "name"),
-            models.KlassAttribute.objects.filter(
-                klass__module__project_version__version_number=label
-            ).order_by("klass__module__name", "klass__name", "name"),
-            models.Method.objects.filter(
-                klass__module__project_version__version_number=label
-            ).order_by("klass__module__name", "klass__name", "name"),
-            models.Inheritance.objects.filter(
-                parent__module__project_version__version_number=label
-            ).order_by("child__module__name", "child__name", "order"),
+    """
+    Dump the django cbv app data for a specific version.
+
+    By default this is a JSON fixture for loaddata, which is written out as the
+    rows are read, and is the same for the same data. With `--format packed`, it
+    is a packed fixture (see `cbv.importer.fixtures`), which loads much faster
+    but has to be written to a file.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--format",
+            choices=["json", "packed"],
+            default="json",
+            help="The format of the fixture.",
         )
-        objects = list(chain.from_iterable(querysets))
-        for obj in objects:
-            obj.pk = None
-        dump = serializers.serialize(
-            "json",
-            objects,
-            indent=1,
-            use_natural_primary_keys=True,
-            use_natural_foreign_keys=True,
+        parser.add_argument(
+            "-o",
+            "--output",
+            type=Path,
+            help="Write the fixture to this file, rather than to stdout.",
         )
-        self.stdout.write(dump)
+
+    def handle(self, *labels: str, **options: Any) -> str | None:
+        if options["output"] is not None and len(labels) > 1:
+            raise CommandError("Only one version can be dumped to a file.")
+        if options["format"] == "packed" and options["output"] is None:
+            raise CommandError("Packed fixtures must be written to a file.")
+        return super().handle(*labels, **options)
+
+    def handle_label(self, label: str, **options: Any) -> None:
+        output: Path | None = options["output"]
+        if options["format"] == "packed":
+            assert output is not None
+            try:
+                output.write_bytes(dump_version(label))
+            except FixtureError as e:
+                raise CommandError(str(e)) from e
+        elif output is None:
+            # Otherwise the wrapper would end every write the serializer makes
+            # with a newline, and the output wouldn't match the file's.
+            self.stdout.ending = ""
+            dump_json(get_version_querysets(label).values(), self.stdout)
+        else:
+            with open(output, "w") as stream:
+                dump_json(get_version_querysets(label).values(), stream)
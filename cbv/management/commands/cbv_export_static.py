@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from whitenoise.compress import Compressor
+
+from cbv.snapshots import VersionIndex, get_version_index
+
+
+MANIFEST_NAME = ".manifest.json"
+REDIRECTS_NAME = "_redirects"
+
+
+class Command(BaseCommand):
+    """
+    Render every page of the site into a directory, to be served as static files.
+
+    Each page is written as an index.html in a directory matching its URL, with
+    gzip (and, when it is installed, brotli) compressed copies alongside it. The
+    redirects are written to a `_redirects` file, in the format used by Netlify,
+    Cloudflare Pages and others. The collected static files are copied in too.
+
+    A hash of each page is kept in the directory, so that on later runs only the
+    pages which have changed are written and compressed again, and pages which
+    no longer exist are removed.
+    """
+
+    help = "Render the whole site to static files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("output_dir", type=Path)
+        parser.add_argument(
+            "--base-url",
+            default="https://ccbv.co.uk",
+            help="The URL the site will be served from, for absolute links.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="The number of processes to render pages with.",
+        )
+
+    def handle(
+        self, *, output_dir: Path, base_url: str, jobs: int, **options: Any
+    ) -> None:
+        version_index = get_version_index()
+        if not version_index.versions:
+            raise CommandError("There are no versions to export.")
+
+        manifest_path = output_dir / MANIFEST_NAME
+        try:
+            old_hashes = json.loads(manifest_path.read_text())
+        except FileNotFoundError:
+            old_hashes = {}
+
+        # Pages are rendered a version at a time, so that each process only
+        # builds the snapshots of the versions it is given.
+        batches = [
+            [reverse("home"), reverse("sitemap")],
+            *get_version_pages(version_index).values(),
+        ]
+        # Don't share the database connection with the worker processes.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=django.setup) as pool:
+            results = pool.map(
+                render_pages,
+                batches,
+                [output_dir] * len(batches),
+                [base_url] * len(batches),
+                [
+                    {path: old_hashes.get(path, "") for path in batch}
+                    for batch in batches
+                ],
+            )
+            hashes = {}
+            written = 0
+            for batch_hashes, batch_written in results:
+                hashes.update(batch_hashes)
+                written += batch_written
+
+        for path in old_hashes.keys() - hashes.keys():
+            remove_page(output_dir, path)
+
+        redirects = get_redirects(version_index)
+        (output_dir / REDIRECTS_NAME).write_text(
+            "".join(f"{source} {target} 302\n" for source, target in redirects)
+        )
+
+        static_root = Path(settings.STATIC_ROOT)
+        if static_root.is_dir():
+            shutil.copytree(
+                static_root,
+                output_dir / settings.STATIC_URL.strip("/"),
+                dirs_exist_ok=True,
+            )
+        else:
+            self.stderr.write(f"No static files found at {static_root}")
+
+        manifest_path.write_text(json.dumps(hashes, indent=1, sort_keys=True))
+        self.stdout.write(
+            f"Exported {len(hashes)} pages ({written} changed) "
+            f"and {len(redirects)} redirects"
+        )
+
+
+def get_version_pages(version_index: VersionIndex) -> dict[str, list[str]]:
+    """Get the URL of every page of each version, and of its sitemap."""
+    pages: defaultdict[str, list[str]] = defaultdict(list)
+    for version in version_index.versions:
+        pages[version.version_number] += [
+            version.url,
+            reverse("version-sitemap", kwargs={"version": version.version_number}),
+        ]
+    for urls in [
+        *version_index.module_urls.values(),
+        *version_index.klass_urls.values(),
+    ]:
+        for version_number, url in urls.items():
+            pages[version_number].append(url)
+    return dict(pages)
+
+
+def get_redirects(version_index: VersionIndex) -> list[tuple[str, str]]:
+    """
+    Get the (source, target) of every redirect.
+
+    These match what the redirecting views would do for any page that exists.
+    """
+    latest_url = version_index.versions[0].url
+    latest_prefix = reverse("latest-version-detail")
+    redirects = [
+        ("/projects/", reverse("home")),
+        ("/projects/Django/", latest_url),
+        (latest_prefix, latest_url),
+        (f"{latest_prefix}*", f"{latest_url}:splat"),
+    ]
+    for name, urls in sorted(version_index.klass_urls_by_name.items()):
+        # The URLs are newest first.
+        url = next(iter(urls.values()))
+        redirects.append((reverse("klass-detail-shortcut", args=[name]), url))
+    return redirects
+
+
+def render_pages(
+    paths: Sequence[str],
+    output_dir: Path,
+    base_url: str,
+    old_hashes: Mapping[str, str],
+) -> tuple[dict[str, str], int]:
+    """
+    Render some pages, and write out those which have changed.
+
+    Returns the hash of every page, and the number of pages written.
+    """
+    split_url = urlsplit(base_url)
+    client = Client(HTTP_HOST=split_url.netloc)
+    compressor = Compressor(quiet=True)
+    hashes = {}
+    written = 0
+    for path in paths:
+        response = client.get(path, secure=split_url.scheme == "https")
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}")
+
+        # The sitemaps are streamed.
+        content = response.getvalue()
+        hashes[path] = hashlib.sha256(content).hexdigest()
+        file_path = get_file_path(output_dir, path)
+        if hashes[path] == old_hashes[path] and file_path.exists():
+            continue
+
+        remove_page(output_dir, path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(content)
+        compressor.compress(str(file_path))
+        written += 1
+    return hashes, written
+
+
+def remove_page(output_dir: Path, path: str) -> None:
+    """Delete a page, and any compressed copies of it."""
+    file_path = get_file_path(output_dir, path)
+    for suffix in ("", ".gz", ".br"):
+        file_path.with_name(file_path.name + suffix).unlink(missing_ok=True)
+
+
+def get_file_path(output_dir: Path, path: str) -> Path:
+    if path.endswith("/"):
+        path += "index.html"
+    return output_dir / path.lstrip("/")
@@ -0,0 +1,23 @@
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from cbv.importer.fixtures import FixtureError, load_version, read_fixture
+
+
+class Command(BaseCommand):
+    """Load versions from JSON or packed fixtures, as written by `cbv_dumpversion`."""
+
+    help = "Loads versions from fixtures, replacing them if they exist."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("fixtures", nargs="+", type=Path)
+
+    def handle(self, *, fixtures: list[Path], **options: Any) -> None:
+        for fixture in fixtures:
+            try:
+                project_version = load_version(read_fixture(fixture))
+            except FixtureError as e:
+                raise CommandError(f"{fixture}: {e}") from e
+            self.stdout.write(f"Loaded Django {project_version.version_number}")
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from sphinx.util.inventory import InventoryFile
 
+from cbv.importer.storages import update_fingerprint
 from cbv.models import Klass, ProjectVersion
 
 
@@ -68,4 +69,5 @@ class Command(BaseCommand):
                             Klass.objects.filter(**qs_lookups).update(docs_url=url)
                             cnt += 1
                             continue
+            update_fingerprint(ProjectVersion.objects.get(version_number=v).pk)
             self.bless_prints(v, f"Updated {cnt} classes\n")
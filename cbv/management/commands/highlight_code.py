@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.core.management import BaseCommand
+
+from cbv.importer.storages import create_highlighted_code
+from cbv.models import Method
+
+
+class Command(BaseCommand):
+    """
+    Store the highlighted code for every method that doesn't have it yet.
+
+    Importing or loading a version does this already, so this is only needed for
+    data that was stored before the highlighting was.
+    """
+
+    def handle(self, **options: Any) -> None:
+        count = create_highlighted_code(Method.objects.all())
+        self.stdout.write(f"Highlighted {count} pieces of code")
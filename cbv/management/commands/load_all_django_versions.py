@@ -1,14 +1,83 @@
 import glob
 import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
 
-from django.core.management import BaseCommand, call_command
+from django.core.management import BaseCommand, CommandParser
+from django.db import connection, connections
+
+from cbv import models
+from cbv.importer.fixtures import SUFFIX, get_fixture_hash, load_version, read_fixture
 
 
 class Command(BaseCommand):
-    """Load the Django project fixtures and all version fixtures"""
+    """
+    Load the Django project fixtures and all version fixtures.
+
+    Each fixture is packed as it is read, if it isn't already. Fixtures which
+    match what is already loaded are skipped, and the rest are loaded several
+    at a time, unless the database is SQLite, which can only write one at a
+    time.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help=(
+                "The number of fixtures to load at once. Defaults to one for "
+                "SQLite, and to the number of CPUs otherwise."
+            ),
+        )
+
+    def handle(self, *, jobs: int | None, **options: Any) -> None:
+        loaded_hashes = set(
+            models.ProjectVersion.objects.exclude(fixture_hash="").values_list(
+                "fixture_hash", flat=True
+            )
+        )
+        fixtures = [
+            *glob.glob(os.path.join("cbv", "fixtures", "*.*.*json")),
+            *glob.glob(os.path.join("cbv", "fixtures", f"*{SUFFIX}")),
+        ]
+        packed_fixtures = {}
+        for fixture in sorted(fixtures):
+            packed = read_fixture(Path(fixture))
+            if get_fixture_hash(packed) in loaded_hashes:
+                self.stdout.write(f"Skipping {fixture}, which is already loaded")
+            else:
+                packed_fixtures[fixture] = packed
+
+        if jobs is None:
+            jobs = 1 if connection.vendor == "sqlite" else os.cpu_count()
+        if jobs == 1:
+            self._report(packed_fixtures, map(load_fixture, packed_fixtures.values()))
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                self._report(
+                    packed_fixtures,
+                    pool.map(load_fixture_in_thread, packed_fixtures.values()),
+                )
+
+    def _report(self, fixtures: Iterable[str], timings: Iterable[float]) -> None:
+        for fixture, seconds in zip(fixtures, timings, strict=True):
+            self.stdout.write(f"Loaded {fixture} in {seconds:.2f}s")
+
+
+def load_fixture(packed: bytes) -> float:
+    """Load a packed fixture, and return how long it took in seconds."""
+    start = time.perf_counter()
+    load_version(packed)
+    return time.perf_counter() - start
+
 
-    def handle(self, **options):
-        version_fixtures = glob.glob(os.path.join("cbv", "fixtures", "*.*.*json"))
-        for fixture in version_fixtures:
-            self.stdout.write(f"Loading {fixture}")
-            call_command("loaddata", fixture)
+def load_fixture_in_thread(packed: bytes) -> float:
+    try:
+        return load_fixture(packed)
+    finally:
+        # Each thread has its own connection, which would otherwise be left open.
+        connections.close_all()
@@ -0,0 +1,34 @@
+from typing import Any
+
+from django.core.management.commands import loaddata
+from django.db.models import signals
+
+from cbv import models
+from cbv.importer.storages import rebuild_derived_data
+
+
+class Command(loaddata.Command):
+    """
+    Load fixtures, then rebuild the derived tables for any version they touched.
+
+    Fixtures only contain the canonical data (as dumped by `cbv_dumpversion`),
+    so tables such as Ancestry, and the version fingerprints, have to be
+    recomputed after loading.
+    """
+
+    def handle(self, *fixture_labels: str, **options: Any) -> None:
+        loaded_versions: set[int] = set()
+
+        def record_version(instance: models.ProjectVersion, **kwargs: object) -> None:
+            loaded_versions.add(instance.pk)
+
+        signals.post_save.connect(
+            record_version, sender=models.ProjectVersion, weak=False
+        )
+        try:
+            super().handle(*fixture_labels, **options)
+        finally:
+            signals.post_save.disconnect(record_version, sender=models.ProjectVersion)
+
+        if loaded_versions:
+            rebuild_derived_data(loaded_versions)
@@ -1,8 +1,17 @@
+import ast
+from pathlib import Path
+from typing import Any
+
 import django
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.version import get_version
 
-from cbv.importer.importers import InspectCodeImporter
+from cbv.importer.importers import (
+    ASTCodeImporter,
+    CodeImporter,
+    InspectCodeImporter,
+)
 from cbv.importer.storages import DBStorage
 
 
@@ -10,11 +19,62 @@ class Command(BaseCommand):
     args = ""
     help = "Wipes and populates the CBV inspection models."
 
-    def handle(self, *args, **options):
-        module_paths = settings.CBV_SOURCES.keys()
-        importer = InspectCodeImporter(module_paths=module_paths)
-
-        DBStorage().import_project_version(
-            importer=importer,
-            project_version=django.get_version(),
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--source",
+            type=Path,
+            help=(
+                "Parse the Django source tree in this directory, rather than "
+                "inspecting the installed Django."
+            ),
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only write what has changed since the version was last stored, "
+                "keeping the primary keys of existing rows."
+            ),
+        )
+
+    def handle(
+        self, *args: Any, source: Path | None, incremental: bool, **options: Any
+    ) -> None:
+        module_paths = list(settings.CBV_SOURCES.keys())
+        importer: CodeImporter
+        if source is None:
+            importer = InspectCodeImporter(module_paths=module_paths)
+            project_version = django.get_version()
+        else:
+            importer = ASTCodeImporter(source_root=source, module_paths=module_paths)
+            project_version = get_source_version(source)
+
+        storage = DBStorage()
+        if incremental:
+            storage.update_project_version(
+                importer=importer, project_version=project_version
+            )
+        else:
+            storage.import_project_version(
+                importer=importer, project_version=project_version
+            )
+        if isinstance(importer, InspectCodeImporter):
+            stats = importer.stats
+            self.stdout.write(
+                f"Read {stats.files_read} files ({stats.cache_hits} cache hits)"
+            )
+            for module_path, seconds in stats.module_times.items():
+                self.stdout.write(f" {module_path}: {seconds:.2f}s")
+
+
+def get_source_version(source: Path) -> str:
+    """Get the version of Django in a source tree, as django.get_version() would."""
+    module = ast.parse((source / "django" / "__init__.py").read_text())
+    for statement in module.body:
+        if (
+            isinstance(statement, ast.Assign)
+            and isinstance(statement.targets[0], ast.Name)
+            and statement.targets[0].id == "VERSION"
+        ):
+            return get_version(ast.literal_eval(statement.value))
+    raise ValueError(f"No Django version found in {source}")
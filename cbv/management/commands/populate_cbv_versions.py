@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from cbv.importer.fixtures import dump_json, get_version_querysets
+from cbv.importer.importers import PreloadedCodeImporter
+from cbv.importer.storages import DBStorage
+from cbv.importer.workers import WorkerError, import_in_subprocess
+
+
+class Command(BaseCommand):
+    """
+    Import several versions of Django at once, each from its own virtualenv.
+
+    Each version is inspected by a worker process running under that virtualenv's
+    Python (see `cbv.importer.workers`), several at a time. The results are
+    stored one version at a time as each worker finishes, and can also be dumped
+    to fixtures.
+    """
+
+    help = "Wipes and populates the CBV inspection models for many Django versions."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "pythons",
+            nargs="+",
+            metavar="python",
+            help="The Python of a virtualenv with the version of Django to import.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help="The number of versions to inspect at once.",
+        )
+        parser.add_argument(
+            "--fixtures-dir",
+            type=Path,
+            help="Also dump each imported version to <version>.json in here.",
+        )
+
+    def handle(
+        self,
+        *,
+        pythons: list[str],
+        jobs: int | None,
+        fixtures_dir: Path | None,
+        **options: Any,
+    ) -> None:
+        module_paths = list(settings.CBV_SOURCES.keys())
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(import_in_subprocess, python, module_paths): python
+                for python in pythons
+            }
+            # Only this thread talks to the database.
+            for future in as_completed(futures):
+                try:
+                    version, elements = future.result()
+                except WorkerError as e:
+                    raise CommandError(str(e)) from e
+
+                self.stdout.write(f"Django {version} (from {futures[future]})")
+                DBStorage().import_project_version(
+                    importer=PreloadedCodeImporter(elements=elements),
+                    project_version=version,
+                )
+                if fixtures_dir is not None:
+                    with open(fixtures_dir / f"{version}.json", "w") as stream:
+                        dump_json(get_version_querysets(version).values(), stream)
@@ -0,0 +1,220 @@
+"""
+Metrics about the requests each worker has handled, in the Prometheus text format.
+
+Every request's latency and number of queries are recorded by URL name, along
+with whether pages came from the page cache, and each worker's memory use is
+read when the metrics are requested.
+
+The metrics are kept in memory, per worker process, and every series has a
+`pid` label for its worker. When there are several workers, each scrape is
+answered by just one of them, so sum over the latest series of each `pid` to
+get figures for the whole site.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import attrs
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponseBase
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+@attrs.define
+class Histogram:
+    buckets: tuple[float, ...]
+    # The number of observations in each bucket, and above the last.
+    counts: list[int]
+    total: float = 0.0
+
+    @classmethod
+    def with_buckets(cls, buckets: tuple[float, ...]) -> "Histogram":
+        return cls(buckets=buckets, counts=[0] * (len(buckets) + 1))
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.total += value
+
+
+_lock = threading.Lock()
+_request_seconds: dict[str, Histogram] = {}
+_request_queries: dict[str, Histogram] = {}
+_page_cache: Counter[str] = Counter()
+
+
+def observe_request(url_name: str, seconds: float, queries: int) -> None:
+    with _lock:
+        if url_name not in _request_seconds:
+            _request_seconds[url_name] = Histogram.with_buckets(LATENCY_BUCKETS)
+            _request_queries[url_name] = Histogram.with_buckets(QUERY_BUCKETS)
+        _request_seconds[url_name].observe(seconds)
+        _request_queries[url_name].observe(queries)
+
+
+def count_page_cache(result: str) -> None:
+    """Count a page being served with the given result: hit, miss or not_modified."""
+    with _lock:
+        _page_cache[result] += 1
+
+
+def clear_metrics() -> None:
+    """Forget every metric recorded by this worker."""
+    with _lock:
+        _request_seconds.clear()
+        _request_queries.clear()
+        _page_cache.clear()
+
+
+def render_metrics() -> str:
+    labels = {"pid": str(os.getpid())}
+    with _lock:
+        lines = [
+            *render_histograms(
+                "cbv_request_duration_seconds",
+                "Time taken to respond to requests, by URL name.",
+                _request_seconds,
+                labels,
+            ),
+            *render_histograms(
+                "cbv_request_queries",
+                "Database queries made by each request, by URL name.",
+                _request_queries,
+                labels,
+            ),
+            "# HELP cbv_page_cache_requests_total Pages served, by page cache result.",
+            "# TYPE cbv_page_cache_requests_total counter",
+            *(
+                render_sample(
+                    "cbv_page_cache_requests_total",
+                    {**labels, "result": result},
+                    _page_cache[result],
+                )
+                for result in ("hit", "miss", "not_modified")
+            ),
+        ]
+
+    resident_memory = get_resident_memory()
+    if resident_memory is not None:
+        lines += [
+            "# HELP cbv_worker_resident_memory_bytes Resident memory of the worker.",
+            "# TYPE cbv_worker_resident_memory_bytes gauge",
+            render_sample("cbv_worker_resident_memory_bytes", labels, resident_memory),
+        ]
+    lines += [
+        "# HELP cbv_worker_max_resident_memory_bytes Peak resident memory.",
+        "# TYPE cbv_worker_max_resident_memory_bytes gauge",
+        render_sample(
+            "cbv_worker_max_resident_memory_bytes", labels, get_max_resident_memory()
+        ),
+    ]
+    return "".join(f"{line}\n" for line in lines)
+
+
+def render_histograms(
+    name: str,
+    description: str,
+    histograms: Mapping[str, Histogram],
+    labels: Mapping[str, str],
+) -> Iterable[str]:
+    yield f"# HELP {name} {description}"
+    yield f"# TYPE {name} histogram"
+    for url_name, histogram in sorted(histograms.items()):
+        series_labels = {**labels, "url_name": url_name}
+        cumulative = 0
+        bounds = [*map(format_value, histogram.buckets), "+Inf"]
+        for bound, count in zip(bounds, histogram.counts, strict=True):
+            cumulative += count
+            yield render_sample(
+                f"{name}_bucket", {**series_labels, "le": bound}, cumulative
+            )
+        yield render_sample(f"{name}_sum", series_labels, histogram.total)
+        yield render_sample(f"{name}_count", series_labels, cumulative)
+
+
+def render_sample(name: str, labels: Mapping[str, str], value: float) -> str:
+    label_text = ",".join(
+        f'{label}="{escape_label_value(label_value)}"'
+        for label, label_value in labels.items()
+    )
+    return f"{name}{{{label_text}}} {format_value(value)}"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def get_resident_memory() -> int | None:
+    """Get the worker's resident memory in bytes, where /proc can tell us."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_max_resident_memory() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # It's in bytes on macOS, but in kilobytes everywhere else.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]) -> None:
+        self.get_response = get_response
+        if not settings.CBV_METRICS:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        query_counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_counter):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        match = request.resolver_match
+        if match is None:
+            # Requests for URLs which don't exist aren't told apart.
+            url_name = "none"
+        else:
+            url_name = match.url_name or match.route
+        observe_request(url_name, seconds, query_counter.queries)
+        return response
+
+
+@attrs.define
+class QueryCounter:
+    queries: int = 0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict[str, Any],
+    ) -> Any:
+        self.queries += 1
+        return execute(sql, params, many, context)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0010_auto_20230104_0019"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Ancestry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mro_position", models.IntegerField()),
+                ("is_direct", models.BooleanField(default=False)),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="cbv.klass",
+                    ),
+                ),
+                (
+                    "child",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="cbv.klass",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("mro_position",),
+                "unique_together": {("child", "ancestor"), ("child", "mro_position")},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0011_ancestry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectversion",
+            name="fingerprint",
+            field=models.CharField(default="", max_length=64),
+        ),
+    ]
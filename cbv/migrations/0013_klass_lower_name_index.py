@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:54
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0012_projectversion_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="klass",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"), name="klass_lower_name"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0013_klass_lower_name_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HighlightedCode",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code_hash", models.CharField(max_length=64, unique=True)),
+                ("html", models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0014_highlightedcode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectversion",
+            name="last_modified",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0015_projectversion_last_modified"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectversion",
+            name="fixture_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def clear_fixture_hashes(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    # load_all_django_versions skips versions whose fixtures are already loaded,
+    # so forget them, to have every version loaded again with a search index.
+    apps.get_model("cbv", "ProjectVersion").objects.update(fixture_hash="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cbv", "0016_projectversion_fixture_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=200, unique=True)),
+                ("trigram_count", models.PositiveSmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("class", "Class"),
+                            ("method", "Method"),
+                            ("attribute", "Attribute"),
+                            ("docstring", "Docstring"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=200)),
+                (
+                    "klass",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cbv.klass"
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cbv.searchterm"
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SearchTrigram",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigram", models.CharField(max_length=3)),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cbv.searchterm"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("trigram", "term")},
+            },
+        ),
+        migrations.RunPython(clear_fixture_hashes, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.urls import reverse
 
 
@@ -18,6 +19,15 @@ class ProjectVersion(models.Model):
 
     version_number = models.CharField(max_length=200)
     sortable_version_number = models.CharField(max_length=200)
+    # A hash of all the data in this version, recalculated whenever it is
+    # imported or loaded. Anything derived from the version can be cached
+    # for as long as this stays the same.
+    fingerprint = models.CharField(max_length=64, default="")
+    # When the fingerprint last changed.
+    last_modified = models.DateTimeField(null=True, blank=True)
+    # A hash of the packed fixture this version was loaded from, as long as it
+    # hasn't changed since. It is cleared whenever the fingerprint changes.
+    fixture_hash = models.CharField(max_length=64, default="", blank=True)
 
     objects = ProjectVersionManager()
 
@@ -121,8 +131,12 @@ class KlassManager(models.Manager):
         )
 
     def get_latest_for_name(self, klass_name: str) -> "Klass":
-        qs = self.filter(
-            name__iexact=klass_name,
+        # Compare with LOWER() rather than using __iexact, so that the lookup can
+        # use the index on the lower-cased name.
+        qs = (
+            self.alias(lower_name=Lower("name"))
+            .filter(lower_name=klass_name.lower())
+            .select_related("module__project_version")
         )
         try:
             obj = qs.order_by(
@@ -151,6 +165,10 @@ class Klass(models.Model):
     class Meta:
         unique_together = ("module", "name")
         ordering = ("module__name", "name")
+        indexes = (
+            # For the case-insensitive lookup behind the /<klass>/ shortcut.
+            models.Index(Lower("name"), name="klass_lower_name"),
+        )
 
     def natural_key(self) -> tuple[str, str, str, str]:
         return (self.name,) + self.module.natural_key()
@@ -209,116 +227,31 @@ class Klass(models.Model):
             ).order_by("name")
         return self._descendants
 
-    # TODO: This is all mucho inefficient. Perhaps we should use mptt for
-    #       get_all_ancestors, get_all_children, get_methods, & get_attributes?
     def get_all_ancestors(self) -> list["Klass"]:
+        """
+        Get every ancestor of this class in MRO order.
+
+        Reads the precomputed Ancestry closure table, so this is a single query
+        regardless of how deep the hierarchy is. Each returned Klass is annotated
+        with `is_direct_ancestor`.
+        """
         if not hasattr(self, "_all_ancestors"):
-            # Get immediate ancestors.
-            ancestors = self.get_ancestors().select_related("module__project_version")
-
-            # Flatten ancestors and their forebears into a list.
-            tree = []
-            for ancestor in ancestors:
-                tree.append(ancestor)
-                tree += ancestor.get_all_ancestors()
-
-            # Remove duplicates, leaving the last occurence in tact.
-            # This is how python's MRO works.
-            cleaned_ancestors: list[Klass] = []
-            for ancestor in reversed(tree):
-                if ancestor not in cleaned_ancestors:
-                    cleaned_ancestors.insert(0, ancestor)
-
-            # Cache the result on this object.
-            self._all_ancestors = cleaned_ancestors
+            self._all_ancestors = list(
+                Klass.objects.filter(descendant_links__child=self)
+                .annotate(is_direct_ancestor=models.F("descendant_links__is_direct"))
+                .select_related("module__project_version")
+                .order_by("descendant_links__mro_position")
+            )
         return self._all_ancestors
 
     def get_all_children(self) -> models.QuerySet["Klass"]:
         if not hasattr(self, "_all_descendants"):
-            children = self.get_children().select_related("module__project_version")
-            for child in children:
-                children = children | child.get_all_children()
-            self._all_descendants = children
-        return self._all_descendants
-
-    def get_methods(self) -> models.QuerySet["Method"]:
-        if not hasattr(self, "_methods"):
-            methods = self.method_set.all().select_related("klass")
-            for ancestor in self.get_all_ancestors():
-                methods = methods | ancestor.get_methods()
-            self._methods = methods
-        return self._methods
-
-    def get_attributes(self) -> models.QuerySet["KlassAttribute"]:
-        if not hasattr(self, "_attributes"):
-            attrs = self.attribute_set.all()
-            for ancestor in self.get_all_ancestors():
-                attrs = attrs | ancestor.get_attributes()
-            self._attributes = attrs
-        return self._attributes
-
-    def get_prepared_attributes(self) -> models.QuerySet["KlassAttribute"]:
-        attributes = self.get_attributes()
-        # Make a dictionary of attributes based on name
-        attribute_names: dict[str, list[KlassAttribute]] = {}
-        for attr in attributes:
-            try:
-                attribute_names[attr.name] += [attr]
-            except KeyError:
-                attribute_names[attr.name] = [attr]
-
-        ancestors = self.get_all_ancestors()
-
-        # Find overridden attributes
-        for name, attrs in attribute_names.items():
-            # Skip if we have only one attribute.
-            if len(attrs) == 1:
-                continue
-
-            # Sort the attributes by ancestors.
-            def _key(a: KlassAttribute) -> int:
-                try:
-                    # If ancestor, return the index (>= 0)
-                    return ancestors.index(a.klass)
-                except ValueError:  # Raised by .index if item is not in list.
-                    # else a.klass == self, so return -1
-                    return -1
-
-            sorted_attrs = sorted(attrs, key=_key)
-
-            # Mark overriden KlassAttributes
-            for a in sorted_attrs[1:]:
-                a.overridden = True
-        return attributes
-
-    def basic_yuml_data(self, first: bool = False) -> list[str]:
-        self._basic_yuml_data: list[str]
-        if hasattr(self, "_basic_yuml_data"):
-            return self._basic_yuml_data
-        yuml_data = []
-        template = "[{parent}{{bg:{parent_col}}}]^-[{child}{{bg:{child_col}}}]"
-        for ancestor in self.get_ancestors():
-            yuml_data.append(
-                template.format(
-                    parent=ancestor.name,
-                    child=self.name,
-                    parent_col="white" if ancestor.is_secondary() else "lightblue",
-                    child_col=(
-                        "green"
-                        if first
-                        else "white" if self.is_secondary() else "lightblue"
-                    ),
-                )
+            self._all_descendants = (
+                Klass.objects.filter(ancestor_links__ancestor=self)
+                .select_related("module__project_version")
+                .order_by("name")
             )
-            yuml_data += ancestor.basic_yuml_data()
-        self._basic_yuml_data = yuml_data
-        return self._basic_yuml_data
-
-    def basic_yuml_url(self) -> str | None:
-        data = ", ".join(self.basic_yuml_data(first=True))
-        if not data:
-            return None
-        return f"https://yuml.me/diagram/plain;/class/{data}.svg"
+        return self._all_descendants
 
 
 class Inheritance(models.Model):
@@ -335,6 +268,26 @@ class Inheritance(models.Model):
         unique_together = ("child", "order")
 
 
+class Ancestry(models.Model):
+    """
+    Closure table of the full MRO for a Klass.
+
+    There is a row for every (child, ancestor) pair, not just for direct parents,
+    so that all ancestors or all descendants of a Klass can be fetched in one
+    query. Rows are derived from Inheritance, and are rebuilt whenever a version
+    is imported or loaded from a fixture.
+    """
+
+    child = models.ForeignKey(Klass, models.CASCADE, related_name="ancestor_links")
+    ancestor = models.ForeignKey(Klass, models.CASCADE, related_name="descendant_links")
+    mro_position = models.IntegerField()
+    is_direct = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ("mro_position",)
+        unique_together = (("child", "ancestor"), ("child", "mro_position"))
+
+
 class KlassAttribute(models.Model):
     """Represents an attribute on a Klass"""
 
@@ -360,3 +313,61 @@ class Method(models.Model):
 
     class Meta:
         ordering = ("name",)
+
+
+class HighlightedCode(models.Model):
+    """
+    Syntax-highlighted HTML for the code of a Method, without line numbers.
+
+    Rows are keyed on a hash of the code, so that a method which is the same in
+    several versions is only highlighted once. They are derived from Method, and
+    are filled in whenever a version is imported or loaded from a fixture.
+    """
+
+    code_hash = models.CharField(max_length=64, unique=True)
+    html = models.TextField()
+
+
+class SearchTerm(models.Model):
+    """
+    A lower-cased word which can be searched for.
+
+    Terms are the names of classes, methods and attributes, and the words of
+    their docstrings. They are shared by every version, so the vocabulary stays
+    small enough to match misspelled words against, by their trigrams.
+    """
+
+    term = models.CharField(max_length=200, unique=True)
+    trigram_count = models.PositiveSmallIntegerField()
+
+
+class SearchTrigram(models.Model):
+    """One of the trigrams of a SearchTerm, for finding terms like a given word."""
+
+    trigram = models.CharField(max_length=3)
+    term = models.ForeignKey(SearchTerm, models.CASCADE)
+
+    class Meta:
+        unique_together = ("trigram", "term")
+
+
+class SearchEntry(models.Model):
+    """
+    Where a SearchTerm appears in a Klass.
+
+    Rows are derived from Klass, Method and KlassAttribute, and are rebuilt
+    whenever a version is imported or loaded from a fixture.
+    """
+
+    class Kind(models.TextChoices):
+        CLASS = "class"
+        METHOD = "method"
+        ATTRIBUTE = "attribute"
+        DOCSTRING = "docstring"
+
+    term = models.ForeignKey(SearchTerm, models.CASCADE)
+    klass = models.ForeignKey(Klass, models.CASCADE)
+    kind = models.CharField(max_length=10, choices=Kind)
+    # The class, method or attribute which is the term, or which has it in its
+    # docstring. It is empty for words in the docstring of the class itself.
+    name = models.CharField(max_length=200, blank=True)
@@ -1,6 +1,10 @@
+import weakref
+
 import attrs
 
 from cbv import models
+from cbv.snapshots import VersionIndex, VersionSnapshot, get_version_index
+from cbv.timing import timed
 
 
 @attrs.frozen
@@ -18,6 +22,8 @@ class VersionSwitcher:
 @attrs.frozen
 class NavData:
     modules: list["Module"]
+    # Identifies the rendered nav, for use with the {% cache %} template tag.
+    cache_key: str = ""
 
     @attrs.frozen
     class Module:
@@ -33,63 +39,63 @@ class NavData:
         active: bool
 
 
+# The nav for each version with nothing marked as active, built once per snapshot.
+_inactive_nav_data: "weakref.WeakKeyDictionary[VersionSnapshot, NavData]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
 class NavBuilder:
     def _to_module_data(
         self,
-        module: models.Module,
-        active_module: models.Module | None,
-        active_klass: models.Klass | None,
+        module: VersionSnapshot.Module,
+        klasses: tuple[VersionSnapshot.Klass, ...],
     ) -> "NavData.Module":
         return NavData.Module(
-            source_name=module.source_name(),
-            short_name=module.short_name(),
+            source_name=module.source_name,
+            short_name=module.short_name,
             classes=[
-                NavData.Klass(
-                    name=klass.name,
-                    url=klass.get_absolute_url(),
-                    active=klass == active_klass,
-                )
-                for klass in module.klass_set.all()
+                NavData.Klass(name=klass.name, url=klass.url, active=False)
+                for klass in klasses
             ],
-            active=module == active_module,
+            active=False,
         )
 
+    def _get_inactive_nav_data(self, snapshot: VersionSnapshot) -> NavData:
+        try:
+            return _inactive_nav_data[snapshot]
+        except KeyError:
+            pass
+        nav_data = NavData(
+            modules=[
+                self._to_module_data(module=m, klasses=snapshot.module_klasses[m])
+                for m in snapshot.modules
+            ]
+        )
+        _inactive_nav_data[snapshot] = nav_data
+        return nav_data
+
+    @timed("nav")
     def make_version_switcher(
         self,
         project_version: models.ProjectVersion,
-        klass: models.Klass | None = None,
+        klass: VersionSnapshot.Klass | None = None,
+        version_index: VersionIndex | None = None,
     ) -> VersionSwitcher:
-        other_versions = models.ProjectVersion.objects.exclude(pk=project_version.pk)
+        if version_index is None:
+            version_index = get_version_index()
         if klass:
-            other_versions_of_klass = models.Klass.objects.filter(
-                name=klass.name,
-                module__project_version__in=other_versions,
-            )
-            other_versions_of_klass_dict = {
-                x.module.project_version: x for x in other_versions_of_klass
-            }
-            versions = []
-            for other_version in other_versions:
-                try:
-                    other_klass = other_versions_of_klass_dict[other_version]
-                except KeyError:
-                    url = other_version.get_absolute_url()
-                else:
-                    url = other_klass.get_absolute_url()
-
-                versions.append(
-                    VersionSwitcher.OtherVersion(
-                        name=other_version.version_number, url=url
-                    )
-                )
+            klass_urls = version_index.get_klass_urls(klass.module.name, klass.name)
         else:
-            versions = [
-                VersionSwitcher.OtherVersion(
-                    name=other_version.version_number,
-                    url=other_version.get_absolute_url(),
-                )
-                for other_version in other_versions
-            ]
+            klass_urls = {}
+        versions = [
+            VersionSwitcher.OtherVersion(
+                name=other_version.version_number,
+                url=klass_urls.get(other_version.version_number, other_version.url),
+            )
+            for other_version in version_index.versions
+            if other_version.version_number != project_version.version_number
+        ]
 
         version_switcher = VersionSwitcher(
             version_name=project_version.version_number,
@@ -97,18 +103,36 @@ class NavBuilder:
         )
         return version_switcher
 
+    @timed("nav")
     def get_nav_data(
         self,
-        project_version: models.ProjectVersion,
-        module: models.Module | None = None,
-        klass: models.Klass | None = None,
+        snapshot: VersionSnapshot,
+        module: VersionSnapshot.Module | None = None,
+        klass: VersionSnapshot.Klass | None = None,
     ) -> NavData:
-        module_set = project_version.module_set.prefetch_related("klass_set").order_by(
-            "name"
+        """
+        Get the nav for a version, with the given module and class marked as active.
+
+        Only the entries for the active module and class are rebuilt, everything
+        else is shared with the cached inactive nav.
+        """
+        modules = list(self._get_inactive_nav_data(snapshot).modules)
+        if module is not None:
+            module_index = snapshot.modules.index(module)
+            classes = list(modules[module_index].classes)
+            if klass is not None:
+                klass_index = snapshot.module_klasses[module].index(klass)
+                classes[klass_index] = attrs.evolve(classes[klass_index], active=True)
+            modules[module_index] = attrs.evolve(
+                modules[module_index], classes=classes, active=True
+            )
+
+        cache_key = ":".join(
+            [
+                snapshot.version_number,
+                snapshot.fingerprint,
+                module.name if module else "",
+                klass.name if klass else "",
+            ]
         )
-        modules = [
-            self._to_module_data(module=m, active_module=module, active_klass=klass)
-            for m in module_set
-        ]
-        nav_data = NavData(modules=modules)
-        return nav_data
+        return NavData(modules=modules, cache_key=cache_key)
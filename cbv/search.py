@@ -0,0 +1,196 @@
+"""
+Search the classes of a version, by their names, their members' names, and the
+words of their docstrings.
+
+The index is built whenever a version is imported or loaded (see
+`cbv.importer.storages.create_search_index`), so a search never reads the
+classes or methods themselves. Each word searched for is looked up in the
+terms of the index three ways, from best match to worst:
+
+- exactly,
+- as the start of a term, so that "get_con" finds "get_context_data",
+- by the trigrams it shares with a term, so that "FromView" finds "formview".
+
+Each match is then scored by how well the term matched, and by what it
+matched: a class name counts for more than a word in a docstring.
+"""
+
+import re
+from collections import defaultdict
+
+import attrs
+from django.db.models import Count
+from django.urls import reverse
+
+from cbv import models
+
+
+# A term's trigrams must be at least this similar to a word's to match it.
+MIN_SIMILARITY = 0.3
+# No more than this many terms are matched by prefix, for each word.
+MAX_PREFIX_MATCHES = 100
+# Only this many words of a query are searched for.
+MAX_WORDS = 5
+
+KIND_WEIGHTS = {
+    models.SearchEntry.Kind.CLASS: 1.0,
+    models.SearchEntry.Kind.METHOD: 0.9,
+    models.SearchEntry.Kind.ATTRIBUTE: 0.8,
+    models.SearchEntry.Kind.DOCSTRING: 0.4,
+}
+
+# The kinds of entry which are named for a method, when they have a name.
+ANCHORED_KINDS = {models.SearchEntry.Kind.METHOD, models.SearchEntry.Kind.DOCSTRING}
+
+# Words too common in docstrings to be worth searching for.
+STOP_WORDS = frozenset(
+    {
+        "also",
+        "and",
+        "any",
+        "are",
+        "been",
+        "but",
+        "can",
+        "does",
+        "each",
+        "for",
+        "from",
+        "has",
+        "have",
+        "into",
+        "its",
+        "may",
+        "not",
+        "one",
+        "only",
+        "other",
+        "should",
+        "such",
+        "than",
+        "that",
+        "the",
+        "their",
+        "them",
+        "then",
+        "there",
+        "these",
+        "this",
+        "those",
+        "was",
+        "when",
+        "which",
+        "will",
+        "with",
+        "would",
+        "you",
+    }
+)
+
+
+@attrs.frozen
+class SearchResult:
+    kind: str
+    # The class, method or attribute found, or the class if a word was found in
+    # the class's docstring.
+    name: str
+    klass_name: str
+    module_name: str
+    url: str
+    score: float
+
+
+def get_words(text: str) -> list[str]:
+    """Split text into lower-cased words, such as Python names, in order."""
+    return re.findall(r"[a-z_][a-z0-9_]*", text.lower())
+
+
+def get_docstring_words(docstring: str) -> set[str]:
+    """Get the words of a docstring worth indexing."""
+    return {
+        word
+        for word in get_words(docstring)
+        if 3 <= len(word) <= 200 and word not in STOP_WORDS
+    }
+
+
+def get_trigrams(word: str) -> set[str]:
+    # Padding the start more than the end makes the start count for more.
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def match_terms(word: str) -> dict[int, float]:
+    """Get the primary keys of the terms a word matches, with how well it matches."""
+    scores: dict[int, float] = {}
+    prefix_matches = models.SearchTerm.objects.filter(term__startswith=word)
+    for term_pk, term in prefix_matches.values_list("pk", "term")[:MAX_PREFIX_MATCHES]:
+        if term == word:
+            scores[term_pk] = 1.0
+        else:
+            # Closer to an exact match, the more of the term the word covers.
+            scores[term_pk] = 0.6 + 0.3 * len(word) / len(term)
+
+    trigrams = get_trigrams(word)
+    similar_terms = (
+        models.SearchTrigram.objects.filter(trigram__in=trigrams)
+        .values("term")
+        .annotate(shared=Count("pk"))
+        .values_list("term", "term__trigram_count", "shared")
+    )
+    for term_pk, trigram_count, shared in similar_terms:
+        similarity = shared / (len(trigrams) + trigram_count - shared)
+        if similarity >= MIN_SIMILARITY and term_pk not in scores:
+            scores[term_pk] = 0.5 * similarity
+    return scores
+
+
+def search(query: str, version_number: str, *, limit: int = 20) -> list[SearchResult]:
+    """Find the best matches for a query in a version, best first."""
+    words = list(dict.fromkeys(get_words(query)))[:MAX_WORDS]
+    word_scores = [match_terms(word) for word in words]
+    term_pks = {term_pk for scores in word_scores for term_pk in scores}
+
+    entries = models.SearchEntry.objects.filter(
+        term__in=term_pks,
+        klass__module__project_version__version_number=version_number,
+    ).values_list("term", "kind", "name", "klass__name", "klass__module__name")
+    # The best score for each word, by what was found.
+    found: defaultdict[tuple[str, str, str, str], list[float]] = defaultdict(
+        lambda: [0.0] * len(words)
+    )
+    for term_pk, kind, name, klass_name, module_name in entries:
+        scores = found[(kind, name, klass_name, module_name)]
+        for index, word_score in enumerate(word_scores):
+            score = word_score.get(term_pk, 0.0) * KIND_WEIGHTS[kind]
+            scores[index] = max(scores[index], score)
+
+    # Best first, and then by class, so that a class's members are together.
+    ranked = sorted(
+        found.items(),
+        key=lambda item: (-sum(item[1]), item[0][2], item[0][3], item[0][1]),
+    )[:limit]
+    results = []
+    for (kind, name, klass_name, module_name), scores in ranked:
+        url = reverse(
+            "klass-detail",
+            kwargs={
+                "version": version_number,
+                "module": module_name,
+                "klass": klass_name,
+            },
+        )
+        # Methods have anchors on the page, but attributes don't.
+        if name and kind in ANCHORED_KINDS:
+            url += f"#{name}"
+        results.append(
+            SearchResult(
+                kind=kind,
+                name=name or klass_name,
+                klass_name=klass_name,
+                module_name=module_name,
+                url=url,
+                score=round(sum(scores), 3),
+            )
+        )
+    return results
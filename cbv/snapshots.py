@@ -0,0 +1,467 @@
+"""
+Immutable in-memory copies of the data for each ProjectVersion.
+
+The data for a version only changes when it is imported or loaded from a fixture,
+so rather than walking the hierarchy through the ORM on every request, each worker
+builds a snapshot of a version the first time it is needed and keeps it around.
+Snapshots are tied to the version's fingerprint, so a reload swaps in a fresh one.
+"""
+
+import datetime
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from itertools import groupby
+from operator import itemgetter
+from typing import Any
+
+import attrs
+from django.urls import reverse
+from django.utils.safestring import SafeString
+
+from cbv import models
+from cbv.highlighting import hash_code, highlight_code, with_line_numbers
+from cbv.timing import timed
+
+
+@attrs.frozen(eq=False)
+class VersionSnapshot:
+    version_number: str
+    fingerprint: str
+    url: str
+    # Ordered by name.
+    modules: tuple["VersionSnapshot.Module", ...]
+    # Ordered by module name, then class name.
+    klasses: tuple["VersionSnapshot.Klass", ...]
+    module_klasses: Mapping[
+        "VersionSnapshot.Module", tuple["VersionSnapshot.Klass", ...]
+    ]
+    descendants: Mapping["VersionSnapshot.Klass", tuple["VersionSnapshot.Klass", ...]]
+    # Ordered by name, then MRO.
+    methods: Mapping["VersionSnapshot.Klass", tuple["VersionSnapshot.Method", ...]]
+    attributes: Mapping[
+        "VersionSnapshot.Klass", tuple["VersionSnapshot.Attribute", ...]
+    ]
+    modules_by_name: Mapping[str, "VersionSnapshot.Module"]
+    # Keyed on lower-cased (module name, class name).
+    klasses_by_name: Mapping[tuple[str, str], "VersionSnapshot.Klass"]
+
+    @attrs.frozen(eq=False)
+    class Module:
+        name: str
+        short_name: str
+        long_name: str
+        source_name: str
+        docstring: str
+        filename: str
+        url: str
+
+    @attrs.frozen(eq=False)
+    class Klass:
+        name: str
+        module: "VersionSnapshot.Module"
+        docstring: str
+        line_number: int
+        import_path: str
+        docs_url: str
+        url: str
+        source_url: str
+        is_secondary: bool
+        # Direct parents, in the order they are inherited from.
+        parents: tuple["VersionSnapshot.Klass", ...]
+        # Every ancestor, in MRO order.
+        ancestors: tuple["VersionSnapshot.Klass", ...]
+        yuml_url: str | None
+
+    @attrs.frozen(eq=False)
+    class Method:
+        klass: "VersionSnapshot.Klass"
+        name: str
+        docstring: str
+        code: str
+        # The highlighted code, with line numbers.
+        code_html: SafeString
+        kwargs: str
+        line_number: int
+        overridden: bool
+
+    @attrs.frozen(eq=False)
+    class Attribute:
+        klass: "VersionSnapshot.Klass"
+        name: str
+        value: str
+        line_number: int
+        overridden: bool
+
+    def get_module(self, name: str) -> "VersionSnapshot.Module":
+        """Find a module by its exact name, raising KeyError if there isn't one."""
+        return self.modules_by_name[name]
+
+    def get_fuzzy_module(self, name: str) -> "VersionSnapshot.Module":
+        """Find a module by case-insensitive name, raising KeyError if there isn't one."""
+        for module in self.modules:
+            if module.name.lower() == name.lower():
+                return module
+        raise KeyError(name)
+
+    def get_klass(self, module_name: str, klass_name: str) -> "VersionSnapshot.Klass":
+        """Find a class by case-insensitive names, raising KeyError if there isn't one."""
+        return self.klasses_by_name[(module_name.lower(), klass_name.lower())]
+
+
+_snapshots: dict[str, VersionSnapshot] = {}
+_lock = threading.Lock()
+
+
+def get_snapshot(project_version: models.ProjectVersion) -> VersionSnapshot:
+    """
+    Get the snapshot of a version, building it if this worker doesn't have it yet.
+
+    A snapshot is replaced whole when the version's fingerprint changes, so
+    concurrent requests see either the old data or the new, never a mix.
+    """
+    snapshot = _snapshots.get(project_version.version_number)
+    if snapshot is None or snapshot.fingerprint != project_version.fingerprint:
+        with _lock:
+            snapshot = _snapshots.get(project_version.version_number)
+            if snapshot is None or snapshot.fingerprint != project_version.fingerprint:
+                snapshot = build_snapshot(project_version)
+                _snapshots[project_version.version_number] = snapshot
+    return snapshot
+
+
+def clear_snapshots() -> None:
+    """Forget every snapshot held by this worker."""
+    global _version_index
+    with _lock:
+        _snapshots.clear()
+        _version_index = None
+
+
+@attrs.frozen(eq=False)
+class VersionIndex:
+    """Every version, and the URLs of each module and class across them."""
+
+    # The (version number, fingerprint) of every version, newest first.
+    token: tuple[tuple[str, str], ...]
+    # When any version last changed, if known.
+    last_modified: datetime.datetime | None
+    # Newest first.
+    versions: tuple["VersionIndex.Version", ...]
+    # Each is a mapping of version number to URL, newest first.
+    module_urls: Mapping[str, Mapping[str, str]]
+    klass_urls: Mapping[tuple[str, str], Mapping[str, str]]
+    klass_urls_by_name: Mapping[str, Mapping[str, str]]
+
+    @attrs.frozen
+    class Version:
+        version_number: str
+        url: str
+
+    def get_klass_urls(self, module_name: str, klass_name: str) -> Mapping[str, str]:
+        """
+        Get the URL of a class in each version it is in, newest first.
+
+        Where a class is not in the given module in some version, it is looked for
+        by name alone, to follow classes that have moved between modules.
+        """
+        return {
+            **self.klass_urls_by_name.get(klass_name, {}),
+            **self.klass_urls.get((module_name, klass_name), {}),
+        }
+
+    def get_latest_klass_url(self, module_name: str, klass_name: str) -> str:
+        """Get the URL of a class in the newest version it is in that module."""
+        return next(iter(self.klass_urls[(module_name, klass_name)].values()))
+
+    def get_latest_module_url(self, module_name: str) -> str:
+        """Get the URL of a module in the newest version it is in."""
+        return next(iter(self.module_urls[module_name].values()))
+
+
+_version_index: VersionIndex | None = None
+
+
+def get_version_index() -> VersionIndex:
+    """
+    Get the cross-version index, building it if this worker doesn't have it yet.
+
+    This costs one query to check that no version has changed since the index
+    was built.
+    """
+    global _version_index
+    rows = list(
+        models.ProjectVersion.objects.order_by("-sortable_version_number").values_list(
+            "version_number", "fingerprint", "last_modified"
+        )
+    )
+    token = tuple(
+        (version_number, fingerprint) for version_number, fingerprint, _ in rows
+    )
+    version_index = _version_index
+    if version_index is None or version_index.token != token:
+        # The modification times only change along with the fingerprints.
+        last_modified = max(
+            (modified for _, _, modified in rows if modified is not None),
+            default=None,
+        )
+        version_index = build_version_index(token, last_modified)
+        _version_index = version_index
+    return version_index
+
+
+@timed("snapshot")
+def build_version_index(
+    token: tuple[tuple[str, str], ...], last_modified: datetime.datetime | None
+) -> VersionIndex:
+    module_urls: defaultdict[str, dict[str, str]] = defaultdict(dict)
+    klass_urls: defaultdict[tuple[str, str], dict[str, str]] = defaultdict(dict)
+    klass_urls_by_name: defaultdict[str, dict[str, str]] = defaultdict(dict)
+    modules = (
+        models.Module.objects.select_related("project_version")
+        .order_by("-project_version__sortable_version_number")
+        .only("name", "project_version__version_number")
+    )
+    for module in modules:
+        module_urls[module.name][
+            module.project_version.version_number
+        ] = module.get_absolute_url()
+
+    klasses = (
+        models.Klass.objects.select_related("module__project_version")
+        .order_by("-module__project_version__sortable_version_number")
+        .only("name", "module__name", "module__project_version__version_number")
+    )
+    for klass in klasses:
+        version_number = klass.module.project_version.version_number
+        url = klass.get_absolute_url()
+        klass_urls[(klass.module.name, klass.name)][version_number] = url
+        klass_urls_by_name[klass.name][version_number] = url
+
+    return VersionIndex(
+        token=token,
+        last_modified=last_modified,
+        versions=tuple(
+            VersionIndex.Version(
+                version_number=version_number,
+                url=reverse("version-detail", kwargs={"version": version_number}),
+            )
+            for version_number, _ in token
+        ),
+        module_urls=dict(module_urls),
+        klass_urls=dict(klass_urls),
+        klass_urls_by_name=dict(klass_urls_by_name),
+    )
+
+
+@timed("snapshot")
+def build_snapshot(project_version: models.ProjectVersion) -> VersionSnapshot:
+    version_number = project_version.version_number
+
+    modules = {}
+    for module in (
+        models.Module.objects.filter(project_version=project_version)
+        .select_related("project_version")
+        .order_by("name")
+    ):
+        modules[module.pk] = VersionSnapshot.Module(
+            name=module.name,
+            short_name=module.short_name(),
+            long_name=module.long_name(),
+            source_name=module.source_name(),
+            docstring=module.docstring,
+            filename=module.filename,
+            url=module.get_absolute_url(),
+        )
+
+    parents: defaultdict[int, list[int]] = defaultdict(list)
+    for child_pk, parent_pk in (
+        models.Inheritance.objects.filter(
+            child__module__project_version=project_version
+        )
+        .order_by("child", "order")
+        .values_list("child_id", "parent_id")
+    ):
+        parents[child_pk].append(parent_pk)
+
+    ancestors: defaultdict[int, list[int]] = defaultdict(list)
+    for child_pk, ancestor_pk in (
+        models.Ancestry.objects.filter(child__module__project_version=project_version)
+        .order_by("child", "mro_position")
+        .values_list("child_id", "ancestor_id")
+    ):
+        ancestors[child_pk].append(ancestor_pk)
+
+    klass_rows = {
+        klass.pk: klass
+        for klass in models.Klass.objects.filter(
+            module__project_version=project_version
+        )
+        .select_related("module__project_version")
+        .order_by("module__name", "name")
+    }
+    klasses: dict[int, VersionSnapshot.Klass] = {}
+
+    def build_klass(pk: int) -> VersionSnapshot.Klass:
+        # Ancestors are built first, so that each class can refer to them.
+        if pk not in klasses:
+            klass = klass_rows[pk]
+            module = modules[klass.module_id]
+            klass_parents = tuple(build_klass(p) for p in parents[pk])
+            klasses[pk] = VersionSnapshot.Klass(
+                name=klass.name,
+                module=module,
+                docstring=klass.docstring,
+                line_number=klass.line_number,
+                import_path=klass.import_path,
+                docs_url=klass.docs_url,
+                url=klass.get_absolute_url(),
+                source_url=klass.get_source_url(),
+                is_secondary=klass.is_secondary(),
+                parents=klass_parents,
+                ancestors=tuple(build_klass(a) for a in ancestors[pk]),
+                yuml_url=_yuml_url(klass.name, klass_parents),
+            )
+        return klasses[pk]
+
+    for pk in klass_rows:
+        build_klass(pk)
+    ordered_klasses = tuple(klasses[pk] for pk in klass_rows)
+
+    module_klasses: defaultdict[VersionSnapshot.Module, list[VersionSnapshot.Klass]]
+    module_klasses = defaultdict(list)
+    descendants: defaultdict[VersionSnapshot.Klass, list[VersionSnapshot.Klass]]
+    descendants = defaultdict(list)
+    for klass in ordered_klasses:
+        module_klasses[klass.module].append(klass)
+        for ancestor in klass.ancestors:
+            descendants[ancestor].append(klass)
+
+    method_rows = list(
+        models.Method.objects.filter(klass__module__project_version=project_version)
+        .order_by("name")
+        .values("klass_id", "name", "docstring", "code", "kwargs", "line_number")
+    )
+    highlighted = _get_highlighted_code(row["code"] for row in method_rows)
+    for row in method_rows:
+        row["code_html"] = with_line_numbers(
+            highlighted[row["code"]], row["line_number"]
+        )
+    methods = _resolve_members(klasses, method_rows, VersionSnapshot.Method)
+    attributes = _resolve_members(
+        klasses,
+        models.KlassAttribute.objects.filter(
+            klass__module__project_version=project_version
+        )
+        .order_by("name")
+        .values("klass_id", "name", "value", "line_number"),
+        VersionSnapshot.Attribute,
+    )
+
+    return VersionSnapshot(
+        version_number=version_number,
+        fingerprint=project_version.fingerprint,
+        url=project_version.get_absolute_url(),
+        modules=tuple(modules.values()),
+        klasses=ordered_klasses,
+        module_klasses={
+            module: tuple(module_klasses[module]) for module in modules.values()
+        },
+        descendants={
+            klass: tuple(sorted(descendants[klass], key=lambda k: k.name))
+            for klass in ordered_klasses
+        },
+        methods=methods,
+        attributes=attributes,
+        modules_by_name={module.name: module for module in modules.values()},
+        klasses_by_name={
+            (klass.module.name.lower(), klass.name.lower()): klass
+            for klass in ordered_klasses
+        },
+    )
+
+
+def _get_highlighted_code(codes: Iterable[str]) -> dict[str, str]:
+    """
+    Look up the stored highlighting for each piece of code.
+
+    Code that has not been highlighted yet, such as in a database from before the
+    highlighting was stored, is highlighted here instead.
+    """
+    hashes = {code: hash_code(code) for code in codes}
+    stored = dict(
+        models.HighlightedCode.objects.filter(
+            code_hash__in=set(hashes.values())
+        ).values_list("code_hash", "html")
+    )
+    return {
+        code: stored[code_hash] if code_hash in stored else highlight_code(code)
+        for code, code_hash in hashes.items()
+    }
+
+
+def _resolve_members(
+    klasses: Mapping[int, VersionSnapshot.Klass],
+    rows: Iterable[dict[str, Any]],
+    member_class: type[VersionSnapshot.Method] | type[VersionSnapshot.Attribute],
+) -> dict[VersionSnapshot.Klass, tuple[Any, ...]]:
+    """
+    Work out the members visible on each class, from those defined on it and its
+    ancestors.
+
+    Members are ordered by name, then by MRO, and every member with the same name
+    as one earlier in the MRO is marked as `overridden`. `rows` must be ordered by
+    name, and that order is kept so that it matches the database's collation.
+    """
+    name_order: dict[str, int] = {}
+    defined: defaultdict[int, list[dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        name_order.setdefault(row["name"], len(name_order))
+        defined[row.pop("klass_id")].append(row)
+
+    klass_pks = {node: pk for pk, node in klasses.items()}
+    resolved = {}
+    for klass in klasses.values():
+        candidates = [
+            (name_order[row["name"]], position, owner, row)
+            for position, owner in enumerate([klass, *klass.ancestors])
+            for row in defined[klass_pks[owner]]
+        ]
+        candidates.sort(key=itemgetter(0, 1))
+        members = []
+        for _, namesakes in groupby(candidates, key=itemgetter(0)):
+            for position, (_, _, owner, row) in enumerate(namesakes):
+                members.append(
+                    member_class(klass=owner, overridden=position > 0, **row)
+                )
+        resolved[klass] = tuple(members)
+    return resolved
+
+
+def _yuml_url(name: str, parents: tuple[VersionSnapshot.Klass, ...]) -> str | None:
+    template = "[{parent}{{bg:{parent_col}}}]^-[{child}{{bg:{child_col}}}]"
+
+    def yuml_data(
+        name: str, child_col: str, parents: tuple[VersionSnapshot.Klass, ...]
+    ) -> list[str]:
+        data = []
+        for parent in parents:
+            data.append(
+                template.format(
+                    parent=parent.name,
+                    child=name,
+                    parent_col="white" if parent.is_secondary else "lightblue",
+                    child_col=child_col,
+                )
+            )
+            data += yuml_data(
+                parent.name,
+                "white" if parent.is_secondary else "lightblue",
+                parent.parents,
+            )
+        return data
+
+    data = ", ".join(yuml_data(name, "green", parents))
+    if not data:
+        return None
+    return f"https://yuml.me/diagram/plain;/class/{data}.svg"
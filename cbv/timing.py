@@ -0,0 +1,137 @@
+"""
+Record where the time goes in a request, and report it in a Server-Timing header.
+
+Timing is off unless CBV_SERVER_TIMING_SAMPLE_RATE is set above zero, and then
+only that fraction of requests are timed. Requests which aren't sampled only
+pay for a context variable lookup at each timed point, so it can be left on in
+production.
+
+Code marks the parts worth timing with `timed`, as a decorator or a context
+manager. Each name's durations are added up over the request, and parts may
+overlap: "context" includes "nav", and "snapshot" when one is built, for
+example. Every database query is counted and timed as "db", and the whole
+response as "total".
+
+With CBV_SERVER_TIMING_LOG set, each timed request is also logged to the
+"cbv.timing" logger, as a line of JSON.
+
+Only the time taken to produce the response's headers is recorded, so the body
+of a streaming response, such as a sitemap, isn't included.
+"""
+
+import json
+import logging
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import attrs
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponseBase
+
+
+logger = logging.getLogger(__name__)
+
+
+@attrs.define
+class Timings:
+    # Seconds spent in each timed part, in the order they were first timed.
+    durations: dict[str, float] = attrs.Factory(dict)
+    queries: int = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def to_header(self) -> str:
+        metrics = []
+        for name, seconds in self.durations.items():
+            metric = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+# The timings of the request being handled, if it was sampled.
+_timings: ContextVar[Timings | None] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the time taken to the current request's timings, if it has any."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]) -> None:
+        self.get_response = get_response
+        self.sample_rate: float = settings.CBV_SERVER_TIMING_SAMPLE_RATE
+        self.log: bool = settings.CBV_SERVER_TIMING_LOG
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = Timings()
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(QueryTimer(timings)):
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        timings.add("total", time.perf_counter() - start)
+
+        response.headers["Server-Timing"] = timings.to_header()
+        if self.log:
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "queries": timings.queries,
+                        # In milliseconds, like the header.
+                        **{
+                            name: round(seconds * 1000, 1)
+                            for name, seconds in timings.durations.items()
+                        },
+                    }
+                )
+            )
+        return response
+
+
+@attrs.frozen
+class QueryTimer:
+    timings: Timings
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict[str, Any],
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings.add("db", time.perf_counter() - start)
+            self.timings.queries += 1
@@ -1,14 +1,29 @@
-from typing import Any
+import datetime
+from collections.abc import Iterator
+from itertools import groupby
+from operator import attrgetter, itemgetter
 
 import attrs
 from django import http
+from django.conf import settings
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.html import escape
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control, never_cache
 from django.views.generic import RedirectView, TemplateView, View
 
-from cbv.models import Klass, Module, ProjectVersion
+from cbv.caching import LATEST_MAX_AGE, VersionPageCacheMixin
+from cbv.metrics import CONTENT_TYPE, render_metrics
+from cbv.models import Klass, ProjectVersion
 from cbv.queries import NavBuilder
+from cbv.search import search
+from cbv.snapshots import VersionSnapshot, get_snapshot
+from cbv.timing import timed
 
 
+@method_decorator(cache_control(public=True, max_age=LATEST_MAX_AGE), name="dispatch")
 class RedirectToLatestVersionView(RedirectView):
     permanent = False
 
@@ -18,7 +33,7 @@ class RedirectToLatestVersionView(RedirectView):
         return super().get_redirect_url(**kwargs)
 
 
-class KlassDetailView(TemplateView):
+class KlassDetailView(VersionPageCacheMixin, TemplateView):
     template_name = "cbv/klass_detail.html"
 
     @attrs.frozen
@@ -32,61 +47,81 @@ class KlassDetailView(TemplateView):
         name: str
         url: str
 
-    def get_context_data(self, **kwargs):
-        qs = Klass.objects.filter(
-            name__iexact=self.kwargs["klass"],
-            module__name__iexact=self.kwargs["module"],
-            module__project_version__version_number=self.kwargs["version"],
-        ).select_related("module__project_version")
+    def check_exists(self) -> None:
+        self.get_klass()
+
+    def get_klass(
+        self,
+    ) -> tuple[ProjectVersion, VersionSnapshot, VersionSnapshot.Klass]:
         try:
-            klass = qs.get()
-        except Klass.DoesNotExist:
+            project_version = ProjectVersion.objects.get(
+                version_number=self.kwargs["version"]
+            )
+        except ProjectVersion.DoesNotExist:
+            raise http.Http404
+        snapshot = get_snapshot(project_version)
+        try:
+            klass = snapshot.get_klass(self.kwargs["module"], self.kwargs["klass"])
+        except KeyError:
             raise http.Http404
+        return project_version, snapshot, klass
+
+    @timed("context")
+    def get_context_data(self, **kwargs):
+        project_version, snapshot, klass = self.get_klass()
 
-        canonical_url_path = klass.get_latest_version_url()
-        best_current_path = klass.get_absolute_url()
+        canonical_url_path = self.version_index.get_latest_klass_url(
+            klass.module.name, klass.name
+        )
+        best_current_path = klass.url
         if best_current_path != self.request.path:
             push_state_url = best_current_path
         else:
             push_state_url = None
         nav_builder = NavBuilder()
         version_switcher = nav_builder.make_version_switcher(
-            klass.module.project_version, klass
+            project_version, klass, version_index=self.version_index
         )
-        nav = nav_builder.get_nav_data(
-            klass.module.project_version, klass.module, klass
-        )
-        direct_ancestors = list(klass.get_ancestors())
+        nav = nav_builder.get_nav_data(snapshot, klass.module, klass)
         ancestors = [
             self.Ancestor(
                 name=ancestor.name,
-                url=ancestor.get_absolute_url(),
-                is_direct=ancestor in direct_ancestors,
+                url=ancestor.url,
+                is_direct=ancestor in klass.parents,
             )
-            for ancestor in klass.get_all_ancestors()
+            for ancestor in klass.ancestors
         ]
         children = [
             self.Child(
                 name=child.name,
-                url=child.get_absolute_url(),
+                url=child.url,
             )
-            for child in klass.get_all_children()
+            for child in snapshot.descendants[klass]
         ]
+        # The methods are ordered by name, and then by MRO, so each name's
+        # implementations are already together and in the right order.
+        namesake_methods = {
+            name: tuple(namesakes)
+            for name, namesakes in groupby(
+                snapshot.methods[klass], key=attrgetter("name")
+            )
+        }
         return {
             "all_ancestors": ancestors,
             "all_children": children,
-            "attributes": klass.get_prepared_attributes(),
+            "attributes": snapshot.attributes[klass],
             "canonical_url": self.request.build_absolute_uri(canonical_url_path),
             "klass": klass,
-            "methods": list(klass.get_methods()),
+            "namesake_methods": namesake_methods,
             "nav": nav,
-            "project": f"Django {klass.module.project_version.version_number}",
+            "project": f"Django {project_version.version_number}",
             "push_state_url": push_state_url,
             "version_switcher": version_switcher,
-            "yuml_url": klass.basic_yuml_url(),
+            "yuml_url": klass.yuml_url,
         }
 
 
+@method_decorator(cache_control(public=True, max_age=LATEST_MAX_AGE), name="dispatch")
 class LatestKlassRedirectView(RedirectView):
     def get_redirect_url(self, **kwargs):
         try:
@@ -94,7 +129,8 @@ class LatestKlassRedirectView(RedirectView):
         except Klass.DoesNotExist:
             raise http.Http404
 
-        return klass.get_latest_version_url()
+        # This is already the newest version of the class with this name.
+        return klass.get_absolute_url()
 
 
 @attrs.frozen
@@ -103,61 +139,59 @@ class KlassData:
     url: str
 
 
-class ModuleDetailView(TemplateView):
+class ModuleDetailView(VersionPageCacheMixin, TemplateView):
     template_name = "cbv/module_detail.html"
     push_state_url = None
 
-    def get_object(self, queryset=None):
+    def get_object(self, queryset: None = None) -> VersionSnapshot.Module:
         try:
             obj = self.get_precise_object()
-        except Module.DoesNotExist:
+        except KeyError:
             try:
                 obj = self.get_fuzzy_object()
-            except Module.DoesNotExist:
+            except KeyError:
                 raise http.Http404
-            self.push_state_url = obj.get_absolute_url()
+            self.push_state_url = obj.url
 
         return obj
 
     def get(self, request, *args, **kwargs):
+        self.load_version()
+        return super().get(request, *args, **kwargs)
+
+    def check_exists(self) -> None:
+        self.load_version()
+        self.get_object()
+
+    def load_version(self) -> None:
         try:
             self.project_version = ProjectVersion.objects.filter(
-                version_number=kwargs["version"]
+                version_number=self.kwargs["version"]
             ).get()
         except ProjectVersion.DoesNotExist:
             raise http.Http404
-        return super().get(request, *args, **kwargs)
+        self.snapshot = get_snapshot(self.project_version)
 
-    def get_precise_object(self, queryset=None):
-        return Module.objects.get(
-            name=self.kwargs["module"], project_version=self.project_version
-        )
+    def get_precise_object(self, queryset: None = None) -> VersionSnapshot.Module:
+        return self.snapshot.get_module(self.kwargs["module"])
 
-    def get_fuzzy_object(self, queryset=None):
-        return Module.objects.get(
-            name__iexact=self.kwargs["module"],
-            project_version__version_number=self.kwargs["version"],
-        )
+    def get_fuzzy_object(self, queryset: None = None) -> VersionSnapshot.Module:
+        return self.snapshot.get_fuzzy_module(self.kwargs["module"])
 
+    @timed("context")
     def get_context_data(self, **kwargs):
         module = self.get_object()
-        klasses = Klass.objects.filter(module=module).select_related(
-            "module__project_version"
-        )
-        klass_list = [KlassData(name=k.name, url=k.get_absolute_url()) for k in klasses]
+        klass_list = [
+            KlassData(name=k.name, url=k.url)
+            for k in self.snapshot.module_klasses[module]
+        ]
 
-        latest_version = (
-            Module.objects.filter(
-                name=module.name,
-            )
-            .select_related("project_version")
-            .order_by("-project_version__sortable_version_number")
-            .first()
-        )
-        canonical_url_path = latest_version.get_absolute_url()
+        canonical_url_path = self.version_index.get_latest_module_url(module.name)
         nav_builder = NavBuilder()
-        version_switcher = nav_builder.make_version_switcher(self.project_version)
-        nav = nav_builder.get_nav_data(self.project_version, module)
+        version_switcher = nav_builder.make_version_switcher(
+            self.project_version, version_index=self.version_index
+        )
+        nav = nav_builder.get_nav_data(self.snapshot, module)
         return {
             "canonical_url": self.request.build_absolute_uri(canonical_url_path),
             "klass_list": klass_list,
@@ -180,9 +214,10 @@ class DjangoClassListItem:
     url: str
 
 
-class VersionDetailView(TemplateView):
+class VersionDetailView(VersionPageCacheMixin, TemplateView):
     template_name = "cbv/version_detail.html"
 
+    @timed("context")
     def get_context_data(self, **kwargs):
         qs = ProjectVersion.objects.filter(version_number=kwargs["version"])
         try:
@@ -191,75 +226,201 @@ class VersionDetailView(TemplateView):
             raise http.Http404
 
         nav_builder = NavBuilder()
-        version_switcher = nav_builder.make_version_switcher(project_version)
-        nav = nav_builder.get_nav_data(project_version)
+        version_switcher = nav_builder.make_version_switcher(
+            project_version, version_index=self.version_index
+        )
+        snapshot = get_snapshot(project_version)
+        nav = nav_builder.get_nav_data(snapshot)
         return {
             "nav": nav,
             "object_list": [
                 DjangoClassListItem(
                     docstring=class_.docstring,
-                    is_secondary=class_.is_secondary(),
+                    is_secondary=class_.is_secondary,
                     name=class_.name,
                     module_long_name=class_.module.long_name,
                     module_name=class_.module.name,
                     module_short_name=class_.module.short_name,
-                    url=class_.get_absolute_url(),
+                    url=class_.url,
                 )
-                for class_ in Klass.objects.filter(
-                    module__project_version=project_version
-                ).select_related("module__project_version")
+                for class_ in snapshot.klasses
             ],
             "project": f"Django {project_version.version_number}",
             "version_switcher": version_switcher,
         }
 
 
-class HomeView(TemplateView):
+class HomeView(VersionPageCacheMixin, TemplateView):
     template_name = "home.html"
+    is_pinned = False
 
+    @timed("context")
     def get_context_data(self, **kwargs):
         project_version = ProjectVersion.objects.get_latest()
         nav_builder = NavBuilder()
-        version_switcher = nav_builder.make_version_switcher(project_version)
-        nav = nav_builder.get_nav_data(project_version)
+        version_switcher = nav_builder.make_version_switcher(
+            project_version, version_index=self.version_index
+        )
+        snapshot = get_snapshot(project_version)
+        nav = nav_builder.get_nav_data(snapshot)
         return {
             "nav": nav,
             "object_list": [
                 DjangoClassListItem(
                     docstring=class_.docstring,
-                    is_secondary=class_.is_secondary(),
+                    is_secondary=class_.is_secondary,
                     name=class_.name,
                     module_long_name=class_.module.long_name,
                     module_name=class_.module.name,
                     module_short_name=class_.module.short_name,
-                    url=class_.get_absolute_url(),
+                    url=class_.url,
                 )
-                for class_ in Klass.objects.filter(
-                    module__project_version=project_version
-                ).select_related("module__project_version")
+                for class_ in snapshot.klasses
             ],
             "project": f"Django {project_version.version_number}",
             "version_switcher": version_switcher,
         }
 
 
-class Sitemap(TemplateView):
-    content_type = "application/xml"
-    template_name = "sitemap.xml"
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
 
-    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
-        latest_version = ProjectVersion.objects.get_latest()
-        klasses = Klass.objects.select_related("module__project_version").order_by(
-            "-module__project_version__sortable_version_number",
-            "module__name",
-            "name",
+
+@method_decorator(cache_control(public=True, max_age=LATEST_MAX_AGE), name="dispatch")
+class Sitemap(View):
+    """
+    The sitemap index, which points to the sitemap of each version.
+
+    Each version's sitemap is listed as modified when its fingerprint last
+    changed, so crawlers only fetch the sitemaps of versions that have changed.
+    """
+
+    def get(self, request: http.HttpRequest) -> http.HttpResponse:
+        versions = ProjectVersion.objects.order_by(
+            "-sortable_version_number"
+        ).values_list("version_number", "last_modified")
+        content = [XML_DECLARATION, f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n']
+        for version_number, last_modified in versions:
+            url = reverse("version-sitemap", kwargs={"version": version_number})
+            content.append(
+                sitemap_entry("sitemap", location=url, last_modified=last_modified)
+            )
+        content.append("</sitemapindex>\n")
+        return http.HttpResponse(content, content_type="application/xml")
+
+
+@method_decorator(cache_control(public=True, max_age=LATEST_MAX_AGE), name="dispatch")
+class VersionSitemap(View):
+    """
+    The sitemap of a version's class pages, which also lists the home page for
+    the latest version.
+
+    It is streamed as the classes are read from the database, so it never needs
+    to be held in memory all at once.
+    """
+
+    def get(self, request: http.HttpRequest, *, version: str) -> http.HttpResponseBase:
+        versions = dict(
+            ProjectVersion.objects.order_by("-sortable_version_number").values_list(
+                "version_number", "last_modified"
+            )
         )
+        if version not in versions:
+            raise http.Http404
+        last_modified = versions[version]
+
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, last_modified=timestamp)
+        if response is None:
+            response = http.StreamingHttpResponse(
+                generate_version_sitemap(
+                    version,
+                    is_latest=version == next(iter(versions)),
+                    last_modified=last_modified,
+                ),
+                content_type="application/xml",
+            )
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+def generate_version_sitemap(
+    version_number: str, *, is_latest: bool, last_modified: datetime.datetime | None
+) -> Iterator[str]:
+    yield XML_DECLARATION
+    yield f'<urlset xmlns="{SITEMAP_NAMESPACE}">\n'
+    if is_latest:
+        yield sitemap_entry("url", location=reverse("home"), priority="1.0")
+
+    priority = "0.9" if is_latest else "0.5"
+    klasses = (
+        Klass.objects.filter(module__project_version__version_number=version_number)
+        .order_by("module__name", "name")
+        .values_list("module__name", "name")
+    )
+    for module_name, rows in groupby(klasses.iterator(), key=itemgetter(0)):
+        # A class's URL is its module's with its name added, so there's no need
+        # to reverse the URL of every class.
+        module_url = reverse(
+            "module-detail", kwargs={"version": version_number, "module": module_name}
+        )
+        yield "".join(
+            sitemap_entry(
+                "url",
+                location=f"{module_url}{name}/",
+                last_modified=last_modified,
+                priority=priority,
+            )
+            for _, name in rows
+        )
+    yield "</urlset>\n"
+
+
+def sitemap_entry(
+    tag: str,
+    *,
+    location: str,
+    last_modified: datetime.datetime | None = None,
+    priority: str | None = None,
+) -> str:
+    entry = f"<{tag}><loc>{escape(location)}</loc>"
+    if last_modified is not None:
+        entry += f"<lastmod>{last_modified.date().isoformat()}</lastmod>"
+    if priority is not None:
+        entry += f"<priority>{priority}</priority>"
+    return f"{entry}</{tag}>\n"
+
+
+@method_decorator(cache_control(public=True, max_age=LATEST_MAX_AGE), name="dispatch")
+class SearchView(View):
+    """
+    Search the classes of a version, as JSON.
+
+    The query is given as `q`, and the version as `version`, which defaults to
+    the latest. See `cbv.search` for how results are found.
+    """
 
-        urls = [{"location": reverse("home"), "priority": 1.0}]
-        for klass in klasses:
-            priority = 0.9 if klass.module.project_version == latest_version else 0.5
-            urls.append({"location": klass.get_absolute_url(), "priority": priority})
-        return {"urlset": urls}
+    def get(self, request: http.HttpRequest) -> http.JsonResponse:
+        # Newest first.
+        versions = ProjectVersion.objects.values_list("version_number", flat=True)
+        version_number = request.GET.get("version")
+        if version_number is None:
+            version_number = versions.first()
+        elif not versions.filter(version_number=version_number).exists():
+            version_number = None
+        if version_number is None:
+            raise http.Http404
+
+        query = request.GET.get("q", "")[:200]
+        results = search(query, version_number)
+        return http.JsonResponse(
+            {
+                "query": query,
+                "version": version_number,
+                "results": [attrs.asdict(result) for result in results],
+            }
+        )
 
 
 class BasicHealthcheck(View):
@@ -272,3 +433,18 @@ class BasicHealthcheck(View):
 
     def get(self, request: http.HttpRequest) -> http.HttpResponse:
         return http.HttpResponse()
+
+
+@method_decorator(never_cache, name="dispatch")
+class Metrics(View):
+    """
+    Metrics about the requests this worker has handled, for Prometheus to scrape.
+
+    See `cbv.metrics` for what is measured. This isn't served unless
+    `CBV_METRICS` is on.
+    """
+
+    def get(self, request: http.HttpRequest) -> http.HttpResponse:
+        if not settings.CBV_METRICS:
+            raise http.Http404
+        return http.HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -20,7 +20,6 @@ INSTALLED_APPS = [
     "cbv",
     # Third Party Apps
     "django_extensions",
-    "django_pygmy",
     "sans_db",
     # Django
     "django.contrib.auth",
@@ -29,6 +28,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that it times everything else.
+    "cbv.timing.ServerTimingMiddleware",
+    "cbv.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -47,6 +49,8 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 
 DATABASES = {"default": env.dj_db_url("DATABASE_URL", default="sqlite:///ccbv.sqlite")}
+CACHES = {"default": env.dj_cache_url("CACHE_URL", default="locmem://")}
+
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
 LANGUAGE_CODE = "en"
@@ -63,6 +67,22 @@ STORAGES = {
     },
 }
 
+# Whether to record the metrics served at /-/metrics/. They aren't behind any
+# authentication, so only turn this on where that URL can't be reached publicly.
+CBV_METRICS = env.bool("METRICS", default=False)
+
+# The fraction of requests to time, and report in a Server-Timing header.
+CBV_SERVER_TIMING_SAMPLE_RATE = env.float("SERVER_TIMING_SAMPLE_RATE", default=0.0)
+# Whether to log the timings of those requests too.
+CBV_SERVER_TIMING_LOG = env.bool("SERVER_TIMING_LOG", default=False)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"cbv.timing": {"handlers": ["console"], "level": "INFO"}},
+}
+
 CBV_SOURCES = {
     "django.views.generic": "Generic",
     "django.contrib.formtools.wizard.views": "Wizard",
@@ -3,15 +3,25 @@ from django.conf.urls.static import static
 from django.urls import include, path
 from django.views.generic import TemplateView
 
-from cbv.views import BasicHealthcheck, HomeView, Sitemap
+from cbv.views import (
+    BasicHealthcheck,
+    HomeView,
+    Metrics,
+    SearchView,
+    Sitemap,
+    VersionSitemap,
+)
 
 
 urlpatterns = [
     path("", HomeView.as_view(), name="home"),
     path("projects/", include("cbv.urls")),
     path("sitemap.xml", Sitemap.as_view(), name="sitemap"),
+    path("sitemap-<str:version>.xml", VersionSitemap.as_view(), name="version-sitemap"),
+    path("search/", SearchView.as_view(), name="search"),
     path("", include("cbv.shortcut_urls")),
     path("-/basic/", BasicHealthcheck.as_view()),
+    path("-/metrics/", Metrics.as_view(), name="metrics"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 
@@ -0,0 +1,31 @@
+from collections.abc import Iterator
+
+import pytest
+from django.core.cache import cache
+
+from cbv.metrics import clear_metrics
+from cbv.snapshots import clear_snapshots
+
+
+@pytest.fixture(autouse=True)
+def _clear_snapshots() -> Iterator[None]:
+    """Stop version snapshots built in one test from leaking into another."""
+    clear_snapshots()
+    yield
+    clear_snapshots()
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache() -> Iterator[None]:
+    """Stop cached fragments rendered in one test from leaking into another."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_metrics() -> Iterator[None]:
+    """Stop requests made in one test from being counted in another."""
+    clear_metrics()
+    yield
+    clear_metrics()
@@ -1,6 +1,13 @@
 import factory
 
-from cbv.models import Inheritance, Klass, Module, ProjectVersion
+from cbv.models import (
+    Inheritance,
+    Klass,
+    KlassAttribute,
+    Method,
+    Module,
+    ProjectVersion,
+)
 
 
 class ProjectVersionFactory(factory.django.DjangoModelFactory):
@@ -15,7 +22,7 @@ class ModuleFactory(factory.django.DjangoModelFactory):
         model = Module
 
     project_version = factory.SubFactory(ProjectVersionFactory)
-    name = factory.Sequence(lambda n: f"module{n}")
+    name = factory.Sequence(lambda n: f"django.views.generic.module{n}")
 
 
 class KlassFactory(factory.django.DjangoModelFactory):
@@ -35,3 +42,28 @@ class InheritanceFactory(factory.django.DjangoModelFactory):
     parent = factory.SubFactory(KlassFactory)
     child = factory.SubFactory(KlassFactory)
     order = 1
+
+
+class KlassMemberFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        abstract = True
+
+    klass = factory.SubFactory(KlassFactory)
+    line_number = 1
+
+
+class KlassAttributeFactory(KlassMemberFactory):
+    class Meta:
+        model = KlassAttribute
+
+    name = "attribute"
+    value = "None"
+
+
+class MethodFactory(KlassMemberFactory):
+    class Meta:
+        model = Method
+
+    name = "method"
+    code = "def method(self):\n    pass\n"
+    kwargs = "self"
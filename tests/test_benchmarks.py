@@ -0,0 +1,102 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+from pytest_django.fixtures import SettingsWrapper
+
+from cbv.benchmarks import compare_results, measure_page
+from cbv.importer.storages import rebuild_derived_data
+
+from .factories import KlassFactory
+
+
+@pytest.mark.django_db
+class TestBenchmarks:
+    url = "/projects/Django/42.0/django.views.generic.edit/FormView/"
+
+    @pytest.fixture(autouse=True)
+    def _version(self, settings: SettingsWrapper) -> None:
+        # Let the pages be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        klass = KlassFactory.create(
+            name="FormView",
+            module__name="django.views.generic.edit",
+            module__project_version__version_number="42.0",
+        )
+        rebuild_derived_data([klass.module.project_version_id])
+
+    def test_measure_page(self) -> None:
+        client = Client()
+
+        cold = measure_page(client, self.url, cold=True)
+        warm = measure_page(client, self.url, cold=False)
+
+        # The page was rendered both times, rather than served from the cache.
+        assert cold.render_seconds > 0
+        assert warm.render_seconds > 0
+        # Only the cold request had to build the snapshots.
+        assert warm.queries < cold.queries
+        assert cold.peak_memory > 0
+
+    def test_command(self, tmp_path: Path) -> None:
+        output = tmp_path / "results.json"
+
+        call_command("cbv_benchmark", "--repeat=1", "--no-imports", "-o", output)
+
+        results = json.loads(output.read_text())
+        assert results["version"] == "42.0"
+        assert "imports" not in results
+        assert results["pages"]["klass"]["path"] == self.url
+        assert set(results["pages"]) == {
+            "home",
+            "version",
+            "module",
+            "klass",
+            "sitemap",
+            "version_sitemap",
+        }
+
+    def test_compare(self, tmp_path: Path) -> None:
+        old = tmp_path / "old.json"
+        call_command("cbv_benchmark", "--repeat=1", "--no-imports", "-o", old)
+        stderr = StringIO()
+
+        call_command(
+            "cbv_benchmark",
+            "--repeat=1",
+            "--no-imports",
+            "--compare",
+            old,
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+
+        assert "klass warm queries: 2 -> 2 (+0.0%)\n" in stderr.getvalue()
+
+
+def test_compare_results() -> None:
+    old = {
+        "pages": {"home": {"warm": {"seconds": 0.5, "queries": 2}}},
+        "imports": {"store": {"seconds": 2.0}},
+    }
+    new = {
+        "pages": {
+            "home": {"warm": {"seconds": 0.25, "queries": 3}},
+            "klass": {"warm": {"seconds": 1.0}},
+        },
+        "imports": {"store": {"seconds": 3.0}},
+    }
+
+    assert compare_results(old, new) == [
+        "home warm seconds: 0.5000 -> 0.2500 (-50.0%)",
+        "home warm queries: 2 -> 3 (+50.0%)",
+        "store seconds: 2.0000 -> 3.0000 (+50.0%)",
+    ]
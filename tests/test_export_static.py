@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+from pytest_django.fixtures import SettingsWrapper
+
+from cbv.importer.storages import rebuild_derived_data
+from cbv.management.commands.cbv_export_static import get_redirects, render_pages
+from cbv.snapshots import get_version_index
+
+from .factories import KlassFactory
+
+
+@pytest.fixture(autouse=True)
+def _plain_static_files(settings: SettingsWrapper) -> None:
+    # Let the pages be rendered without running collectstatic first.
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+
+
+@pytest.mark.django_db
+class TestRenderPages:
+    url = "/projects/Django/42.0/django.views.generic.edit/FormView/"
+
+    @pytest.fixture(autouse=True)
+    def _klass(self) -> None:
+        project_version = KlassFactory.create(
+            name="FormView",
+            module__name="django.views.generic.edit",
+            module__project_version__version_number="42.0",
+        ).module.project_version
+        rebuild_derived_data([project_version.pk])
+
+    def test_written(self, tmp_path: Path) -> None:
+
+        _, written = render_pages(
+            [self.url], tmp_path, "https://ccbv.co.uk", {self.url: ""}
+        )
+
+        assert written == 1
+        path = tmp_path / self.url.lstrip("/") / "index.html"
+        assert b'href="https://ccbv.co.uk/projects/' in path.read_bytes()
+        assert path.with_name("index.html.gz").exists()
+
+    def test_unchanged_not_written(self, tmp_path: Path) -> None:
+        hashes, _ = render_pages(
+            [self.url], tmp_path, "https://ccbv.co.uk", {self.url: ""}
+        )
+
+        _, written = render_pages([self.url], tmp_path, "https://ccbv.co.uk", hashes)
+
+        assert written == 0
+
+
+@pytest.mark.django_db
+def test_get_redirects() -> None:
+    KlassFactory.create(
+        name="FormView",
+        module__name="django.views.generic.edit",
+        module__project_version__version_number="41.0",
+    )
+    KlassFactory.create(
+        name="FormView",
+        module__name="django.views.generic.edit",
+        module__project_version__version_number="42.0",
+    )
+
+    redirects = get_redirects(get_version_index())
+
+    assert redirects == [
+        ("/projects/", "/"),
+        ("/projects/Django/", "/projects/Django/42.0/"),
+        ("/projects/Django/latest/", "/projects/Django/42.0/"),
+        ("/projects/Django/latest/*", "/projects/Django/42.0/:splat"),
+        ("/FormView/", "/projects/Django/42.0/django.views.generic.edit/FormView/"),
+    ]
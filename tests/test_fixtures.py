@@ -0,0 +1,275 @@
+import gzip
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core import serializers
+from django.core.management import CommandError, call_command
+from pytest_django import DjangoAssertNumQueries
+
+from cbv import models
+from cbv.importer.fixtures import (
+    FixtureError,
+    dump_version,
+    get_fixture_hash,
+    get_version_querysets,
+    load_version,
+    read_fixture,
+)
+from cbv.importer.storages import rebuild_derived_data, update_fingerprint
+
+from .factories import (
+    InheritanceFactory,
+    KlassAttributeFactory,
+    KlassFactory,
+    MethodFactory,
+    ModuleFactory,
+    ProjectVersionFactory,
+)
+
+
+def serialize_version(version_number: str) -> list[dict[str, object]]:
+    """Get a version's rows as loaddata would see them, without primary keys."""
+    objects = serializers.serialize(
+        "python",
+        [
+            obj
+            for queryset in get_version_querysets(version_number).values()
+            for obj in queryset
+        ],
+        use_natural_primary_keys=True,
+        use_natural_foreign_keys=True,
+    )
+    for obj in objects:
+        obj.pop("pk", None)
+        # These are set when a version is loaded. The fingerprint is kept, as it
+        # is only the same if everything else is.
+        obj["fields"].pop("fixture_hash", None)
+        obj["fields"].pop("last_modified", None)
+    return objects
+
+
+@pytest.mark.django_db
+class TestPackedFixtures:
+    @pytest.fixture(autouse=True)
+    def _version(self) -> None:
+        project_version = ProjectVersionFactory.create(version_number="4.2")
+        parent = KlassFactory.create(
+            name="View",
+            module__name="django.views.generic.base",
+            module__project_version=project_version,
+            docs_url="https://docs.djangoproject.com/",
+        )
+        child = KlassFactory.create(
+            name="TemplateView", module=parent.module, docstring="Render a template."
+        )
+        InheritanceFactory.create(parent=parent, child=child, order=0)
+        KlassAttributeFactory.create(klass=child, name="template_name")
+        MethodFactory.create(klass=parent, name="dispatch")
+        MethodFactory.create(klass=child, name="get")
+        # Another version, which should be left alone.
+        KlassFactory.create(module__project_version__version_number="5.0")
+        rebuild_derived_data(models.ProjectVersion.objects.values_list("pk", flat=True))
+
+    def test_round_trip(self) -> None:
+        expected = serialize_version("4.2")
+        project_version = models.ProjectVersion.objects.get(version_number="4.2")
+        packed = dump_version("4.2")
+
+        loaded = load_version(packed)
+
+        assert serialize_version("4.2") == expected
+        assert loaded.pk != project_version.pk
+        assert loaded.fingerprint == project_version.fingerprint
+        # The version was replaced, along with everything in it.
+        assert not models.Klass.objects.filter(
+            module__project_version=project_version.pk
+        ).exists()
+        assert models.Ancestry.objects.filter(
+            child__module__project_version=loaded
+        ).exists()
+        assert models.ProjectVersion.objects.count() == 2
+
+    def test_reproducible(self) -> None:
+        packed = dump_version("4.2")
+
+        load_version(packed)
+
+        assert dump_version("4.2") == packed
+
+    def test_unknown_version(self) -> None:
+        with pytest.raises(FixtureError):
+            dump_version("1.0")
+
+    def test_derived_fields(self) -> None:
+        tables = json.loads(gzip.decompress(dump_version("4.2")))["tables"]
+
+        assert tables["cbv.projectversion"] == {
+            "version_number": ["4.2"],
+            "sortable_version_number": ["0402"],
+        }
+
+    def test_pack_json(self, tmp_path: Path) -> None:
+        expected = serialize_version("4.2")
+        fixture = tmp_path / "4.2.json"
+        call_command("cbv_dumpversion", "4.2", "-o", fixture)
+
+        load_version(read_fixture(fixture))
+
+        assert serialize_version("4.2") == expected
+
+    def test_pack_json_missing_row(self, tmp_path: Path) -> None:
+        fixture = tmp_path / "4.2.json"
+        call_command("cbv_dumpversion", "4.2", "-o", fixture)
+        objects = json.loads(fixture.read_text())
+        fixture.write_text(
+            json.dumps([obj for obj in objects if obj["model"] != "cbv.module"])
+        )
+
+        with pytest.raises(FixtureError, match=r"cbv\.klass\.module"):
+            read_fixture(fixture)
+
+    def test_not_a_fixture(self) -> None:
+        with pytest.raises(FixtureError):
+            load_version(b"[]")
+
+    def test_unsupported_format(self) -> None:
+        with pytest.raises(FixtureError):
+            load_version(gzip.compress(b'{"format": 0}'))
+
+    def test_missing_column(self) -> None:
+        fixture = json.loads(gzip.decompress(dump_version("4.2")))
+        del fixture["tables"]["cbv.method"]["code"]
+
+        with pytest.raises(FixtureError, match=r"cbv\.method\.code"):
+            load_version(gzip.compress(json.dumps(fixture).encode()))
+
+        # Nothing was loaded, and the version was left as it was.
+        assert models.Method.objects.filter(
+            klass__module__project_version__version_number="4.2"
+        ).exists()
+
+    def test_foreign_key_out_of_range(self) -> None:
+        fixture = json.loads(gzip.decompress(dump_version("4.2")))
+        fixture["tables"]["cbv.klass"]["module_id"][0] = 1
+
+        with pytest.raises(FixtureError, match=r"cbv\.klass\.module_id"):
+            load_version(gzip.compress(json.dumps(fixture).encode()))
+
+    def test_truncated_column(self) -> None:
+        fixture = json.loads(gzip.decompress(dump_version("4.2")))
+        fixture["tables"]["cbv.klass"]["name"].pop()
+
+        with pytest.raises(FixtureError, match=r"cbv\.klass"):
+            load_version(gzip.compress(json.dumps(fixture).encode()))
+
+    def test_loadversion_error(self, tmp_path: Path) -> None:
+        fixture = json.loads(gzip.decompress(dump_version("4.2")))
+        del fixture["tables"]["cbv.klass"]
+        path = tmp_path / "4.2.cbv.gz"
+        path.write_bytes(gzip.compress(json.dumps(fixture).encode()))
+
+        with pytest.raises(CommandError, match=r"Missing column cbv\.klass"):
+            call_command("cbv_loadversion", path)
+
+
+@pytest.mark.django_db
+class TestDumpVersion:
+    @pytest.fixture(autouse=True)
+    def _version(self) -> None:
+        project_version = ProjectVersionFactory.create(version_number="4.2")
+        module = ModuleFactory.create(
+            name="django.views.generic.base", project_version=project_version
+        )
+        for name in ["View", "RedirectView", "TemplateView"]:
+            klass = KlassFactory.create(name=name, module=module)
+            KlassAttributeFactory.create(klass=klass, name="template_name")
+            MethodFactory.create(klass=klass, name="get")
+        rebuild_derived_data([project_version.pk])
+
+    def dump(self) -> str:
+        stdout = StringIO()
+        call_command("cbv_dumpversion", "4.2", stdout=stdout)
+        return stdout.getvalue()
+
+    def test_queries(self, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+        """The foreign keys' natural keys are selected with the rows."""
+        with django_assert_num_queries(6):
+            self.dump()
+
+    def test_derived_fields(self) -> None:
+        [project_version, *_] = json.loads(self.dump())
+
+        assert project_version == {
+            "model": "cbv.projectversion",
+            "fields": {"version_number": "4.2", "sortable_version_number": "0402"},
+        }
+
+    def test_output_file(self, tmp_path: Path) -> None:
+        """Writing to stdout gives exactly what's written to a file."""
+        fixture = tmp_path / "4.2.json"
+
+        call_command("cbv_dumpversion", "4.2", "-o", fixture)
+
+        assert self.dump() == fixture.read_text()
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        output = self.dump()
+        fixture = tmp_path / "4.2.json"
+        fixture.write_text(output)
+        models.ProjectVersion.objects.all().delete()
+
+        call_command("loaddata", fixture, verbosity=0)
+
+        # Loading again doesn't change the fingerprint or any other field, so
+        # the dump is the same.
+        assert self.dump() == output
+
+
+@pytest.mark.django_db
+class TestLoadAllDjangoVersions:
+    @pytest.fixture(autouse=True)
+    def _fixtures_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        project_version = KlassFactory.create(
+            module__project_version__version_number="4.2"
+        ).module.project_version
+        rebuild_derived_data([project_version.pk])
+        fixtures_dir = tmp_path / "cbv" / "fixtures"
+        fixtures_dir.mkdir(parents=True)
+        call_command("cbv_dumpversion", "4.2", "-o", fixtures_dir / "4.2.json")
+        project_version.delete()
+        monkeypatch.chdir(tmp_path)
+
+    def load(self) -> str:
+        stdout = StringIO()
+        call_command("load_all_django_versions", stdout=stdout)
+        return stdout.getvalue()
+
+    def test_load(self) -> None:
+        output = self.load()
+
+        assert output.startswith("Loaded cbv/fixtures/4.2.json in ")
+        project_version = models.ProjectVersion.objects.get()
+        assert project_version.fixture_hash == get_fixture_hash(
+            read_fixture(Path("cbv/fixtures/4.2.json"))
+        )
+
+    def test_skip_loaded(self) -> None:
+        self.load()
+
+        output = self.load()
+
+        assert output == "Skipping cbv/fixtures/4.2.json, which is already loaded\n"
+
+    def test_reload_changed(self) -> None:
+        """A version which has changed since it was loaded is loaded again."""
+        self.load()
+        project_version = models.ProjectVersion.objects.get()
+        models.Klass.objects.update(docstring="Changed.")
+        update_fingerprint(project_version.pk)
+
+        output = self.load()
+
+        assert output.startswith("Loaded cbv/fixtures/4.2.json in ")
+        assert models.Klass.objects.get().docstring == ""
@@ -0,0 +1,46 @@
+import pytest
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import PythonLexer
+
+from cbv.highlighting import highlight_code, with_line_numbers
+from cbv.importer.storages import create_highlighted_code
+from cbv.models import HighlightedCode, Method
+
+from .factories import MethodFactory
+
+
+@pytest.mark.parametrize(
+    "line_number",
+    [
+        pytest.param(42, id="same-width"),
+        pytest.param(97, id="padded"),
+    ],
+)
+def test_with_line_numbers(line_number: int) -> None:
+    code = 'def method(self):\n    """<docstring>"""\n    a = 1\n    return a\n'
+
+    assert with_line_numbers(highlight_code(code), line_number) == highlight(
+        code,
+        PythonLexer(stripall=True),
+        HtmlFormatter(linenos=True, linenostart=line_number),
+    )
+
+
+@pytest.mark.django_db
+class TestCreateHighlightedCode:
+    def test_shared_between_versions(self) -> None:
+        MethodFactory.create(code="def a(self):\n    pass\n")
+        MethodFactory.create(code="def a(self):\n    pass\n")
+        MethodFactory.create(code="def b(self):\n    pass\n")
+
+        assert create_highlighted_code(Method.objects.all()) == 2
+        assert HighlightedCode.objects.count() == 2
+
+    def test_only_highlights_new_code(self) -> None:
+        MethodFactory.create(code="def a(self):\n    pass\n")
+        create_highlighted_code(Method.objects.all())
+        MethodFactory.create(code="def b(self):\n    pass\n")
+
+        assert create_highlighted_code(Method.objects.all()) == 1
+        assert HighlightedCode.objects.count() == 2
@@ -0,0 +1,305 @@
+import importlib
+import inspect
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from cbv.importer.dataclasses import (
+    CodeElement,
+    Klass,
+    KlassAttribute,
+    Method,
+    Module,
+)
+from cbv.importer.importers import ASTCodeImporter, InspectCodeImporter, SourceCache
+
+
+def write_source(root: Path, files: dict[str, str]) -> None:
+    for name, source in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+
+
+class TestASTCodeImporter:
+    def test_import(self, tmp_path: Path) -> None:
+        write_source(
+            tmp_path,
+            {
+                "project/__init__.py": "",
+                "project/translation.py": """\
+                    def gettext(message):
+                        return message
+
+                    gettext_lazy = lazy(gettext, str)
+                """,
+                "project/views/__init__.py": """\
+                    \"\"\"The views.\"\"\"
+                    from .base import View
+                """,
+                "project/views/base.py": """\
+                    from project.translation import gettext_lazy as _
+
+
+                    class Error(Exception):
+                        pass
+
+
+                    class Form:
+                        pass
+
+
+                    class View:
+                        \"\"\"A view.\"\"\"
+
+                        form_class = Form
+                        names = ["get", "post"]
+                        title = _("Title")
+
+                        @property
+                        def size(self):
+                            return 1
+
+                        def get(self, request, *args, **kwargs):
+                            \"\"\"Handle GET.\"\"\"
+                            return 1
+
+
+                    class DetailView(View):
+                        title = "Detail"
+
+                        @decorate
+                        def get(self, request, *, pk=None):
+                            return 2
+                """,
+            },
+        )
+        importer = ASTCodeImporter(source_root=tmp_path, module_paths=["project.views"])
+
+        assert list(importer.generate_code_data()) == [
+            Module(
+                name="project.views",
+                docstring="The views.",
+                filename="/project/views/__init__.py",
+            ),
+            Module(
+                name="project.views.base",
+                docstring="",
+                filename="/project/views/base.py",
+            ),
+            Klass(
+                name="DetailView",
+                module="project.views.base",
+                docstring="A view.",
+                line_number=28,
+                path="project.views.base.DetailView",
+                bases=["project.views.base.View"],
+                best_import_path="project.views.base",
+            ),
+            KlassAttribute(
+                name="form_class",
+                value="<class 'project.views.base.Form'>",
+                line_number=8,
+                klass_path="project.views.base.DetailView",
+            ),
+            Method(
+                name="get",
+                code="@decorate\ndef get(self, request, *, pk=None):\n    return 2\n",
+                docstring="",
+                kwargs="self, request, *, pk=None",
+                line_number=31,
+                klass_path="project.views.base.DetailView",
+            ),
+            KlassAttribute(
+                name="names",
+                value="['get', 'post']",
+                line_number=-1,
+                klass_path="project.views.base.DetailView",
+            ),
+            KlassAttribute(
+                name="size",
+                value="<property object>",
+                line_number=-1,
+                klass_path="project.views.base.DetailView",
+            ),
+            KlassAttribute(
+                name="title",
+                value="'Detail'",
+                line_number=-1,
+                klass_path="project.views.base.DetailView",
+            ),
+            Klass(
+                name="Form",
+                module="project.views.base",
+                docstring="",
+                line_number=8,
+                path="project.views.base.Form",
+                bases=["builtins.object"],
+                best_import_path="project.views.base",
+            ),
+            Klass(
+                name="View",
+                module="project.views.base",
+                docstring="A view.",
+                line_number=12,
+                path="project.views.base.View",
+                bases=["builtins.object"],
+                best_import_path="project.views",
+            ),
+            KlassAttribute(
+                name="form_class",
+                value="<class 'project.views.base.Form'>",
+                line_number=8,
+                klass_path="project.views.base.View",
+            ),
+            Method(
+                name="get",
+                code='def get(self, request, *args, **kwargs):\n    """Handle GET."""\n    return 1\n',
+                docstring="Handle GET.",
+                kwargs="self, request, *args, **kwargs",
+                line_number=23,
+                klass_path="project.views.base.View",
+            ),
+            KlassAttribute(
+                name="names",
+                value="['get', 'post']",
+                line_number=-1,
+                klass_path="project.views.base.View",
+            ),
+            KlassAttribute(
+                name="size",
+                value="<property object>",
+                line_number=-1,
+                klass_path="project.views.base.View",
+            ),
+            KlassAttribute(
+                name="title",
+                value="gettext_lazy('Title')",
+                line_number=-1,
+                klass_path="project.views.base.View",
+            ),
+        ]
+
+    def test_matches_inspect(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        write_source(
+            tmp_path,
+            {
+                "compared_views.py": """\
+                    from django.utils.functional import classproperty
+
+
+                    class View:
+                        @classproperty
+                        def is_async(cls):
+                            return False
+
+                        def get(self):
+                            return 1
+                            # Still part of get.
+
+                        # Not part of get.
+
+                        def post(self): pass
+                        # Not part of post either.
+                """,
+            },
+        )
+        monkeypatch.syspath_prepend(tmp_path)
+        ast_elements = list(
+            ASTCodeImporter(
+                source_root=tmp_path, module_paths=["compared_views"]
+            ).generate_code_data()
+        )
+        inspect_elements = list(
+            InspectCodeImporter(module_paths=["compared_views"]).generate_code_data()
+        )
+
+        def get_methods(elements: list[CodeElement]) -> list[Method]:
+            return [element for element in elements if isinstance(element, Method)]
+
+        assert get_methods(ast_elements) == get_methods(inspect_elements)
+        assert "    # Still part of get.\n" in get_methods(ast_elements)[0].code
+        # inspect gets the value the class property's getter returns, which the
+        # AST importer can't, so it leaves it out rather than show the property.
+        assert (
+            KlassAttribute(
+                name="is_async",
+                value="False",
+                line_number=-1,
+                klass_path="compared_views.View",
+            )
+            in inspect_elements
+        )
+        assert not any(isinstance(element, KlassAttribute) for element in ast_elements)
+
+    def test_missing_module(self, tmp_path: Path) -> None:
+        importer = ASTCodeImporter(source_root=tmp_path, module_paths=["missing"])
+
+        assert list(importer.generate_code_data()) == []
+
+
+class TestSourceCache:
+    def test_matches_inspect(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        write_source(
+            tmp_path,
+            {
+                "cached_source.py": """\
+                    import functools
+
+
+                    def decorate(func):
+                        @functools.wraps(func)
+                        def wrapper(*args, **kwargs):
+                            return func(*args, **kwargs)
+
+                        return wrapper
+
+
+                    class View:
+                        class Meta:
+                            ordering = [
+                                "name",
+                            ]
+
+                        @decorate
+                        def get(self):
+                            return (
+                                1
+                            )
+
+                        async def post(self):
+                            pass
+
+                        # Not part of post.
+
+
+                    def build():
+                        class View:
+                            pass
+
+                        return View
+                """,
+            },
+        )
+        monkeypatch.syspath_prepend(tmp_path)
+        module = importlib.import_module("cached_source")
+        members = [
+            module.View,
+            module.View.Meta,
+            module.View.get,
+            module.View.post,
+            module.build,
+            module.build(),
+            module.decorate,
+        ]
+        source = SourceCache()
+
+        for member in members:
+            assert source.get_source_lines(member) == inspect.getsourcelines(member)
+        assert source.get_source_file(module.View) == inspect.getsourcefile(module.View)
+        assert source.stats.files_read == 1
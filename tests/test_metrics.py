@@ -0,0 +1,107 @@
+import os
+
+import pytest
+from django.test.client import Client
+from pytest_django.fixtures import SettingsWrapper
+
+from cbv.importer.storages import rebuild_derived_data
+from cbv.metrics import Histogram, render_histograms
+
+from .factories import KlassFactory
+
+
+PID = os.getpid()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    url = "/projects/Django/42.0/django.views.generic.edit/FormView/"
+
+    @pytest.fixture(autouse=True)
+    def _version(self, settings: SettingsWrapper) -> None:
+        settings.CBV_METRICS = True
+        # Let the pages be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        klass = KlassFactory.create(
+            name="FormView",
+            module__name="django.views.generic.edit",
+            module__project_version__version_number="42.0",
+        )
+        rebuild_derived_data([klass.module.project_version_id])
+
+    def get_metrics(self, client: Client) -> list[str]:
+        response = client.get("/-/metrics/")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+        return response.content.decode().splitlines()
+
+    def test_requests(self, client: Client) -> None:
+        client.get("/sitemap.xml")
+
+        metrics = self.get_metrics(client)
+
+        labels = f'pid="{PID}",url_name="sitemap"'
+        assert f"cbv_request_duration_seconds_count{{{labels}}} 1" in metrics
+        assert f'cbv_request_queries_bucket{{{labels},le="0"}} 0' in metrics
+        assert f'cbv_request_queries_bucket{{{labels},le="1"}} 1' in metrics
+        assert f"cbv_request_queries_sum{{{labels}}} 1.0" in metrics
+
+    def test_page_cache(self, client: Client) -> None:
+        client.get(self.url)
+        response = client.get(self.url)
+        client.get(self.url, headers={"If-None-Match": response["ETag"]})
+
+        metrics = self.get_metrics(client)
+
+        assert f'cbv_page_cache_requests_total{{pid="{PID}",result="hit"}} 1' in metrics
+        assert (
+            f'cbv_page_cache_requests_total{{pid="{PID}",result="miss"}} 1' in metrics
+        )
+        assert (
+            f'cbv_page_cache_requests_total{{pid="{PID}",result="not_modified"}} 1'
+            in metrics
+        )
+        labels = f'pid="{PID}",url_name="klass-detail"'
+        assert f"cbv_request_duration_seconds_count{{{labels}}} 3" in metrics
+
+    def test_memory(self, client: Client) -> None:
+        metrics = self.get_metrics(client)
+
+        [max_memory] = [
+            line
+            for line in metrics
+            if line.startswith("cbv_worker_max_resident_memory_bytes{")
+        ]
+        assert int(max_memory.split()[-1]) > 0
+
+    def test_disabled(self, client: Client, settings: SettingsWrapper) -> None:
+        settings.CBV_METRICS = False
+
+        response = client.get("/-/metrics/")
+
+        assert response.status_code == 404
+
+
+def test_render_histograms() -> None:
+    histogram = Histogram.with_buckets((0.1, 1.0))
+    for value in [0.05, 0.5, 0.5, 5.0]:
+        histogram.observe(value)
+
+    lines = list(
+        render_histograms("latency", "Latency.", {"home": histogram}, {"pid": "1"})
+    )
+
+    assert lines == [
+        "# HELP latency Latency.",
+        "# TYPE latency histogram",
+        'latency_bucket{pid="1",url_name="home",le="0.1"} 1',
+        'latency_bucket{pid="1",url_name="home",le="1.0"} 3',
+        'latency_bucket{pid="1",url_name="home",le="+Inf"} 4',
+        'latency_sum{pid="1",url_name="home"} 6.05',
+        'latency_count{pid="1",url_name="home"} 4',
+    ]
@@ -1,6 +1,12 @@
 import pytest
 
-from .factories import InheritanceFactory, KlassFactory
+from cbv.importer.storages import create_ancestry
+from cbv.models import Klass
+
+from .factories import (
+    InheritanceFactory,
+    KlassFactory,
+)
 
 
 @pytest.mark.django_db
@@ -23,6 +29,7 @@ class TestKlassAncestorMRO:
         c = KlassFactory.create(name="c")
         InheritanceFactory.create(parent=a, child=b)
         InheritanceFactory.create(parent=b, child=c)
+        create_ancestry(Klass.objects.all())
 
         mro = c.get_all_ancestors()
 
@@ -49,7 +56,75 @@ class TestKlassAncestorMRO:
         InheritanceFactory.create(parent=a, child=c)
         InheritanceFactory.create(parent=b, child=d)
         InheritanceFactory.create(parent=c, child=d, order=2)
+        create_ancestry(Klass.objects.all())
 
         mro = d.get_all_ancestors()
 
         assert mro == [b, c, a]
+
+    def test_is_direct(self) -> None:
+        """
+        Only the classes a Klass directly inherits from are marked as direct.
+
+        A
+        |
+        B
+        |
+        C
+        """
+        a = KlassFactory.create(name="a")
+        b = KlassFactory.create(name="b")
+        c = KlassFactory.create(name="c")
+        InheritanceFactory.create(parent=a, child=b)
+        InheritanceFactory.create(parent=b, child=c)
+        create_ancestry(Klass.objects.all())
+
+        mro = c.get_all_ancestors()
+
+        assert [k.is_direct_ancestor for k in mro] == [True, False]
+
+
+@pytest.mark.django_db
+class TestKlassDescendants:
+    def test_diamond(self) -> None:
+        r"""
+        All descendants are found, however many routes lead to them.
+
+          A
+         / \
+        B   C
+         \ /
+          D
+        """
+        a = KlassFactory.create(name="a")
+        b = KlassFactory.create(name="b")
+        c = KlassFactory.create(name="c")
+        d = KlassFactory.create(name="d")
+        InheritanceFactory.create(parent=a, child=b)
+        InheritanceFactory.create(parent=a, child=c)
+        InheritanceFactory.create(parent=b, child=d)
+        InheritanceFactory.create(parent=c, child=d, order=2)
+        create_ancestry(Klass.objects.all())
+
+        assert list(a.get_all_children()) == [b, c, d]
+        assert list(b.get_all_children()) == [d]
+        assert list(d.get_all_children()) == []
+
+
+@pytest.mark.django_db
+class TestKlassManagerGetLatestForName:
+    def test_case_insensitive(self) -> None:
+        KlassFactory.create(
+            name="FormView", module__project_version__version_number="41.0"
+        )
+        latest = KlassFactory.create(
+            name="FormView", module__project_version__version_number="42.0"
+        )
+
+        assert Klass.objects.get_latest_for_name("formview") == latest
+
+    def test_missing(self) -> None:
+        KlassFactory.create(name="FormView")
+
+        with pytest.raises(Klass.DoesNotExist):
+            Klass.objects.get_latest_for_name("DetailView")
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 from django.test.client import Client
 from django.urls import reverse
@@ -11,17 +12,17 @@ from pytest_django.fixtures import SettingsWrapper
 parameters = [
     (
         "homepage.html",
-        5,
+        2,
         reverse("home"),
     ),
     (
         "version-detail.html",
-        5,
+        2,
         reverse("version-detail", kwargs={"version": "4.0"}),
     ),
     (
         "module-detail.html",
-        7,
+        2,
         reverse(
             "module-detail",
             kwargs={
@@ -32,7 +33,7 @@ parameters = [
     ),
     (
         "klass-detail.html",
-        30,
+        2,
         reverse(
             "klass-detail",
             kwargs={
@@ -44,7 +45,7 @@ parameters = [
     ),
     (
         "klass-detail-old.html",
-        30,
+        2,
         reverse(
             "klass-detail",
             kwargs={
@@ -54,10 +55,24 @@ parameters = [
             },
         ),
     ),
+    # A method's signature is that of its most-derived implementation: here
+    # MultipleObjectMixin.get_context_data, not ContextMixin's.
+    (
+        "klass-detail-namesakes.html",
+        2,
+        reverse(
+            "klass-detail",
+            kwargs={
+                "version": "4.0",
+                "module": "django.views.generic.list",
+                "klass": "ListView",
+            },
+        ),
+    ),
     # Detail pages with wRonGLY CasEd arGuMEnTs
     (
         "fuzzy-module-detail.html",
-        9,
+        2,
         reverse(
             "module-detail",
             kwargs={
@@ -68,7 +83,7 @@ parameters = [
     ),
     (
         "fuzzy-klass-detail.html",
-        30,
+        2,
         reverse(
             "klass-detail",
             kwargs={
@@ -80,7 +95,7 @@ parameters = [
     ),
     (
         "fuzzy-klass-detail-old.html",
-        30,
+        2,
         reverse(
             "klass-detail",
             kwargs={
@@ -102,6 +117,7 @@ parameters = [
         "module-detail.html",
         "klass-detail.html",
         "klass-detail-old.html",
+        "klass-detail-namesakes.html",
         "fuzzy-module-detail.html",
         "fuzzy-klass-detail.html",
         "fuzzy-klass-detail-old.html",
@@ -121,7 +137,8 @@ def test_page_html(
 
     This test is intended to prevent regressions when refactoring views/templates.
     As well as ensuring the HTML hasn't materially changed,
-    we also check the number of queries made when rendering the page.
+    we also check the number of queries made when rendering the page
+    once the version snapshots have been built.
 
     If the reference files legitimately need to change, they can be
     re-generated by temporarily uncommenting the appropriate lines at the
@@ -129,8 +146,7 @@ def test_page_html(
     """
     # Load a couple of versions of Django.
     # It doesn't matter what they are, just that they stay consistent.
-    call_command("loaddata", "3.2.json")
-    call_command("loaddata", "4.0.json")
+    call_command("cbv_loadversion", "cbv/fixtures/3.2.json", "cbv/fixtures/4.0.json")
 
     # We set this so the subsequent call to collecstatic doesn't write to the
     # directory configured in settings.py
@@ -140,6 +156,12 @@ def test_page_html(
     # the path, to match what happens in production
     call_command("collectstatic", "--noinput")
 
+    # Render the page once first, so that the per-version snapshots are already
+    # built, as they will be for almost every request in production.
+    # Then drop the cached page, so that it's rendered again below.
+    client.get(url)
+    cache.clear()
+
     with assertNumQueries(num_queries):
         response = client.get(url)
 
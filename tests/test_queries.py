@@ -0,0 +1,82 @@
+import pytest
+
+from cbv.importer.storages import rebuild_derived_data
+from cbv.queries import NavBuilder
+from cbv.snapshots import get_snapshot
+
+from .factories import KlassFactory, ModuleFactory, ProjectVersionFactory
+
+
+@pytest.mark.django_db
+class TestNavBuilder:
+    def test_active_overlay(self) -> None:
+        module = ModuleFactory.create()
+        other_module = ModuleFactory.create(project_version=module.project_version)
+        KlassFactory.create(module=module, name="A")
+        KlassFactory.create(module=module, name="B")
+        KlassFactory.create(module=other_module, name="C")
+        rebuild_derived_data([module.project_version_id])
+        snapshot = get_snapshot(module.project_version)
+        snapshot_module = snapshot.get_module(module.name)
+        snapshot_klass = snapshot.get_klass(module.name, "B")
+
+        nav = NavBuilder().get_nav_data(snapshot, snapshot_module, snapshot_klass)
+
+        assert [m.active for m in nav.modules] == [True, False]
+        assert [(k.name, k.active) for k in nav.modules[0].classes] == [
+            ("A", False),
+            ("B", True),
+        ]
+
+    def test_inactive_nav_shared(self) -> None:
+        module = ModuleFactory.create()
+        KlassFactory.create(module=module, name="A")
+        rebuild_derived_data([module.project_version_id])
+        snapshot = get_snapshot(module.project_version)
+        snapshot_module = snapshot.get_module(module.name)
+        builder = NavBuilder()
+
+        nav = builder.get_nav_data(snapshot)
+        active_nav = builder.get_nav_data(snapshot, snapshot_module)
+
+        assert builder.get_nav_data(snapshot).modules[0] is nav.modules[0]
+        assert nav.modules[0].active is False
+        assert active_nav.modules[0].active is True
+        assert nav.cache_key != active_nav.cache_key
+
+
+@pytest.mark.django_db
+class TestVersionSwitcher:
+    def test_other_versions_of_klass(self) -> None:
+        old = ProjectVersionFactory.create(version_number="1.0")
+        moved = ProjectVersionFactory.create(version_number="2.0")
+        missing = ProjectVersionFactory.create(version_number="3.0")
+        new = ProjectVersionFactory.create(version_number="4.0")
+        KlassFactory.create(
+            name="View",
+            module__name="django.views.generic.base",
+            module__project_version=old,
+        )
+        KlassFactory.create(
+            name="View",
+            module__name="django.views.generic.moved",
+            module__project_version=moved,
+        )
+        KlassFactory.create(module__project_version=missing)
+        klass = KlassFactory.create(
+            name="View",
+            module__name="django.views.generic.base",
+            module__project_version=new,
+        )
+        rebuild_derived_data([new.pk])
+        snapshot = get_snapshot(new)
+
+        switcher = NavBuilder().make_version_switcher(
+            new, snapshot.get_klass(klass.module.name, klass.name)
+        )
+
+        assert [(v.name, v.url) for v in switcher.other_versions] == [
+            ("3.0", "/projects/Django/3.0/"),
+            ("2.0", "/projects/Django/2.0/django.views.generic.moved/View/"),
+            ("1.0", "/projects/Django/1.0/django.views.generic.base/View/"),
+        ]
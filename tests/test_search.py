@@ -0,0 +1,137 @@
+import pytest
+from django.test.client import Client
+from pytest_django import DjangoAssertNumQueries
+from pytest_django.fixtures import SettingsWrapper
+
+from cbv import models
+from cbv.importer.storages import rebuild_derived_data
+from cbv.search import get_trigrams, search
+
+from .factories import KlassAttributeFactory, KlassFactory, MethodFactory
+
+
+@pytest.fixture
+def _versions() -> None:
+    form_view = KlassFactory.create(
+        name="FormView",
+        docstring="Render a form, and redirect when it is valid.",
+        module__name="django.views.generic.edit",
+        module__project_version__version_number="42.0",
+    )
+    MethodFactory.create(
+        klass=form_view,
+        name="get_context_data",
+        docstring="Insert the form into the context dict.",
+    )
+    KlassAttributeFactory.create(klass=form_view, name="success_url")
+    KlassFactory.create(name="TemplateView", module=form_view.module)
+    KlassFactory.create(
+        name="OldView",
+        module__name="django.views.generic.edit",
+        module__project_version__version_number="41.0",
+    )
+    rebuild_derived_data(models.ProjectVersion.objects.values_list("pk", flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("_versions")
+class TestSearch:
+    def test_exact(self) -> None:
+        [result, *_] = search("FormView", "42.0")
+
+        assert result.kind == "class"
+        assert result.name == "FormView"
+        assert result.url == "/projects/Django/42.0/django.views.generic.edit/FormView/"
+        assert result.score == 1.0
+
+    def test_prefix(self) -> None:
+        [result] = search("get_con", "42.0")
+
+        assert result.kind == "method"
+        assert result.name == "get_context_data"
+        assert result.url.endswith("/FormView/#get_context_data")
+
+    def test_typo(self) -> None:
+        [result] = search("FromView", "42.0")
+
+        assert result.name == "FormView"
+
+    def test_docstrings(self) -> None:
+        results = search("form context", "42.0")
+
+        assert [(result.kind, result.name) for result in results] == [
+            # Both words are in the method's docstring.
+            ("docstring", "get_context_data"),
+            # A class name starting with a word matches better than a docstring
+            # with the word in it.
+            ("class", "FormView"),
+            ("docstring", "FormView"),
+        ]
+
+    def test_members_before_docstrings(self) -> None:
+        results = search("success_url", "42.0")
+
+        assert [(result.kind, result.name) for result in results] == [
+            ("attribute", "success_url"),
+        ]
+
+    def test_version(self) -> None:
+        assert search("OldView", "42.0") == []
+        assert [result.name for result in search("OldView", "41.0")] == ["OldView"]
+
+    def test_queries(self, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+        # Match terms by prefix, and by trigrams, for each word, and then get
+        # what they were found in.
+        with django_assert_num_queries(5):
+            search("form view", "42.0")
+
+    def test_rebuild(self) -> None:
+        counts = (models.SearchTerm.objects.count(), models.SearchEntry.objects.count())
+
+        rebuild_derived_data(models.ProjectVersion.objects.values_list("pk", flat=True))
+
+        assert (
+            models.SearchTerm.objects.count(),
+            models.SearchEntry.objects.count(),
+        ) == counts
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("_versions")
+class TestSearchView:
+    def test_latest(self, client: Client) -> None:
+        response = client.get("/search/", {"q": "formview"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == "42.0"
+        assert data["results"][0] == {
+            "kind": "class",
+            "name": "FormView",
+            "klass_name": "FormView",
+            "module_name": "django.views.generic.edit",
+            "url": "/projects/Django/42.0/django.views.generic.edit/FormView/",
+            "score": 1.0,
+        }
+
+    def test_version(self, client: Client) -> None:
+        response = client.get("/search/", {"q": "oldview", "version": "41.0"})
+
+        assert [result["name"] for result in response.json()["results"]] == ["OldView"]
+
+    def test_unknown_version(self, client: Client, settings: SettingsWrapper) -> None:
+        # Let the 404 page be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+
+        response = client.get("/search/", {"q": "formview", "version": "1.0"})
+
+        assert response.status_code == 404
+
+
+def test_get_trigrams() -> None:
+    assert get_trigrams("view") == {"  v", " vi", "vie", "iew", "ew "}
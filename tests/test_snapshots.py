@@ -0,0 +1,149 @@
+import pytest
+
+from cbv.importer.storages import rebuild_derived_data
+from cbv.models import ProjectVersion
+from cbv.snapshots import get_snapshot
+
+from .factories import (
+    InheritanceFactory,
+    KlassAttributeFactory,
+    KlassFactory,
+    MethodFactory,
+    ModuleFactory,
+)
+
+
+@pytest.mark.django_db
+class TestGetSnapshot:
+    def test_reused(self) -> None:
+        project_version = ModuleFactory.create().project_version
+
+        assert get_snapshot(project_version) is get_snapshot(project_version)
+
+    def test_replaced_when_fingerprint_changes(self) -> None:
+        module = ModuleFactory.create()
+        project_version = module.project_version
+        rebuild_derived_data([project_version.pk])
+        project_version.refresh_from_db()
+        old_snapshot = get_snapshot(project_version)
+
+        KlassFactory.create(module=module, name="Added")
+        rebuild_derived_data([project_version.pk])
+        project_version.refresh_from_db()
+        new_snapshot = get_snapshot(project_version)
+
+        assert new_snapshot is not old_snapshot
+        assert [k.name for k in old_snapshot.klasses] == []
+        assert [k.name for k in new_snapshot.klasses] == ["Added"]
+
+    def test_fingerprint_ignores_primary_keys(self) -> None:
+        first = ModuleFactory.create(name="module").project_version
+        second = ModuleFactory.create(name="module").project_version
+
+        rebuild_derived_data([first.pk, second.pk])
+
+        fingerprints = ProjectVersion.objects.values_list("fingerprint", flat=True)
+        assert len(set(fingerprints)) == 1
+
+
+@pytest.mark.django_db
+class TestBuildSnapshot:
+    def test_hierarchy(self) -> None:
+        """
+        A
+        |
+        B
+        """
+        module = ModuleFactory.create()
+        a = KlassFactory.create(module=module, name="A")
+        b = KlassFactory.create(module=module, name="B")
+        InheritanceFactory.create(parent=a, child=b)
+        KlassAttributeFactory.create(klass=a, name="x", value="1")
+        KlassAttributeFactory.create(klass=b, name="x", value="2")
+        rebuild_derived_data([module.project_version_id])
+
+        snapshot = get_snapshot(module.project_version)
+
+        snapshot_a = snapshot.get_klass(module.name, "a")
+        snapshot_b = snapshot.get_klass(module.name.upper(), "B")
+        assert snapshot_b.ancestors == (snapshot_a,)
+        assert snapshot.descendants[snapshot_a] == (snapshot_b,)
+        assert [
+            (a.klass, a.value, a.overridden) for a in snapshot.attributes[snapshot_b]
+        ] == [(snapshot_b, "2", False), (snapshot_a, "1", True)]
+
+    def test_methods_ordered_by_name_then_mro(self) -> None:
+        """
+        Methods from the whole hierarchy are returned, with overridden ones marked.
+
+        A
+        |
+        B
+        """
+        module = ModuleFactory.create()
+        a = KlassFactory.create(module=module, name="A")
+        b = KlassFactory.create(module=module, name="B")
+        InheritanceFactory.create(parent=a, child=b)
+        MethodFactory.create(klass=a, name="get")
+        MethodFactory.create(klass=a, name="post")
+        MethodFactory.create(klass=b, name="get")
+        rebuild_derived_data([module.project_version_id])
+
+        snapshot = get_snapshot(module.project_version)
+
+        snapshot_a = snapshot.get_klass(module.name, "A")
+        snapshot_b = snapshot.get_klass(module.name, "B")
+        assert [
+            (m.klass, m.name, m.overridden) for m in snapshot.methods[snapshot_b]
+        ] == [
+            (snapshot_b, "get", False),
+            (snapshot_a, "get", True),
+            (snapshot_a, "post", False),
+        ]
+
+    def test_attributes_overridden(self) -> None:
+        """
+        A
+        |
+        B
+        |
+        C
+        """
+        module = ModuleFactory.create()
+        a = KlassFactory.create(module=module, name="A")
+        b = KlassFactory.create(module=module, name="B")
+        c = KlassFactory.create(module=module, name="C")
+        InheritanceFactory.create(parent=a, child=b)
+        InheritanceFactory.create(parent=b, child=c)
+        KlassAttributeFactory.create(klass=a, name="template_name")
+        KlassAttributeFactory.create(klass=b, name="template_name")
+        rebuild_derived_data([module.project_version_id])
+
+        snapshot = get_snapshot(module.project_version)
+
+        snapshot_a = snapshot.get_klass(module.name, "A")
+        snapshot_b = snapshot.get_klass(module.name, "B")
+        snapshot_c = snapshot.get_klass(module.name, "C")
+        assert [(a.klass, a.overridden) for a in snapshot.attributes[snapshot_c]] == [
+            (snapshot_b, False),
+            (snapshot_a, True),
+        ]
+
+    def test_yuml_url(self) -> None:
+        """
+        A
+        |
+        BMixin
+        """
+        module = ModuleFactory.create()
+        a = KlassFactory.create(module=module, name="A")
+        b = KlassFactory.create(module=module, name="BMixin")
+        InheritanceFactory.create(parent=a, child=b)
+        rebuild_derived_data([module.project_version_id])
+
+        snapshot = get_snapshot(module.project_version)
+
+        assert snapshot.get_klass(module.name, "A").yuml_url is None
+        assert snapshot.get_klass(module.name, "BMixin").yuml_url == (
+            "https://yuml.me/diagram/plain;/class/[A{bg:lightblue}]^-[BMixin{bg:green}].svg"
+        )
@@ -0,0 +1,249 @@
+from itertools import chain
+
+import pytest
+from django.core.management import call_command
+from pytest_django import DjangoAssertNumQueries
+
+from cbv import models
+from cbv.importer.dataclasses import CodeElement, Klass, KlassAttribute, Method, Module
+from cbv.importer.importers import PreloadedCodeImporter
+from cbv.importer.storages import Changes, DBStorage, get_descendants
+
+
+ELEMENTS: list[CodeElement] = [
+    Module(name="views", docstring="The views.", filename="/views.py"),
+    Klass(
+        name="View",
+        module="views",
+        docstring="A view.",
+        line_number=1,
+        path="views.View",
+        bases=["builtins.object"],
+        best_import_path="views",
+    ),
+    KlassAttribute(
+        name="template_name",
+        value="'view.html'",
+        line_number=2,
+        klass_path="views.View",
+    ),
+    Method(
+        name="get",
+        code="def get(self):\n    pass\n",
+        docstring="",
+        kwargs="self",
+        line_number=3,
+        klass_path="views.View",
+    ),
+    Klass(
+        name="DetailView",
+        module="views",
+        docstring="",
+        line_number=6,
+        path="views.DetailView",
+        bases=["views.View"],
+        best_import_path="views",
+    ),
+    KlassAttribute(
+        name="template_name",
+        value="'view.html'",
+        line_number=2,
+        klass_path="views.DetailView",
+    ),
+]
+
+
+@pytest.mark.django_db
+class TestDBStorage:
+    def test_import_project_version(self, capsys: pytest.CaptureFixture[str]) -> None:
+        DBStorage().import_project_version(
+            importer=PreloadedCodeImporter(elements=ELEMENTS), project_version="1.0"
+        )
+
+        project_version = models.ProjectVersion.objects.get()
+        view = models.Klass.objects.get(name="View")
+        detail_view = models.Klass.objects.get(name="DetailView")
+        assert project_version.version_number == "1.0"
+        assert project_version.fingerprint
+        assert view.module.project_version == project_version
+        assert detail_view.get_all_ancestors() == [view]
+        assert list(view.method_set.values_list("name", "kwargs")) == [("get", "self")]
+        # The inherited attribute is only stored where it was defined.
+        assert list(
+            models.KlassAttribute.objects.values_list("klass__name", "name")
+        ) == [("View", "template_name")]
+        assert models.HighlightedCode.objects.count() == 1
+        assert capsys.readouterr().out == (
+            "Stored:\n Modules: 1\n Classes: 2\n Methods: 1\n Attributes: 1\n"
+        )
+
+    def test_reimport(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Importing a version again replaces it, and leaves other versions alone."""
+        storage = DBStorage()
+        for version in ["1.0", "2.0", "2.0"]:
+            storage.import_project_version(
+                importer=PreloadedCodeImporter(elements=ELEMENTS),
+                project_version=version,
+            )
+
+        assert list(
+            models.ProjectVersion.objects.order_by("version_number").values_list(
+                "version_number", flat=True
+            )
+        ) == ["1.0", "2.0"]
+        assert models.Klass.objects.count() == 4
+        assert models.Inheritance.objects.count() == 2
+        assert models.KlassAttribute.objects.count() == 2
+        # Counts are of what was stored, rather than of every version.
+        assert capsys.readouterr().out.endswith(" Attributes: 1\n")
+
+    def test_queries(self, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+        """The number of queries doesn't grow with the number of classes."""
+        elements = [
+            *ELEMENTS,
+            *chain.from_iterable(
+                [
+                    Klass(
+                        name=f"View{i}",
+                        module="views",
+                        docstring="",
+                        line_number=10 + i,
+                        path=f"views.View{i}",
+                        bases=["views.DetailView"],
+                        best_import_path="views",
+                    ),
+                    KlassAttribute(
+                        name="template_name",
+                        value="'view.html'",
+                        line_number=2,
+                        klass_path=f"views.View{i}",
+                    ),
+                ]
+                for i in range(20)
+            ),
+        ]
+
+        with django_assert_num_queries(33):
+            DBStorage().import_project_version(
+                importer=PreloadedCodeImporter(elements=elements),
+                project_version="1.0",
+            )
+
+        assert models.KlassAttribute.objects.count() == 1
+
+    def test_update_unchanged(self) -> None:
+        storage = DBStorage()
+        storage.import_project_version(
+            importer=PreloadedCodeImporter(elements=ELEMENTS), project_version="1.0"
+        )
+        project_version = models.ProjectVersion.objects.get()
+
+        changes = storage.update_project_version(
+            importer=PreloadedCodeImporter(elements=ELEMENTS), project_version="1.0"
+        )
+
+        assert set(changes.values()) == {Changes(created=0, updated=0, deleted=0)}
+        assert models.ProjectVersion.objects.get() == project_version
+        assert models.ProjectVersion.objects.get().last_modified == (
+            project_version.last_modified
+        )
+
+    def test_update(self) -> None:
+        storage = DBStorage()
+        storage.import_project_version(
+            importer=PreloadedCodeImporter(elements=ELEMENTS), project_version="1.0"
+        )
+        view = models.Klass.objects.get(name="View")
+        method = models.Method.objects.get()
+        fingerprint = models.ProjectVersion.objects.get().fingerprint
+        elements = [
+            # Change the docstring of View.
+            Klass(
+                name="View",
+                module="views",
+                docstring="Changed.",
+                line_number=1,
+                path="views.View",
+                bases=["builtins.object"],
+                best_import_path="views",
+            ),
+            *ELEMENTS[2:4],
+            # Drop DetailView and its attribute, and add a new class.
+            *ELEMENTS[:1],
+            Klass(
+                name="ListView",
+                module="views",
+                docstring="",
+                line_number=10,
+                path="views.ListView",
+                bases=["views.View"],
+                best_import_path="views",
+            ),
+        ]
+
+        changes = storage.update_project_version(
+            importer=PreloadedCodeImporter(elements=elements), project_version="1.0"
+        )
+
+        assert changes == {
+            "Modules": Changes(created=0, updated=0, deleted=0),
+            "Classes": Changes(created=1, updated=1, deleted=1),
+            "Methods": Changes(created=0, updated=0, deleted=0),
+            "Inheritance": Changes(created=1, updated=0, deleted=1),
+            "Attributes": Changes(created=0, updated=0, deleted=0),
+        }
+        # Rows which were kept, kept their primary keys.
+        assert models.Klass.objects.get(pk=view.pk).docstring == "Changed."
+        assert models.Method.objects.get().pk == method.pk
+        list_view = models.Klass.objects.get(name="ListView")
+        assert list_view.get_all_ancestors() == [view]
+        assert not models.Klass.objects.filter(name="DetailView").exists()
+        assert models.ProjectVersion.objects.get().fingerprint != fingerprint
+
+
+@pytest.mark.django_db
+def test_populate_incremental_unchanged(capsys: pytest.CaptureFixture[str]) -> None:
+    call_command("populate_cbv", "--incremental")
+    project_version = models.ProjectVersion.objects.get()
+    capsys.readouterr()
+
+    call_command("populate_cbv", "--incremental")
+
+    changed = capsys.readouterr().out.split("Changed:\n")[1].split("Read ")[0]
+    assert changed.splitlines() == [
+        f" {table}: 0 created, 0 updated, 0 deleted"
+        for table in ["Modules", "Classes", "Methods", "Inheritance", "Attributes"]
+    ]
+    assert models.ProjectVersion.objects.get().fingerprint == (
+        project_version.fingerprint
+    )
+    # Addresses would differ the next time Django is inspected.
+    assert not models.KlassAttribute.objects.filter(value__contains=" at 0x").exists()
+
+
+class TestGetDescendants:
+    def test_diamond(self) -> None:
+        klasses = [
+            Klass(
+                name=name,
+                module="views",
+                docstring="",
+                line_number=1,
+                path=f"views.{name}",
+                bases=[f"views.{base}" for base in bases],
+                best_import_path="views",
+            )
+            for name, bases in [
+                ("A", ["builtins.object"]),
+                ("B", ["A"]),
+                ("C", ["A"]),
+                ("D", ["B", "C"]),
+            ]
+        ]
+
+        assert get_descendants(klasses) == {
+            "views.A": {"views.B", "views.C", "views.D"},
+            "views.B": {"views.D"},
+            "views.C": {"views.D"},
+            "views.D": set(),
+        }
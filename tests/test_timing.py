@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.test.client import Client
+from pytest_django.fixtures import SettingsWrapper
+
+from cbv.importer.storages import rebuild_derived_data
+from cbv.timing import Timings, timed
+
+from .factories import KlassFactory
+
+
+@pytest.mark.django_db
+class TestServerTimingMiddleware:
+    url = "/projects/Django/42.0/django.views.generic.edit/FormView/"
+
+    @pytest.fixture(autouse=True)
+    def _version(self, settings: SettingsWrapper) -> None:
+        # Let the pages be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        settings.CBV_SERVER_TIMING_SAMPLE_RATE = 1.0
+        klass = KlassFactory.create(
+            name="FormView",
+            module__name="django.views.generic.edit",
+            module__project_version__version_number="42.0",
+        )
+        rebuild_derived_data([klass.module.project_version_id])
+
+    def test_header(self, client: Client) -> None:
+        response = client.get(self.url)
+
+        metrics = [
+            metric.split(";")[0] for metric in response["Server-Timing"].split(", ")
+        ]
+        assert metrics == ["db", "snapshot", "nav", "context", "render", "total"]
+        assert "db;dur=" in response["Server-Timing"]
+        assert ' queries"' in response["Server-Timing"]
+
+    def test_cached(self, client: Client) -> None:
+        client.get(self.url)
+
+        response = client.get(self.url)
+
+        metrics = [
+            metric.split(";")[0] for metric in response["Server-Timing"].split(", ")
+        ]
+        assert metrics == ["db", "total"]
+
+    def test_disabled(self, client: Client, settings: SettingsWrapper) -> None:
+        settings.CBV_SERVER_TIMING_SAMPLE_RATE = 0.0
+
+        response = client.get(self.url)
+
+        assert "Server-Timing" not in response
+
+    def test_content_unchanged(self, settings: SettingsWrapper) -> None:
+        timed_content = Client().get(self.url).content
+        settings.CBV_SERVER_TIMING_SAMPLE_RATE = 0.0
+
+        # The page comes from the cache, so render it again.
+        cache.clear()
+        content = Client().get(self.url).content
+
+        assert timed_content == content
+
+    def test_log(
+        self,
+        client: Client,
+        settings: SettingsWrapper,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        settings.CBV_SERVER_TIMING_LOG = True
+
+        with caplog.at_level("INFO", logger="cbv.timing"):
+            client.get(self.url)
+
+        [record] = caplog.records
+        data = json.loads(record.getMessage())
+        assert data["path"] == self.url
+        assert data["status"] == 200
+        assert data["queries"] > 0
+        assert data["total"] >= data["context"]
+
+
+def test_timed_outside_request() -> None:
+    """Without a sampled request, timed code runs as normal."""
+    with timed("context"):
+        value = 1
+
+    assert value == 1
+
+
+def test_to_header() -> None:
+    timings = Timings(durations={"db": 0.0012, "total": 0.01}, queries=3)
+
+    assert timings.to_header() == 'db;dur=1.2;desc="3 queries", total;dur=10.0'
@@ -1,12 +1,17 @@
+import datetime
 from pathlib import Path
 from typing import Protocol
 
 import pytest
 from django.test.client import Client
 from django.test.utils import CaptureQueriesContext
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from pytest_django.fixtures import SettingsWrapper
 
-from .factories import KlassFactory, ProjectVersionFactory
+from cbv.importer.storages import rebuild_derived_data
+from cbv.models import Klass
+
+from .factories import KlassFactory, ModuleFactory, ProjectVersionFactory
 
 
 class AssertNumQueriesFixture(Protocol):  # nocoverage: protocol
@@ -29,33 +34,240 @@ class TestSitemap:
         self, client: Client, django_assert_num_queries: AssertNumQueriesFixture
     ) -> None:
         KlassFactory.create()
-        with django_assert_num_queries(2):  # Get ProjectVersion, get Klasses.
+        with django_assert_num_queries(1):  # Get ProjectVersions.
             client.get(self.url)
 
-    def test_empty_content(self, client: Client) -> None:
-        ProjectVersionFactory.create()
+    def test_content(self, client: Client) -> None:
+        ProjectVersionFactory.create(
+            version_number="41.0", last_modified=datetime.datetime(2024, 1, 2, 3, 4)
+        )
+        ProjectVersionFactory.create(version_number="42.0")
 
         response = client.get(self.url)
 
-        filename = "tests/files/empty-sitemap.xml"
+        filename = "tests/files/sitemap.xml"
         assert response.content.decode() == Path(filename).read_text()
 
-    def test_populated_content(self, client: Client) -> None:
+
+@pytest.mark.django_db
+class TestVersionSitemap:
+    @pytest.fixture(autouse=True)
+    def _versions(self) -> None:
+        for version_number, last_modified in [
+            ("41.0", datetime.datetime(2024, 1, 2, 3, 4)),
+            ("42.0", datetime.datetime(2025, 1, 2, 3, 4)),
+        ]:
+            module = ModuleFactory.create(
+                name="module.name",
+                project_version__version_number=version_number,
+                project_version__last_modified=last_modified,
+            )
+            KlassFactory.create(name="Klass", module=module)
+            KlassFactory.create(name="OtherKlass", module=module)
+
+    def get(self, client: Client, version_number: str, **extra: str) -> str:
+        response = client.get(
+            reverse("version-sitemap", kwargs={"version": version_number}), **extra
+        )
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/xml"
+        return b"".join(response.streaming_content).decode()
+
+    def test_queries(
+        self, client: Client, django_assert_num_queries: AssertNumQueriesFixture
+    ) -> None:
+        with django_assert_num_queries(2):  # Get ProjectVersions, get Klasses.
+            self.get(client, "42.0")
+
+    def test_latest_content(self, client: Client) -> None:
+        content = self.get(client, "42.0")
+
+        filename = "tests/files/latest-version-sitemap.xml"
+        assert content == Path(filename).read_text()
+
+    def test_older_content(self, client: Client) -> None:
+        content = self.get(client, "41.0")
+
+        filename = "tests/files/version-sitemap.xml"
+        assert content == Path(filename).read_text()
+
+    def test_not_modified(self, client: Client) -> None:
+        response = client.get(
+            reverse("version-sitemap", kwargs={"version": "41.0"}),
+            headers={"If-Modified-Since": "Tue, 02 Jan 2024 03:04:00 GMT"},
+        )
+
+        assert response.status_code == 304
+
+    def test_404(self, client: Client, settings: SettingsWrapper) -> None:
+        # Let the 404 page be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+
+        response = client.get(reverse("version-sitemap", kwargs={"version": "40.0"}))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestVersionPageCache:
+    url = "/projects/Django/42.0/django.views.generic.edit/FormView/"
+
+    @pytest.fixture(autouse=True)
+    def _plain_static_files(self, settings: SettingsWrapper) -> None:
+        # Let the pages be rendered without running collectstatic first.
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+
+    @pytest.fixture
+    def klass(self) -> Klass:
+        klass = KlassFactory.create(
+            name="FormView",
+            docstring="Old docstring.",
+            module__name="django.views.generic.edit",
+            module__project_version__version_number="42.0",
+        )
+        rebuild_derived_data([klass.module.project_version_id])
+        return klass
+
+    def test_cached(
+        self,
+        client: Client,
+        django_assert_num_queries: AssertNumQueriesFixture,
+        klass: Klass,
+    ) -> None:
+        first_response = client.get(self.url)
+
+        with django_assert_num_queries(1):  # Check the versions haven't changed.
+            response = client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.content == first_response.content
+
+    def test_invalidated_when_version_changes(
+        self, client: Client, klass: Klass
+    ) -> None:
+        client.get(self.url)
+        klass.docstring = "New docstring."
+        klass.save()
+        rebuild_derived_data([klass.module.project_version_id])
+
+        response = client.get(self.url)
+
+        assert b"New docstring." in response.content
+
+    def test_headers(self, client: Client, klass: Klass) -> None:
+        response = client.get(self.url)
+
+        assert response["ETag"]
+        assert response["Last-Modified"]
+        assert response["Cache-Control"] == "public, max-age=86400, immutable"
+
+    def test_not_modified(
+        self,
+        client: Client,
+        django_assert_num_queries: AssertNumQueriesFixture,
+        klass: Klass,
+    ) -> None:
+        etag = client.get(self.url)["ETag"]
+
+        # Check the versions haven't changed, and that the version exists.
+        with django_assert_num_queries(2):
+            response = client.get(self.url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert response["Cache-Control"] == "public, max-age=86400, immutable"
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            pytest.param("/", id="home"),
+            pytest.param("/projects/Django/42.0/", id="version"),
+        ],
+    )
+    def test_not_modified_without_snapshot(
+        self,
+        client: Client,
+        django_assert_num_queries: AssertNumQueriesFixture,
+        klass: Klass,
+        url: str,
+    ) -> None:
+        etag = client.get(url)["ETag"]
+
+        # The version is checked in the index, so nothing else is queried.
+        with django_assert_num_queries(1):
+            response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            pytest.param(
+                "/projects/Django/42.0/django.views.generic.edit/Missing/", id="class"
+            ),
+            pytest.param("/projects/Django/42.0/django.views.missing/", id="module"),
+            pytest.param("/projects/Django/1.0/", id="version"),
+        ],
+    )
+    def test_not_modified_missing(self, client: Client, klass: Klass, url: str) -> None:
+        etag = client.get(self.url)["ETag"]
+
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 404
+
+    def test_modified(self, client: Client, klass: Klass) -> None:
+        etag = client.get(self.url)["ETag"]
+        klass.docstring = "New docstring."
+        klass.save()
+        rebuild_derived_data([klass.module.project_version_id])
+
+        response = client.get(self.url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_latest_version(self, client: Client, klass: Klass) -> None:
+        response = client.get("/")
+
+        assert response["Cache-Control"] == "public, max-age=300"
+
+
+@pytest.mark.django_db
+class TestLatestKlassRedirectView:
+    def test_redirects_to_latest_version(
+        self, client: Client, django_assert_num_queries: AssertNumQueriesFixture
+    ) -> None:
         KlassFactory.create(
-            name="Klass",
-            module__name="module.name",
+            name="FormView",
+            module__name="django.views.generic.edit",
             module__project_version__version_number="41.0",
         )
         KlassFactory.create(
-            name="Klass",
-            module__name="module.name",
+            name="FormView",
+            module__name="django.views.generic.edit",
             module__project_version__version_number="42.0",
         )
 
-        response = client.get(self.url)
+        with django_assert_num_queries(1):
+            response = client.get("/fORMvIEW/")
 
-        filename = "tests/files/populated-sitemap.xml"
-        assert response.content.decode() == Path(filename).read_text()
+        assert response.status_code == 302
+        assert response["Cache-Control"] == "public, max-age=300"
+        assert (
+            response["Location"]
+            == "/projects/Django/42.0/django.views.generic.edit/FormView/"
+        )
 
 
 class TestBasicHealthcheck:
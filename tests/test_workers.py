@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import django
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from cbv.importer.dataclasses import CodeElement, Klass, KlassAttribute, Method, Module
+from cbv.importer.workers import (
+    deserialize_element,
+    import_in_subprocess,
+    serialize_element,
+)
+
+
+@pytest.mark.parametrize(
+    "element",
+    [
+        Module(name="module", docstring="Docstring.", filename="/module.py"),
+        Klass(
+            name="Klass",
+            module="module",
+            docstring="",
+            line_number=1,
+            path="module.Klass",
+            bases=["module.Base"],
+            best_import_path="module",
+        ),
+        KlassAttribute(
+            name="attribute", value="'value'", line_number=2, klass_path="module.Klass"
+        ),
+        Method(
+            name="method",
+            code="def method(self):\n    pass\n",
+            docstring="",
+            kwargs="self",
+            line_number=3,
+            klass_path="module.Klass",
+        ),
+    ],
+)
+def test_round_trip(element: CodeElement) -> None:
+    line = serialize_element(element)
+
+    assert "\n" not in line
+    assert deserialize_element(line) == element
+
+
+def test_import_in_subprocess() -> None:
+    version, elements = import_in_subprocess(
+        sys.executable, ["django.views.generic.base"]
+    )
+
+    assert version == django.get_version()
+    assert (
+        Module(
+            name="django.views.generic.base",
+            docstring="",
+            filename="/django/views/generic/base.py",
+        )
+        in elements
+    )
+    assert "django.views.generic.base.View" in {
+        element.path for element in elements if isinstance(element, Klass)
+    }
+
+
+@pytest.mark.django_db
+def test_failing_worker(tmp_path: Path) -> None:
+    python = tmp_path / "python"
+    python.write_text("#!/bin/sh\nexit 1\n")
+    python.chmod(0o755)
+
+    with pytest.raises(CommandError, match="failed with exit code 1"):
+        call_command("populate_cbv_versions", str(python))